@@ -34,7 +34,11 @@ bucket = gcp.storage.Bucket('vid-creation-bucket',
     }],
     lifecycle_rules=[{
         'action': {'type': 'Delete'},
-        'condition': {'age': 30} # Delete videos older than 30 days
+        'condition': {'age': 30, 'matches_prefixes': ['assets/']} # Delete videos older than 30 days
+    }, {
+        # Archived job history (src.archiver) is written once and rarely read
+        'action': {'type': 'SetStorageClass', 'storage_class': 'COLDLINE'},
+        'condition': {'age': 1, 'matches_prefixes': ['archive/']}
     }],
     opts=pulumi.ResourceOptions(depends_on=[storage_api])
 )
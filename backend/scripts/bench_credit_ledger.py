@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Measure credit reservation throughput for a single account under concurrent submissions.
+Each ledger shard only accepts one write at a time (like a Firestore document), so a
+one-shard ledger is the naive single-balance design.
+
+Usage: python -m scripts.bench_credit_ledger [--reservations 2000] [--concurrency 200] [--write-ms 20]
+"""
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+from src.repositories.memory_repository import InMemoryCreditLedger
+
+
+async def run(shards: int, reservations: int, starting_credits: int, concurrency: int, write_seconds: float):
+    ledger = InMemoryCreditLedger(shards, starting_credits, document_write_seconds=write_seconds)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def submit():
+        async with semaphore:
+            start = time.perf_counter()
+            reserved = await ledger.reserve("bench-user", str(uuid4()), 1)
+            latencies.append(time.perf_counter() - start)
+            return reserved
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(submit() for _ in range(reservations)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"  {shards:>3} shards: {sum(results)}/{reservations} reserved in {elapsed:.2f}s "
+          f"= {reservations / elapsed:.0f}/s, p50 {p50:.0f}ms, p99 {p99:.0f}ms, "
+          f"balance left {await ledger.balance('bench-user')}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reservations", type=int, default=2000)
+    parser.add_argument("--starting-credits", type=int, default=None,
+                        help="Account balance (default: twice the reservations; set it equal to see the drain-down slow path)")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--write-ms", type=float, default=20.0,
+                        help="Time each shard write holds the shard (sustained per-document write latency)")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    starting_credits = args.starting_credits or args.reservations * 2
+    print(f"{args.reservations} reservations from one account, {args.concurrency} in flight, "
+          f"{args.write_ms:.0f}ms per shard write")
+    for shards in args.shards:
+        asyncio.run(run(shards, args.reservations, starting_credits, args.concurrency, args.write_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
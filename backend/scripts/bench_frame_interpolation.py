@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Measure optical-flow frame interpolation throughput on a synthetic video.
+Reports output frames per second overall and per pool process, for each pool size.
+
+Usage: python -m scripts.bench_frame_interpolation [--resolution 480p] [--frames 81] [--factor 2]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.media.interpolate import interpolate_video
+from src.providers.fake_provider import RESOLUTIONS, write_synthetic_video
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resolution", choices=sorted(RESOLUTIONS), default="480p")
+    parser.add_argument("--frames", type=int, default=81)
+    parser.add_argument("--fps", type=int, default=16)
+    parser.add_argument("--factor", type=int, default=2)
+    parser.add_argument("--chunk-frames", type=int, default=16)
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, max(os.cpu_count() // 2, 1), os.cpu_count()}))
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.resolution]
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = os.path.join(work_dir, "source.mp4")
+        write_synthetic_video(source, width, height, args.frames, args.fps, seed=0)
+        print(f"{args.frames} frames at {width}x{height}, {args.fps} -> {args.fps * args.factor} fps")
+
+        for processes in args.processes:
+            with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+                # Warm the pool so process start-up is not measured
+                list(pool.map(abs, range(processes)))
+                start = time.perf_counter()
+                stats = interpolate_video(source, os.path.join(work_dir, "out.mp4"), args.factor, pool,
+                                          args.chunk_frames, max_pending_chunks=processes * 2)
+                elapsed = time.perf_counter() - start
+            rate = stats["frames"] / elapsed
+            print(f"  {processes:>3} processes: {stats['frames']} frames in {elapsed:.2f}s "
+                  f"= {rate:.1f} frames/s ({rate / processes:.1f} per process)")
+
+
+if __name__ == "__main__":
+    main()
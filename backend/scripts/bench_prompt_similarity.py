@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Measure near-duplicate prompt lookup latency with 1M stored prompts.
+Prompts are synthetic (8-16 words from a made-up vocabulary). Queries are half
+rewordings of stored prompts (shuffled words, changed case and punctuation) and
+half unseen prompts; a lookup is embedding the query plus querying one scope.
+The stored prompts are tried both as a single scope (worst case: one user with
+every job) and spread over many scopes.
+
+Usage: python -m scripts.bench_prompt_similarity [--prompts 1000000] [--dim 256] [--scopes 1000] [--queries 500]
+"""
+import argparse
+import asyncio
+import random
+import time
+import numpy as np
+from src.config import config
+from src.services.prompt_similarity import PromptVectorIndex, embed_prompts
+
+SIGNATURE = 0
+EMBED_BATCH = 50_000
+
+
+def make_vocabulary(rng: random.Random):
+    syllables = ["ka", "lo", "mi", "ra", "ten", "su", "vor", "el", "shi", "an", "dru", "pel", "qua", "zo", "nit"]
+    return ["".join(rng.choices(syllables, k=rng.randint(1, 3))) for _ in range(5_000)]
+
+
+def make_prompts(count: int, vocabulary, rng: random.Random):
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(8, 16))) for _ in range(count)]
+
+
+def reword(prompt: str, rng: random.Random) -> str:
+    words = prompt.split()
+    rng.shuffle(words)
+    return ", ".join(words).capitalize() + "!"
+
+
+def percentile(samples, fraction):
+    return sorted(samples)[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+async def run_lookups(index: PromptVectorIndex, scope_of, queries, threshold: float, dim: int):
+    latencies, found, false_matches = [], 0, 0
+    for query, expected in queries:
+        start = time.perf_counter()
+        matches = await index.query(scope_of(expected), embed_prompts([query], dim)[0], SIGNATURE, 1, threshold)
+        latencies.append(time.perf_counter() - start)
+        if expected is not None and matches and matches[0][0] == str(expected):
+            found += 1
+        elif expected is None and matches:
+            false_matches += 1
+    rewordings = sum(1 for _, expected in queries if expected is not None)
+    print(f"    lookup p50 {percentile(latencies, 0.5):.2f}ms, p99 {percentile(latencies, 0.99):.2f}ms; "
+          f"rewordings found {found}/{rewordings}, unseen prompts matched {false_matches}/{len(queries) - rewordings}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=config.PROMPT_EMBEDDING_DIM)
+    parser.add_argument("--scopes", type=int, default=1_000, help="Scopes for the spread-out run")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=config.PROMPT_REUSE_THRESHOLD)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    vocabulary = make_vocabulary(rng)
+    prompts = make_prompts(args.prompts, vocabulary, rng)
+    vectors = np.empty((args.prompts, args.dim), dtype=np.float32)
+    start = time.perf_counter()
+    for offset in range(0, args.prompts, EMBED_BATCH):
+        vectors[offset:offset + EMBED_BATCH] = embed_prompts(prompts[offset:offset + EMBED_BATCH], args.dim)
+    elapsed = time.perf_counter() - start
+    print(f"Embedded {args.prompts} prompts ({args.dim} dims) in {elapsed:.1f}s = {args.prompts / elapsed:.0f}/s, "
+          f"{vectors.nbytes / 2**20:.0f} MiB")
+
+    # Rewordings of stored prompts (expected match: their index) and unseen prompts (no match expected)
+    queries = [(reword(prompts[i], rng), i) for i in rng.sample(range(args.prompts), args.queries // 2)]
+    queries += [(prompt, None) for prompt in make_prompts(args.queries - len(queries), vocabulary, rng)]
+    rng.shuffle(queries)
+    job_ids = [str(i) for i in range(args.prompts)]
+    signatures = [SIGNATURE] * args.prompts
+
+    print(f"  1 scope of {args.prompts}:")
+    index = PromptVectorIndex(args.dim, args.prompts)
+    index.load("all", job_ids, signatures, vectors)
+    asyncio.run(run_lookups(index, lambda expected: "all", queries, args.threshold, args.dim))
+    index.drop("all")
+
+    per_scope = args.prompts // args.scopes
+    print(f"  {args.scopes} scopes of {per_scope}:")
+    for scope in range(args.scopes):
+        rows = slice(scope * per_scope, (scope + 1) * per_scope)
+        index.load(scope, job_ids[rows], signatures[rows], vectors[rows])
+    # Unseen prompts go to random scopes
+    asyncio.run(run_lookups(
+        index, lambda expected: rng.randrange(args.scopes) if expected is None else expected // per_scope,
+        [(query, expected) for query, expected in queries if expected is None or expected < per_scope * args.scopes],
+        args.threshold, args.dim
+    ))
+    print(f"  index: {index.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
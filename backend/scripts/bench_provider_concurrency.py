@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Exercise the adaptive provider concurrency limiter against the local fake provider.
+The fake rejects calls beyond its capacity with 429s; the limiter should settle
+near that capacity with few throttled calls, while the unlimited run is throttled heavily.
+
+Usage: python -m scripts.bench_provider_concurrency [--clients 64] [--capacity 8]
+"""
+import argparse
+import asyncio
+import time
+from src.services.concurrency import AdaptiveConcurrencyLimiter
+from src.providers.fake_provider import FakeProvider
+from src.services.resilience import CircuitBreaker, ProviderError, call_with_retry
+
+
+async def run(clients: int, capacity: int, calls: int, latency: float, limited: bool):
+    provider = FakeProvider(duration_median_seconds=60, api_latency_median_seconds=latency, api_latency_sigma=0,
+                            max_concurrent_requests=capacity, video_size=(16, 16), video_frames=1)
+    # High threshold: this measures the limiter, not the breaker
+    breaker = CircuitBreaker("bench", failure_threshold=10**9, reset_timeout_seconds=1)
+    limiter = AdaptiveConcurrencyLimiter("bench", initial_limit=1, min_limit=1, max_limit=256,
+                                         latency_target_seconds=latency * 4) if limited else None
+    failures = 0
+
+    async def client():
+        nonlocal failures
+        for _ in range(calls):
+            try:
+                await call_with_retry(
+                    lambda: provider.create_video_prediction({}),
+                    breaker, limiter, attempts=8, base_delay_seconds=latency, max_delay_seconds=latency * 20
+                )
+            except ProviderError:
+                failures += 1
+
+    async def report():
+        while True:
+            await asyncio.sleep(0.5)
+            if limiter:
+                print(f"  {limiter.snapshot()}")
+
+    reporter = asyncio.create_task(report())
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    reporter.cancel()
+    total = clients * calls
+    print(f"{'limited' if limited else 'unlimited'}: {total} calls in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} calls/s), {provider.throttled_requests} throttled, {failures} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    for limited in (False, True):
+        asyncio.run(run(args.clients, args.capacity, args.calls, args.latency, limited))
+
+
+if __name__ == "__main__":
+    main()
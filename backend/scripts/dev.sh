@@ -4,5 +4,5 @@ pkill -f "uvicorn"
 
 source .venv/bin/activate
 
-# Start backend server
-python -m uvicorn src.main:app --reload --host 0.0.0.0 --port 8000 --env-file .env.development
+# Start backend server (processing jobs in-process; run `python -m src.worker` separately to test split tiers)
+RUN_EMBEDDED_WORKER=true python -m uvicorn src.main:app --reload --host 0.0.0.0 --port 8000 --env-file .env.development
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Load-test the job pipeline offline: in-memory repositories, local file storage
+and the fake generation provider. Reports throughput and end-to-end latency
+percentiles; results are reproducible for a given --seed.
+
+Usage: python -m scripts.load_test_pipeline [--jobs 200] [--concurrency 50] [--median 2.0]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from src.config import config
+from src.providers.fake_provider import FakeProvider
+from src.repositories.memory_repository import InMemoryDatabaseRepository, LocalFileStorageRepository
+from src.schemas.job import JobCreate, JobStatus, JobType
+from src.services.job_processor import JobProcessor
+from src.services.job_service import JobService
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+async def run(args):
+    config.REPLICATE_POLL_INTERVAL_SECONDS = args.poll_interval
+    provider = FakeProvider(
+        duration_median_seconds=args.median,
+        duration_sigma=args.sigma,
+        api_latency_median_seconds=args.api_latency,
+        failure_rate=args.failure_rate,
+        video_size=(args.width, args.height),
+        video_frames=args.frames,
+        seed=args.seed,
+    )
+    job_service = JobService(InMemoryDatabaseRepository(config.JOB_COLLECTION_NAME))
+    processor = JobProcessor(job_service, LocalFileStorageRepository(), provider)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i: int):
+        job = await job_service.create_job(
+            JobCreate(job_type=JobType.VIDEO, project_id="load-test", parameters={"prompt": f"load test {i}"}),
+            user_id=f"user-{i % 10}",
+        )
+        start = time.perf_counter()
+        async with semaphore:
+            await processor.process_job(job.job_type, job.job_id, job.parameters)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.jobs)))
+    elapsed = time.perf_counter() - start
+
+    statuses = [job["status"] for job in await job_service.db.find_all()]
+    completed = sum(1 for status in statuses if status == JobStatus.COMPLETED)
+    print(f"{args.jobs} jobs in {elapsed:.2f}s ({args.jobs / elapsed:.2f} jobs/s), "
+          f"{completed} completed, {len(statuses) - completed} failed")
+    print(f"latency p50={percentile(latencies, 0.5):.2f}s p95={percentile(latencies, 0.95):.2f}s "
+          f"p99={percentile(latencies, 0.99):.2f}s mean={statistics.mean(latencies):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--median", type=float, default=2.0, help="Median generation time (s)")
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--frames", type=int, default=33)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
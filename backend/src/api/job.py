@@ -1,11 +1,28 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from src.dependencies.dependencies_request import get_job_service, get_job_processor, get_mock_user
+import logging
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from src.config import config
+from src.api.webhooks import wait_for_job_update
+from src.dependencies.dependencies_request import (
+    get_job_service, get_job_processor, get_job_queue, get_admission_controller, get_idempotency_service,
+    get_recent_jobs_view, get_mock_user
+)
 from src.services.job_service import JobService
 from src.services.job_processor import JobProcessor
-from src.schemas.job import JobStatus, JobCreate, Job
+from src.repositories.base import JobQueueRepository
+from src.services.admission import AdmissionController
+from src.services.credits import InsufficientCreditsError
+from src.services.idempotency import IdempotencyService, IdempotencyError, request_hash
+from src.services.recent_jobs import RecentJobsView
+from src.schemas.job import JobStatus, JobCreate, Job, JobUpdate, JobSearchHit, JobSearchResults, TERMINAL_JOB_STATUSES
 from pydantic import BaseModel
+from datetime import datetime
 from src.schemas.user import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 class AssetUrlResponse(BaseModel):
@@ -14,14 +31,92 @@ class AssetUrlResponse(BaseModel):
     filename: str
     storage_path: str
 
+def _job_etag(job: Job) -> str:
+    """Jobs change only through update_job, which bumps modified_at."""
+    return f'"{int(job.modified_at.timestamp() * 1_000_000):x}"'
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+# Fixed /api/jobs/... paths are registered before /api/jobs/{job_id}, which would otherwise match them
+@router.get("/api/jobs/export.ndjson")
+async def export_user_jobs(
+    project_id: Optional[str] = None,
+    user: User = Depends(get_mock_user),
+    job_service: JobService = Depends(get_job_service)
+):
+    """
+    Stream all of the user's jobs (optionally one project's) as NDJSON, oldest first.
+    Jobs are read page by page and sent as they are read, so memory use does not
+    grow with history size and a slow client slows the database reads down.
+    """
+    async def ndjson():
+        buffer = []
+        size = 0
+        async for job in job_service.stream_user_jobs(user.user_id, project_id):
+            line = job.model_dump_json() + "\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= config.JOB_EXPORT_CHUNK_BYTES:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="jobs.ndjson"'}
+    )
+
+@router.get("/api/jobs/search", response_model=JobSearchResults)
+async def search_jobs(
+    q: str = Query(..., min_length=1, description="Words to find in job prompts"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user: User = Depends(get_mock_user),
+    job_service: JobService = Depends(get_job_service)
+):
+    """
+    Search the user's jobs by prompt text, best match first.
+    """
+    return await job_service.search_jobs(user.user_id, q, limit, offset)
+
+@router.post("/api/jobs/similar", response_model=list[JobSearchHit])
+async def find_similar_jobs(
+    job_request: JobCreate,
+    limit: int = Query(1, ge=1, le=20),
+    user: User = Depends(get_mock_user),
+    job_service: JobService = Depends(get_job_service)
+):
+    """
+    Completed jobs whose prompt is a near duplicate of this (not yet submitted) job's
+    and whose other parameters match, most similar first. Clients can offer one of
+    them instead of submitting; jobs created with parameters.reuse = "auto" reuse the
+    best match automatically.
+    """
+    return await job_service.find_similar_jobs(
+        user.user_id, job_request.project_id, job_request.job_type, job_request.parameters or {}, limit
+    )
+
 @router.get("/api/jobs/{job_id}", response_model=Job)
 async def get_job(
     job_id: str, 
+    response: Response,
+    wait: float = Query(0, ge=0, description="Long-poll: seconds to wait for the job to change"),
+    since: Optional[str] = Query(None, description="Long-poll: ETag the client already has"),
+    if_none_match: Optional[str] = Header(None),
     user: User = Depends(get_mock_user),
     job_service: JobService = Depends(get_job_service)
 ):
     """
     Get a specific job.
+    Responses carry an ETag; a matching If-None-Match gets 304. With `wait`, a
+    request whose ETag (`since`, else If-None-Match) still matches is held until
+    the job changes or `wait` seconds pass, then answered with 200 or 304.
     """
     if not job_id:
         raise HTTPException(status_code=400, detail="Job ID is required")
@@ -34,62 +129,118 @@ async def get_job(
     # if job.user_id != user.user_id:
     #     raise HTTPException(status_code=403, detail=f"Access denied for job {job_id} and user {user.user_id}")
     
-    return job
-
-@router.get("/api/jobs/{project_id}", response_model=list[Job])
-async def get_project_jobs(
-    project_id: str, 
-    limit: int = 50,
-    user: User = Depends(get_mock_user),
-    job_service: JobService = Depends(get_job_service)
-):
-    """
-    Get all jobs for a specific project and user.
-    """
-    if not project_id:
-        raise HTTPException(status_code=400, detail="Project ID is required")
+    known_etag = since or if_none_match
+    etag = _job_etag(job)
+    if wait and _etag_matches(known_etag, etag):
+        deadline = time.monotonic() + min(wait, config.JOB_LONG_POLL_MAX_WAIT_SECONDS)
+        while _etag_matches(known_etag, etag) and job.status not in TERMINAL_JOB_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Updates made by standalone workers are not published here, so re-read periodically
+            await wait_for_job_update(job_id, min(remaining, config.JOB_LONG_POLL_RECHECK_SECONDS))
+            job = await job_service.get_job_by_id(job_id) or job
+            etag = _job_etag(job)
     
-    # TODO: Maybe add endpoint that gets all jobs for a project without a user
-    jobs = await job_service.get_project_jobs(project_id, user.user_id, limit)
-    return jobs
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(known_etag, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return job
 
 @router.get("/api/jobs", response_model=list[Job])
 async def get_user_jobs(
     limit: int = 50,
     user: User = Depends(get_mock_user),
-    job_service: JobService = Depends(get_job_service)
+    job_service: JobService = Depends(get_job_service),
+    recent_jobs: Optional[RecentJobsView] = Depends(get_recent_jobs_view),
 ):
     """
-    Get all jobs for the authenticated user.
+    Get the authenticated user's most recent jobs, newest first.
+    Served from the in-memory recent-jobs view when it can answer.
     """
     if not user.user_id:
         raise HTTPException(status_code=400, detail="User ID is required")
-    jobs = await job_service.get_user_jobs(user.user_id, limit)
+    jobs = await recent_jobs.get(user.user_id, limit) if recent_jobs else None
+    if jobs is None:
+        jobs = await job_service.get_user_jobs(user.user_id, limit)
     return jobs
 
 @router.post("/api/jobs", response_model=Job)
 async def create_job(
     job_request: JobCreate,
-    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     user: User = Depends(get_mock_user),
     job_service: JobService = Depends(get_job_service),
-    job_processor: JobProcessor = Depends(get_job_processor),
+    job_queue: JobQueueRepository = Depends(get_job_queue),
+    admission: AdmissionController = Depends(get_admission_controller),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
 ):
     """
     Create a new job of any supported type.
+    Rejected with 429/503 and Retry-After when over rate limits or the backlog is full,
+    and with 402 when the user's credits cannot cover it.
+    With an Idempotency-Key header, retries of the same request return the original job
+    (422 if the key was used for a different body, 409 while the first attempt is in flight).
     """
-    job = await job_service.create_job(
-        job_request,
-        user_id=user.user_id,
-    )
+    # Shed load before any database write, replays included
+    rejection = await admission.admit(user.user_id)
+    if rejection:
+        raise HTTPException(
+            status_code=rejection.status_code,
+            detail=rejection.reason,
+            headers={"Retry-After": str(rejection.retry_after_seconds)}
+        )
     
-    # Start background processing
-    background_tasks.add_task(
-        job_processor.process_job,
-        job.job_type,
-        job.job_id,
-        job.parameters
-    )
+    body_hash = None
+    if idempotency_key is not None:
+        body_hash = request_hash(job_request.model_dump(mode="json"))
+        try:
+            existing_job_id = await idempotency.begin(user.user_id, idempotency_key, body_hash)
+        except IdempotencyError as e:
+            headers = {"Retry-After": "1"} if e.status_code == 409 else None
+            raise HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+        if existing_job_id:
+            job = await job_service.get_job_by_id(existing_job_id)
+            if not job:
+                raise HTTPException(status_code=404, detail=f"Job {existing_job_id} for this Idempotency-Key no longer exists")
+            response.headers["Idempotent-Replayed"] = "true"
+            return job
+    
+    try:
+        try:
+            job = await job_service.create_job(
+                job_request,
+                user_id=user.user_id,
+            )
+        except InsufficientCreditsError as e:
+            raise HTTPException(status_code=402, detail=str(e))
+    except BaseException:
+        # Nothing was created, so a retry with the same key should try again
+        if body_hash is not None:
+            await idempotency.release(user.user_id, idempotency_key)
+        raise
+    
+    # Hand off to the job workers before the key records the job, so a replay never returns a job nobody will run
+    try:
+        await job_queue.enqueue(job.model_dump(mode="json"))
+    except Exception as e:
+        logger.error(f"Failed to queue job {job.job_id}: {e}")
+        try:
+            # Failing the job refunds its credits
+            await job_service.update_job(job.job_id, JobUpdate(
+                status=JobStatus.FAILED,
+                completed_at=datetime.now(),
+                error="Job could not be queued"
+            ))
+        finally:
+            if body_hash is not None:
+                await idempotency.release(user.user_id, idempotency_key)
+        raise HTTPException(status_code=503, detail="Job could not be queued, try again", headers={"Retry-After": "1"})
+    
+    if body_hash is not None:
+        await idempotency.complete(user.user_id, idempotency_key, body_hash, job.job_id)
     
     return job
 
@@ -126,4 +277,32 @@ async def get_job_asset_url(
         asset_id=result.get("asset_id", job_id),
         filename=result.get("filename", ""),
         storage_path=result.get("storage_path", "")
-    )
\ No newline at end of file
+    )
+@router.post("/api/jobs/{job_id}/cancel", response_model=Job)
+async def cancel_job(
+    job_id: str,
+    user: User = Depends(get_mock_user),
+    job_service: JobService = Depends(get_job_service),
+    job_processor: JobProcessor = Depends(get_job_processor),
+):
+    """
+    Cancel a queued or running job.
+    Running jobs stop at their next cancellation point.
+    """
+    job = await job_service.get_job_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    # Skip user ownership check for development
+    # if job.user_id != user.user_id:
+    #     raise HTTPException(status_code=403, detail=f"Access denied for job {job_id}")
+    
+    if job.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already finished with status {job.status.value}")
+    
+    job = await job_service.update_job(job_id, JobUpdate(
+        status=JobStatus.CANCELLED,
+        completed_at=datetime.now()
+    ))
+    await job_processor.cancel_job(job_id, job.prediction_id)
+    return job
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Depends
+from src.dependencies.dependencies_request import get_job_service, get_mock_user
+from src.services.job_service import JobService
+from src.schemas.job import Job
+from src.schemas.project import ProjectStats
+from src.schemas.user import User
+
+router = APIRouter()
+
+@router.get("/api/projects/{project_id}/jobs", response_model=list[Job])
+async def get_project_jobs(
+    project_id: str, 
+    limit: int = 50,
+    user: User = Depends(get_mock_user),
+    job_service: JobService = Depends(get_job_service)
+):
+    """
+    Get all jobs for a specific project and user.
+    """
+    if not project_id:
+        raise HTTPException(status_code=400, detail="Project ID is required")
+    
+    # TODO: Maybe add endpoint that gets all jobs for a project without a user
+    jobs = await job_service.get_project_jobs(project_id, user.user_id, limit)
+    return jobs
+
+@router.get("/api/projects/{project_id}/stats", response_model=ProjectStats)
+async def get_project_stats(
+    project_id: str,
+    user: User = Depends(get_mock_user),
+    job_service: JobService = Depends(get_job_service)
+):
+    """
+    Job counts by status, total asset bytes and last activity for a project.
+    Read from one aggregate document that is updated with every job write.
+    """
+    if not project_id:
+        raise HTTPException(status_code=400, detail="Project ID is required")
+    
+    return await job_service.get_project_stats(project_id)
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Request, Depends
+import json
+import logging
+import os
+from replicate.webhook import Webhooks, WebhookSigningSecret, WebhookValidationError
+from src.dependencies.dependencies_request import get_job_processor, get_job_queue
+from src.repositories.base import JobQueueRepository
+from src.services.job_processor import JobProcessor, completion_entry
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/api/webhooks/replicate/{job_id}")
+async def replicate_prediction_callback(
+    job_id: str,
+    request: Request,
+    job_processor: JobProcessor = Depends(get_job_processor),
+    job_queue: JobQueueRepository = Depends(get_job_queue),
+):
+    """
+    Inbound callback for predictions submitted in async mode.
+    Progress is recorded on the job; a finished prediction queues the job for a
+    worker to complete, so the download and upload never run in the API process.
+    Callbacks must be signed with REPLICATE_WEBHOOK_SECRET; only the in-process
+    fake provider may call back without one.
+    """
+    body = (await request.body()).decode("utf-8")
+
+    secret = os.getenv("REPLICATE_WEBHOOK_SECRET")
+    if not secret and job_processor.provider.name != "fake":
+        logger.error(f"Rejected callback for job {job_id}: REPLICATE_WEBHOOK_SECRET is not set")
+        raise HTTPException(status_code=503, detail="Webhook verification is not configured")
+    if secret:
+        try:
+            Webhooks.validate(
+                headers=dict(request.headers),
+                body=body,
+                secret=WebhookSigningSecret(key=secret),
+                tolerance=300,
+            )
+        except WebhookValidationError as e:
+            logger.warning(f"Rejected callback for job {job_id}: {e}")
+            raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid webhook data")
+
+    job = await job_processor.record_prediction_callback(job_id, payload)
+    if job:
+        try:
+            await job_queue.enqueue(completion_entry(job))
+        except Exception as e:
+            # Fail the delivery so the provider retries it
+            logger.error(f"Failed to queue completion of job {job_id}: {e}")
+            raise HTTPException(status_code=503, detail="Failed to queue job completion")
+    return {"status": "received"}
@@ -19,6 +19,9 @@ job_message_queues: Dict[str, List[dict]] = defaultdict(list)
 # Event notifiers for each job: {job_id: asyncio.Event}
 job_events: Dict[str, asyncio.Event] = defaultdict(asyncio.Event)
 
+# Long-poll requests currently parked on each job: {job_id: count}
+job_pollers: Dict[str, int] = defaultdict(int)
+
 
 async def publish_job_update(job_id: str, message: dict):
     """
@@ -40,6 +43,27 @@ async def publish_job_update(job_id: str, message: dict):
         job_events[job_id] = asyncio.Event()
 
 
+async def wait_for_job_update(job_id: str, timeout: float) -> bool:
+    """
+    Wait until an update for this job is published in this process, or `timeout` expires.
+    Returns True if an update was published.
+    """
+    event = job_events[job_id]
+    job_pollers[job_id] += 1
+    try:
+        await asyncio.wait_for(event.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        job_pollers[job_id] -= 1
+        if job_pollers[job_id] <= 0:
+            del job_pollers[job_id]
+            # Drop the notifier unless an SSE stream is still waiting on it
+            if not any(conn.startswith(f"{job_id}_") for conn in active_connections):
+                job_events.pop(job_id, None)
+
+
 @router.get("/api/webhooks/{job_id}/stream")
 async def stream_job_updates(job_id: str):
     """
@@ -0,0 +1,147 @@
+"""
+Job archival.
+Terminal jobs older than the bucket's asset retention are moved out of the hot
+jobs collection: each page is written to the bucket as one gzip-compressed
+NDJSON object, then deleted with batched writes that also take them out of
+their projects' current counts. Asset blobs whose job no longer exists are
+bulk-deleted afterwards.
+
+    python -m src.archiver          # run every JOB_ARCHIVE_INTERVAL_SECONDS
+    python -m src.archiver --once   # one pass, e.g. from a scheduler
+
+Run a single archiver per deployment; local setups run it inside the API process.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import signal
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+import dotenv
+from src.config import config
+from src.repositories.base import FileStorageRepository, JobArchiveRepository, ProjectStatsRepository
+from src.schemas.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_STATUSES = [JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value]
+ASSET_PREFIX = "assets/"
+
+
+def _ndjson_line(job: Dict[str, Any]) -> str:
+    try:
+        return Job(**job).model_dump_json()
+    except Exception:
+        # Archive malformed documents as they are rather than keep them hot forever
+        return json.dumps(job, default=str)
+
+
+class JobArchiver:
+    def __init__(self, job_archive: JobArchiveRepository, project_stats: ProjectStatsRepository,
+                 file_storage: FileStorageRepository):
+        self.job_archive = job_archive
+        self.project_stats = project_stats
+        self.file_storage = file_storage
+        self._task = None
+        self._last_run: Dict[str, Any] = {}
+
+    async def archive_expired_jobs(self) -> int:
+        """Archive (or delete) expired terminal jobs page by page. Returns the number removed."""
+        now = datetime.now()
+        cutoff = now - timedelta(days=config.JOB_RETENTION_DAYS)
+        removed = 0
+        for page in range(config.JOB_ARCHIVE_MAX_PAGES_PER_RUN):
+            jobs = await self.job_archive.find_expired(ARCHIVED_STATUSES, cutoff, config.JOB_ARCHIVE_PAGE_SIZE)
+            if not jobs:
+                break
+            if config.JOB_ARCHIVE_MODE == "archive":
+                data = gzip.compress("".join(_ndjson_line(job) + "\n" for job in jobs).encode())
+                # Written before the deletes: a crash in between only duplicates rows (same job_id) in cold storage
+                await self.file_storage.upload_bytes(
+                    data, f"{config.JOB_ARCHIVE_PREFIX}/{now:%Y/%m/%d}/{now:%H%M%S}-{page:05d}.ndjson.gz",
+                    content_type="application/gzip"
+                )
+            # Deleted pages drop out of the expiry query, so no cursor is needed
+            await self.project_stats.delete_jobs(jobs)
+            removed += len(jobs)
+        return removed
+
+    async def delete_orphaned_blobs(self) -> int:
+        """Delete blobs under assets/{job_id}/ whose job document no longer exists."""
+        blobs_by_job: Dict[str, List[str]] = {}
+        for blob_name in await self.file_storage.list_files(ASSET_PREFIX):
+            job_id = blob_name[len(ASSET_PREFIX):].split("/", 1)[0]
+            if job_id:
+                blobs_by_job.setdefault(job_id, []).append(blob_name)
+        if not blobs_by_job:
+            return 0
+        existing = await self.job_archive.existing_ids(blobs_by_job)
+        orphaned = [blob for job_id, blobs in blobs_by_job.items() if job_id not in existing for blob in blobs]
+        if orphaned:
+            await self.file_storage.delete_files(orphaned)
+        return len(orphaned)
+
+    async def run_once(self) -> Dict[str, Any]:
+        started = datetime.now()
+        jobs = await self.archive_expired_jobs()
+        blobs = await self.delete_orphaned_blobs()
+        self._last_run = {
+            "at": started.isoformat(), "jobs_removed": jobs, "blobs_deleted": blobs,
+            "seconds": round((datetime.now() - started).total_seconds(), 3),
+        }
+        logger.info(f"Job archival pass: {self._last_run}")
+        return self._last_run
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Job archival pass failed: {e}")
+            await asyncio.sleep(config.JOB_ARCHIVE_INTERVAL_SECONDS)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"last_run": self._last_run or None}
+
+
+async def run_archiver(once: bool):
+    from src.bootstrap import build_services, setup_google_credentials
+
+    dotenv.load_dotenv()
+    setup_google_credentials()
+    services = build_services()
+    archiver = JobArchiver(services.job_archive, services.project_stats, services.file_storage)
+    if once:
+        await archiver.run_once()
+        return
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    archiver.start()
+    await stop.wait()
+    await archiver.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive expired jobs and delete orphaned asset blobs")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_archiver(args.once))
+
+
+if __name__ == "__main__":
+    main()
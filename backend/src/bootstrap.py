@@ -0,0 +1,134 @@
+"""
+Service wiring shared by the API (src.main) and the job workers (src.worker).
+"""
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from src.config import config
+from src.repositories.base import (
+    DatabaseRepository, FileStorageRepository, JobQueueRepository, CreditLedgerRepository,
+    IdempotencyKeyRepository, ProjectStatsRepository, JobChangeFeedRepository, JobArchiveRepository,
+    PromptSearchRepository
+)
+from src.repositories.gcp_repository import (
+    GCPFirestoreRepository, GCPFileStorageRepository, GCPFirestoreJobQueue, GCPFirestoreCreditLedger,
+    GCPFirestoreIdempotencyKeys, GCPFirestoreProjectStats, GCPFirestoreJobChangeFeed, GCPFirestoreJobArchive
+)
+from src.repositories.memory_repository import (
+    InMemoryDatabaseRepository, LocalFileStorageRepository, InMemoryJobQueue, InMemoryCreditLedger,
+    InMemoryIdempotencyKeys, InMemoryProjectStats, InMemoryJobChangeFeed, InMemoryJobArchive
+)
+from src.repositories.sqlite_repository import SQLitePromptSearchIndex
+from src.providers.factory import build_generation_provider
+from src.services.job_processor import JobProcessor
+from src.services.job_service import JobService
+from src.services.prompt_similarity import PromptVectorIndex
+
+
+@dataclass
+class Services:
+    user_repo: DatabaseRepository
+    job_repo: DatabaseRepository
+    file_storage: FileStorageRepository
+    job_queue: JobQueueRepository
+    credit_ledger: CreditLedgerRepository
+    idempotency_keys: IdempotencyKeyRepository
+    project_stats: ProjectStatsRepository
+    job_change_feed: JobChangeFeedRepository
+    job_archive: JobArchiveRepository
+    search_index: PromptSearchRepository
+    job_service: JobService
+    job_processor: JobProcessor
+
+
+def setup_google_credentials():
+    """Handle Google Cloud service account JSON from environment."""
+    service_account_json = os.getenv("GCP_SERVICE_ACCOUNT_JSON")
+    if service_account_json and service_account_json.strip():
+        try:
+            # Validate that the JSON is valid before writing to file
+            parsed_json = json.loads(service_account_json)
+            # Write the JSON credentials to a temporary file
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+                json.dump(parsed_json, f)
+                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = f.name
+            print(f"🔍 Set up Google credentials from environment")
+        except json.JSONDecodeError as e:
+            print(f"⚠️  Invalid JSON in GCP_SERVICE_ACCOUNT_JSON: {e}")
+            print(f"🔍 Using default Google credentials")
+    else:
+        print(f"🔍 Using default Google credentials")
+
+
+def job_queue_backend() -> str:
+    """
+    "memory" or "firestore". Defaults to following REPOSITORY_BACKEND; the
+    in-memory queue only works when the workers run inside the API process.
+    """
+    default = "memory" if os.getenv("REPOSITORY_BACKEND") == "memory" else "firestore"
+    return os.getenv("JOB_QUEUE_BACKEND", default)
+
+
+def run_embedded_worker() -> bool:
+    """Whether the API process should also process jobs (always true with the in-memory queue)."""
+    if job_queue_backend() == "memory":
+        return True
+    return os.getenv("RUN_EMBEDDED_WORKER", "false").lower() in ("1", "true", "yes")
+
+
+def build_services() -> Services:
+    if os.getenv("REPOSITORY_BACKEND") == "memory":
+        # Offline development / load testing
+        user_repo = InMemoryDatabaseRepository(config.USER_COLLECTION_NAME)
+        job_repo = InMemoryDatabaseRepository(config.JOB_COLLECTION_NAME)
+        file_storage = LocalFileStorageRepository(os.getenv("LOCAL_STORAGE_DIR"))
+        credit_ledger = InMemoryCreditLedger(config.CREDIT_LEDGER_SHARDS, config.STARTING_CREDITS)
+        idempotency_keys = InMemoryIdempotencyKeys()
+        project_stats = InMemoryProjectStats(job_repo)
+        job_change_feed = InMemoryJobChangeFeed(job_repo)
+        job_archive = InMemoryJobArchive(job_repo)
+    else:
+        user_repo = GCPFirestoreRepository(config.USER_COLLECTION_NAME)
+        job_repo = GCPFirestoreRepository(config.JOB_COLLECTION_NAME)
+        file_storage = GCPFileStorageRepository(os.getenv("GCP_STORAGE_BUCKET"))
+        credit_ledger = GCPFirestoreCreditLedger(
+            config.CREDIT_LEDGER_COLLECTION_NAME,
+            config.CREDIT_RESERVATIONS_COLLECTION_NAME,
+            config.CREDIT_LEDGER_SHARDS,
+            config.STARTING_CREDITS
+        )
+        idempotency_keys = GCPFirestoreIdempotencyKeys(config.IDEMPOTENCY_COLLECTION_NAME)
+        project_stats = GCPFirestoreProjectStats(job_repo, config.PROJECT_STATS_COLLECTION_NAME)
+        job_change_feed = GCPFirestoreJobChangeFeed(job_repo)
+        job_archive = GCPFirestoreJobArchive(job_repo)
+
+    if job_queue_backend() == "memory":
+        job_queue = InMemoryJobQueue(config.JOB_QUEUE_LEASE_SECONDS)
+    else:
+        job_queue = GCPFirestoreJobQueue(config.JOB_QUEUE_COLLECTION_NAME, config.JOB_QUEUE_LEASE_SECONDS)
+
+    # Local to each process; the API indexes the jobs it creates
+    search_index = SQLitePromptSearchIndex(os.getenv("PROMPT_SEARCH_DB_PATH", config.PROMPT_SEARCH_DB_PATH))
+    prompt_index = None
+    if config.PROMPT_REUSE_MODE != "off":
+        prompt_index = PromptVectorIndex(config.PROMPT_EMBEDDING_DIM, config.PROMPT_REUSE_MAX_VECTORS)
+    job_service = JobService(job_repo, credit_ledger, project_stats, search_index, prompt_index)
+    job_processor = JobProcessor(
+        job_service, file_storage, build_generation_provider(), job_queue,
+        os.getenv("PROVIDER_CALLBACK_BASE_URL", config.PROVIDER_CALLBACK_BASE_URL)
+    )
+    return Services(
+        user_repo=user_repo,
+        job_repo=job_repo,
+        file_storage=file_storage,
+        job_queue=job_queue,
+        credit_ledger=credit_ledger,
+        idempotency_keys=idempotency_keys,
+        project_stats=project_stats,
+        job_change_feed=job_change_feed,
+        job_archive=job_archive,
+        search_index=search_index,
+        job_service=job_service,
+        job_processor=job_processor,
+    )
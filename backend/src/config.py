@@ -1,11 +1,183 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 @dataclass
 class Config:
     USER_COLLECTION_NAME: str = "users"
     JOB_COLLECTION_NAME: str = "jobs"
+    # Per-project job aggregates, written with every job update
+    PROJECT_STATS_COLLECTION_NAME: str = "project_stats"
+    # In-memory view of each active user's newest jobs, kept current by snapshot listeners.
+    # Opt-in: each active user holds a listener open on the API process
+    RECENT_JOBS_VIEW_ENABLED: bool = False
+    RECENT_JOBS_PER_USER: int = 50
+    RECENT_JOBS_IDLE_SECONDS: float = 600.0
+    RECENT_JOBS_MAX_USERS: int = 1_000
+    RECENT_JOBS_FIRST_SNAPSHOT_TIMEOUT_SECONDS: float = 2.0
+    # Archival of terminal jobs (src.archiver); retention matches the bucket's asset lifecycle rule.
+    # JOB_ARCHIVE_MODE "archive" writes gzip NDJSON pages under JOB_ARCHIVE_PREFIX first, "delete" only deletes
+    JOB_RETENTION_DAYS: int = 30
+    JOB_ARCHIVE_MODE: str = "archive"
+    JOB_ARCHIVE_PREFIX: str = "archive/jobs"
+    JOB_ARCHIVE_PAGE_SIZE: int = 500
+    JOB_ARCHIVE_MAX_PAGES_PER_RUN: int = 200
+    JOB_ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    # GET /api/jobs/export.ndjson: documents per database page and bytes per response chunk
+    JOB_EXPORT_PAGE_SIZE: int = 500
+    JOB_EXPORT_CHUNK_BYTES: int = 64 * 1024
+    # Prompt search (SQLite FTS5); ":memory:" or a file path, PROMPT_SEARCH_DB_PATH env var overrides
+    PROMPT_SEARCH_DB_PATH: str = ":memory:"
+    PROMPT_SEARCH_MAX_TERMS: int = 16
+    # Each user's jobs are re-read into the index this often, to pick up jobs created by other processes
+    PROMPT_SEARCH_RESYNC_SECONDS: float = 300.0
+    # Near-duplicate prompt reuse (src.services.prompt_similarity). "off" disables the index,
+    # "offer" only answers POST /api/jobs/similar, "auto" also completes matching jobs from
+    # the existing asset; parameters.reuse ("auto"/"off") overrides it per job
+    PROMPT_REUSE_MODE: str = "offer"
+    PROMPT_REUSE_THRESHOLD: float = 0.95
+    # "user" or "project": which earlier jobs a prompt is compared against
+    PROMPT_REUSE_SCOPE: str = "user"
+    PROMPT_EMBEDDING_DIM: int = 256
+    # Vectors kept across all scopes (4 * PROMPT_EMBEDDING_DIM bytes each)
+    PROMPT_REUSE_MAX_VECTORS: int = 250_000
+    # Scopes are reloaded from the database this often, to see jobs completed by other processes
+    PROMPT_REUSE_RESYNC_SECONDS: float = 300.0
     STARTING_CREDITS: int = 10
+    # Credit ledger: balances are split over shards so one user's concurrent jobs don't contend
+    CREDIT_LEDGER_COLLECTION_NAME: str = "credit_ledgers"
+    CREDIT_RESERVATIONS_COLLECTION_NAME: str = "credit_reservations"
+    CREDIT_LEDGER_SHARDS: int = 16
+    # Credits per job, keyed by JobType value (composite jobs pay the video cost per shot)
+    JOB_CREDIT_COSTS: Dict[str, int] = field(default_factory=lambda: {
+        "Video": 1,
+        "Object": 1,
+    })
     COOKIE_NAME: str = "vid-cookie"
+    # Cookie auth caches: verified sessions (bounded by token expiry) and user profiles
+    SESSION_CACHE_MAX_ENTRIES: int = 50_000
+    SESSION_CACHE_MAX_TTL_SECONDS: float = 300.0
+    USER_CACHE_MAX_ENTRIES: int = 50_000
+    USER_CACHE_TTL_SECONDS: float = 60.0
     REPLICATE_VIDEO_MODEL_ID: str = "wan-video/wan-2.2-t2v-fast"
+    # "replicate" or "fake" (local stand-in); GENERATION_PROVIDER env var overrides
+    GENERATION_PROVIDER: str = "replicate"
+    # Fake provider: lognormal generation time / API latency, failure rate and output size
+    FAKE_PROVIDER_DURATION_MEDIAN_SECONDS: float = 5.0
+    FAKE_PROVIDER_DURATION_SIGMA: float = 0.3
+    FAKE_PROVIDER_API_LATENCY_MEDIAN_SECONDS: float = 0.05
+    FAKE_PROVIDER_FAILURE_RATE: float = 0.0
+    FAKE_PROVIDER_MAX_CONCURRENT_REQUESTS: int = 0
+    FAKE_PROVIDER_VIDEO_FRAMES: Optional[int] = None
+    FAKE_PROVIDER_SPLAT_COUNT: int = 50_000
+    FAKE_PROVIDER_SEED: Optional[int] = 0
+    # Video model input overrides for render_mode "draft" (and the first stage of "progressive")
+    # and for the final stage of "progressive"; "standard" uses the base input unchanged.
+    # Drafts render ~40% of the standard frames (Wan wants 4n+1) at half the frame rate,
+    # so they cover about the same duration for a fraction of the compute
+    VIDEO_DRAFT_INPUT: Dict[str, Any] = field(default_factory=lambda: {
+        "go_fast": True,
+        "resolution": "480p",
+        "num_frames": 33,
+        "frames_per_second": 8,
+    })
+    VIDEO_FINAL_INPUT: Dict[str, Any] = field(default_factory=lambda: {
+        "go_fast": False,
+        "resolution": "720p",
+    })
+    # Public base URL of the API for provider callbacks; when set, video predictions are handed
+    # off to the provider instead of polled. PROVIDER_CALLBACK_BASE_URL env var overrides
+    PROVIDER_CALLBACK_BASE_URL: Optional[str] = None
+    # Prediction polling
+    REPLICATE_POLL_INTERVAL_SECONDS: float = 2.0
+    PREDICTION_STALL_TIMEOUT_SECONDS: float = 180.0
+    # Per-JobType deadlines enforced by JobProcessor.process_job (keyed by JobType value)
+    JOB_DEADLINE_SECONDS: Dict[str, float] = field(default_factory=lambda: {
+        "Video": 600.0,
+        "Object": 120.0,
+        "Composite": 900.0,
+    })
+    # Composite (multi-shot) jobs
+    COMPOSITE_MAX_SHOTS: int = 32
+    COMPOSITE_PROGRESS_POLL_INTERVAL_SECONDS: float = 2.0
+    # Process pool for CPU-bound media work; None = one process per core
+    MEDIA_POOL_WORKERS: Optional[int] = None
+    # Splat LOD packaging: first (coarsest) chunk size and growth per level
+    SPLAT_LOD_FIRST_CHUNK_SPLATS: int = 16_384
+    SPLAT_LOD_GROWTH_FACTOR: int = 4
+    # Optical-flow frame interpolation; jobs override with parameters.interpolation_factor (1 = off)
+    VIDEO_INTERPOLATION_FACTOR: int = 1
+    # Larger factors are clamped; each chunk holds (chunk frames x factor) decoded frames in memory
+    VIDEO_INTERPOLATION_MAX_FACTOR: int = 4
+    VIDEO_INTERPOLATION_CHUNK_FRAMES: int = 16
+    # Video previews: poster frame position (fraction of duration) and thumbnail sprite grid
+    PREVIEW_POSTER_POSITION: float = 0.5
+    PREVIEW_SPRITE_COLUMNS: int = 5
+    PREVIEW_SPRITE_ROWS: int = 5
+    PREVIEW_THUMB_WIDTH: int = 160
+    # Provider retries and circuit breaker
+    PROVIDER_RETRY_ATTEMPTS: int = 4
+    PROVIDER_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    PROVIDER_RETRY_MAX_DELAY_SECONDS: float = 30.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT_SECONDS: float = 30.0
+    # How long a new job waits for an open circuit before failing
+    PROVIDER_PARK_TIMEOUT_SECONDS: float = 120.0
+    # Adaptive (AIMD) concurrency limit on provider API calls, per model
+    PROVIDER_CONCURRENCY_INITIAL: float = 4.0
+    PROVIDER_CONCURRENCY_MIN: float = 1.0
+    PROVIDER_CONCURRENCY_MAX: float = 64.0
+    PROVIDER_LATENCY_TARGET_SECONDS: float = 5.0
+    # Job runtime: worker pool, priority class weights and per-user fair share
+    JOB_WORKER_CONCURRENCY: int = 16
+    JOB_PRIORITY_WEIGHTS: Dict[str, float] = field(default_factory=lambda: {
+        "interactive": 4.0,
+        "batch": 1.0,
+    })
+    JOB_USER_WEIGHTS: Dict[str, float] = field(default_factory=dict)
+    JOB_USER_CONCURRENCY_CAP: int = 4
+    # Composite jobs only wait on their shots, so they run outside the worker slots and user
+    # caps (holding either would starve their own shots); at most this many per process
+    JOB_COMPOSITE_COORDINATORS: int = 64
+    # Admission control on job creation
+    ADMISSION_USER_RATE_PER_SECOND: float = 0.5
+    ADMISSION_USER_BURST: float = 10.0
+    ADMISSION_GLOBAL_RATE_PER_SECOND: float = 20.0
+    ADMISSION_GLOBAL_BURST: float = 100.0
+    ADMISSION_MAX_BACKLOG: int = 500
+    ADMISSION_BACKLOG_RETRY_AFTER_SECONDS: int = 30
+    ADMISSION_MAX_TRACKED_USERS: int = 10_000
+    # Idempotency-Key on job creation: how long a key replays its job, how long an
+    # in-flight claim blocks retries if its request dies, and the local cache of completed keys
+    IDEMPOTENCY_COLLECTION_NAME: str = "idempotency_keys"
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = 24 * 3600.0
+    IDEMPOTENCY_PENDING_TTL_SECONDS: float = 60.0
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = 50_000
+    IDEMPOTENCY_CACHE_TTL_SECONDS: float = 600.0
+    # GET /api/jobs/{job_id}?wait=: longest hold, and how often a held request re-reads the job
+    # (updates from standalone workers are not published to the API process)
+    JOB_LONG_POLL_MAX_WAIT_SECONDS: float = 30.0
+    JOB_LONG_POLL_RECHECK_SECONDS: float = 5.0
+    # Shared job queue between the API and worker processes
+    JOB_QUEUE_COLLECTION_NAME: str = "job_queue"
+    # Workers renew their leases while jobs run, so a lease only lapses when its worker
+    # died or lost contact for longer than the lease
+    JOB_QUEUE_LEASE_SECONDS: float = 60.0
+    JOB_QUEUE_LEASE_RENEW_SECONDS: float = 20.0
+    JOB_QUEUE_POLL_INTERVAL_SECONDS: float = 1.0
+    # Queue entries a worker reads per priority class and page before choosing which to claim,
+    # and how many pages it reads past users who have filled their concurrency cap
+    JOB_QUEUE_CLAIM_WINDOW: int = 50
+    JOB_QUEUE_CLAIM_MAX_PAGES: int = 3
+    # How often workers check their running jobs for cancellation requested via the API
+    WORKER_CANCEL_POLL_INTERVAL_SECONDS: float = 5.0
+    # Callback mode: how often workers look for handed-off jobs whose callbacks went quiet for
+    # PREDICTION_STALL_TIMEOUT_SECONDS, and how many they queue for a provider check per pass
+    WORKER_REAPER_INTERVAL_SECONDS: float = 60.0
+    WORKER_REAPER_PAGE_SIZE: int = 200
+    # Provider output downloads
+    DOWNLOAD_TIMEOUT_SECONDS: float = 300.0
+    DOWNLOAD_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    DOWNLOAD_READ_TIMEOUT_SECONDS: float = 30.0
 
-config = Config()
\ No newline at end of file
+config = Config()
@@ -1,8 +1,12 @@
+from typing import Optional
 from fastapi import Request, Depends
 from src.schemas.user import User
-from src.repositories.base import DatabaseRepository, FileStorageRepository
+from src.repositories.base import DatabaseRepository, FileStorageRepository, JobQueueRepository
 from src.services.job_service import JobService
 from src.services.job_processor import JobProcessor
+from src.services.admission import AdmissionController
+from src.services.idempotency import IdempotencyService
+from src.services.recent_jobs import RecentJobsView
 from src.services.auth_service import AuthService
 
 def get_job_service(request: Request) -> JobService:
@@ -11,6 +15,18 @@ def get_job_service(request: Request) -> JobService:
 def get_job_processor(request: Request) -> JobProcessor:
     return request.app.state.job_processor
 
+def get_job_queue(request: Request) -> JobQueueRepository:
+    return request.app.state.job_queue
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    return request.app.state.admission_controller
+
+def get_idempotency_service(request: Request) -> IdempotencyService:
+    return request.app.state.idempotency_service
+
+def get_recent_jobs_view(request: Request) -> Optional[RecentJobsView]:
+    return request.app.state.recent_jobs_view
+
 def get_user_repository(request: Request) -> DatabaseRepository:
     return request.app.state.user_repo
 
@@ -2,52 +2,69 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from src.config import config
-from src.repositories.gcp_repository import GCPFirestoreRepository, GCPFileStorageRepository
-from src.services.job_processor import JobProcessor
+from src.bootstrap import build_services, run_embedded_worker, setup_google_credentials
+from src.services.admission import AdmissionController
+from src.services.idempotency import IdempotencyService
+from src.services.recent_jobs import RecentJobsView
+from src.worker import JobWorker
+from src.archiver import JobArchiver
 from src.api.webhooks import router as webhook_router
+from src.api.provider_webhooks import router as provider_webhook_router
+from src.services.resilience import CircuitBreaker, circuit_breakers
+from src.services.concurrency import concurrency_limiters
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.middleware import logging_middleware
 import dotenv
 from src.services.auth_service import AuthService
 from contextlib import asynccontextmanager
-from src.services.job_service import JobService
 from src.api.job import router as job_router
+from src.api.project import router as project_router
 import os
-import json
-import tempfile
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Load environment variables first
     dotenv.load_dotenv()
-    
-    # Handle Google Cloud service account JSON from environment
-    service_account_json = os.getenv("GCP_SERVICE_ACCOUNT_JSON")
-    if service_account_json and service_account_json.strip():
-        try:
-            # Validate that the JSON is valid before writing to file
-            parsed_json = json.loads(service_account_json)
-            # Write the JSON credentials to a temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                json.dump(parsed_json, f)
-                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = f.name
-            print(f"🔍 Set up Google credentials from environment")
-        except json.JSONDecodeError as e:
-            print(f"⚠️  Invalid JSON in GCP_SERVICE_ACCOUNT_JSON: {e}")
-            print(f"🔍 Using default Google credentials")
-    else:
-        print(f"🔍 Using default Google credentials")
+    setup_google_credentials()
     
     # Initialize services using environment variables directly
     app.state.auth_service = AuthService()  # Still needed for dependencies
-    app.state.user_repo = GCPFirestoreRepository(config.USER_COLLECTION_NAME)
-    app.state.job_repo = GCPFirestoreRepository(config.JOB_COLLECTION_NAME)
-    app.state.file_storage = GCPFileStorageRepository(os.getenv("GCP_STORAGE_BUCKET"))
-    app.state.job_service = JobService(app.state.job_repo)
-    app.state.job_processor = JobProcessor(app.state.job_service, app.state.file_storage)
+    services = build_services()
+    app.state.user_repo = services.user_repo
+    app.state.job_repo = services.job_repo
+    app.state.file_storage = services.file_storage
+    app.state.job_queue = services.job_queue
+    app.state.credit_ledger = services.credit_ledger
+    app.state.job_service = services.job_service
+    # Still needed here for provider callbacks and cancellation
+    app.state.job_processor = services.job_processor
+    # Jobs are processed by `python -m src.worker`; local setups run a worker in-process
+    app.state.job_worker = None
+    app.state.job_archiver = None
+    if run_embedded_worker():
+        app.state.job_worker = JobWorker(app.state.job_queue, app.state.job_service, app.state.job_processor,
+                                         job_archive=services.job_archive)
+        await app.state.job_worker.start()
+        # Deployments run `python -m src.archiver` once instead
+        app.state.job_archiver = JobArchiver(services.job_archive, services.project_stats, services.file_storage)
+        app.state.job_archiver.start()
+    app.state.admission_controller = AdmissionController(app.state.job_queue.backlog)
+    app.state.idempotency_service = IdempotencyService(services.idempotency_keys)
+    app.state.recent_jobs_view = None
+    if config.RECENT_JOBS_VIEW_ENABLED:
+        app.state.recent_jobs_view = RecentJobsView(
+            services.job_change_feed, config.RECENT_JOBS_PER_USER,
+            config.RECENT_JOBS_IDLE_SECONDS, config.RECENT_JOBS_MAX_USERS
+        )
     print("Services initialized")
     yield
     print("Shutting down...")
+    if app.state.job_worker:
+        await app.state.job_worker.stop()
+    if app.state.job_archiver:
+        await app.state.job_archiver.stop()
+    if app.state.recent_jobs_view:
+        app.state.recent_jobs_view.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -73,7 +90,9 @@ app.add_middleware(
 
 
 app.include_router(webhook_router)
+app.include_router(provider_webhook_router)
 app.include_router(job_router)
+app.include_router(project_router)
 
 @app.get("/")
 async def root():
@@ -81,4 +100,22 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    providers = {name: breaker.snapshot() for name, breaker in circuit_breakers.items()}
+    degraded = any(provider["state"] != CircuitBreaker.CLOSED for provider in providers.values())
+    return {"status": "degraded" if degraded else "healthy", "providers": providers}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "provider_concurrency": {name: limiter.snapshot() for name, limiter in concurrency_limiters.items()},
+        "job_queue": {"backlog": await app.state.job_queue.backlog()},
+        "job_worker": app.state.job_worker.snapshot() if app.state.job_worker else None,
+        "admission": app.state.admission_controller.snapshot(),
+        "auth_cache": app.state.auth_service.cache_snapshot(),
+        "idempotency_cache": app.state.idempotency_service.snapshot(),
+        "recent_jobs_view": app.state.recent_jobs_view.snapshot() if app.state.recent_jobs_view else None,
+        "job_archiver": app.state.job_archiver.snapshot() if app.state.job_archiver else None,
+        "prompt_reuse_index": (
+            app.state.job_service.prompt_index.snapshot() if app.state.job_service.prompt_index else None
+        ),
+    }
@@ -0,0 +1 @@
+# CPU-bound media processing, run in a process pool off the event loop
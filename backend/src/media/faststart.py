@@ -0,0 +1,125 @@
+"""
+MP4 "fast start" remux.
+Moves the `moov` box in front of the media data so players can start before the
+whole file is downloaded. Only box headers and chunk offset tables (stco/co64)
+are rewritten; samples are copied byte for byte from a memory-mapped input in
+fixed-size slices, so memory use is bounded by the size of `moov`.
+"""
+import mmap
+import os
+import struct
+from typing import Iterator, Tuple
+import numpy as np
+
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+# Boxes on the path from moov to the chunk offset tables
+_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+def _iter_boxes(data, start: int, end: int) -> Iterator[Tuple[bytes, int, int, int]]:
+    """Yield (type, offset, header_size, total_size) for the boxes in data[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise ValueError(f"Malformed MP4 box {box_type!r} at offset {offset}")
+        yield box_type, offset, header_size, size
+        offset += size
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def _rewrite_moov(moov: bytes, shift: int, low: int, high: int, use_co64: bool) -> bytes:
+    """
+    Rebuild a moov box with every chunk offset in [low, high) moved by `shift`.
+    With `use_co64`, 32-bit stco tables are upgraded to 64-bit co64 tables.
+    """
+    def rewrite(data: bytes) -> bytes:
+        out = bytearray()
+        for box_type, offset, header_size, size in _iter_boxes(data, 0, len(data)):
+            payload = data[offset + header_size:offset + size]
+            if box_type in _CONTAINER_BOXES:
+                out += _box(box_type, rewrite(payload))
+            elif box_type in (b"stco", b"co64"):
+                # FullBox version/flags, entry count, then the offsets
+                count = struct.unpack_from(">I", payload, 4)[0]
+                dtype = ">u4" if box_type == b"stco" else ">u8"
+                offsets = np.frombuffer(payload, dtype=dtype, count=count, offset=8).astype(np.uint64)
+                moved = (offsets >= low) & (offsets < high)
+                offsets[moved] += np.uint64(shift)
+                if box_type == b"co64" or use_co64:
+                    out += _box(b"co64", payload[:8] + offsets.astype(">u8").tobytes())
+                else:
+                    out += _box(b"stco", payload[:8] + offsets.astype(">u4").tobytes())
+            elif box_type == b"cmov":
+                raise ValueError("Compressed moov boxes are not supported")
+            else:
+                out += data[offset:offset + size]
+        return bytes(out)
+
+    return rewrite(moov)
+
+
+def _needs_co64(moov: bytes, shift: int, low: int, high: int) -> bool:
+    """Whether shifting would overflow any 32-bit stco entry."""
+    def check(data: bytes) -> bool:
+        for box_type, offset, header_size, size in _iter_boxes(data, 0, len(data)):
+            payload = data[offset + header_size:offset + size]
+            if box_type in _CONTAINER_BOXES and check(payload):
+                return True
+            if box_type == b"stco":
+                count = struct.unpack_from(">I", payload, 4)[0]
+                offsets = np.frombuffer(payload, dtype=">u4", count=count, offset=8).astype(np.uint64)
+                moved = offsets[(offsets >= low) & (offsets < high)]
+                if moved.size and int(moved.max()) + shift > 0xFFFFFFFF:
+                    return True
+        return False
+
+    return check(moov)
+
+
+def make_faststart(path: str) -> bool:
+    """
+    Rewrite the MP4 at `path` in place so that `moov` precedes `mdat`.
+    Returns False (leaving the file untouched) when it already does.
+    """
+    with open(path, "rb") as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        boxes = list(_iter_boxes(data, 0, len(data)))
+        moov = next((box for box in boxes if box[0] == b"moov"), None)
+        first_mdat = next((box for box in boxes if box[0] == b"mdat"), None)
+        if moov is None or first_mdat is None:
+            raise ValueError(f"{path} is not a progressive MP4 (no moov or mdat box)")
+        _, moov_offset, _, moov_size = moov
+        insert_at = first_mdat[1]
+        if moov_offset < insert_at:
+            return False
+
+        # Everything from the insertion point up to the old moov moves down by the new moov's size
+        moov_bytes = bytes(data[moov_offset:moov_offset + moov_size])
+        use_co64 = _needs_co64(moov_bytes, moov_size, insert_at, moov_offset)
+        new_moov = _rewrite_moov(moov_bytes, moov_size, insert_at, moov_offset, use_co64)
+        if len(new_moov) != moov_size:
+            # co64 upgrade grew the box; offsets must move by its final size
+            new_moov = _rewrite_moov(moov_bytes, len(new_moov), insert_at, moov_offset, use_co64)
+
+        temp_path = f"{path}.faststart"
+        try:
+            with open(temp_path, "wb") as target:
+                for start, end in ((0, insert_at), (insert_at, moov_offset), (moov_offset + moov_size, len(data))):
+                    if start == insert_at:
+                        target.write(new_moov)
+                    for chunk_start in range(start, end, COPY_CHUNK_SIZE):
+                        target.write(data[chunk_start:min(chunk_start + COPY_CHUNK_SIZE, end)])
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    os.replace(temp_path, path)
+    return True
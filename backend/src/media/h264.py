@@ -0,0 +1,48 @@
+"""
+H.264 MP4 writer.
+OpenCV can only write MPEG-4 Part 2 ("mp4v"), which browsers don't play, so
+frames are encoded with libx264 through PyAV instead: yuv420p at even
+dimensions, which every browser and mobile decoder supports.
+"""
+from fractions import Fraction
+import av
+import numpy as np
+
+DEFAULT_CRF = 20
+DEFAULT_PRESET = "veryfast"
+
+
+class H264Writer:
+    """
+    Streaming writer for BGR frames (as decoded by OpenCV). Odd frame sizes lose
+    their last row or column, since yuv420p needs even dimensions.
+    """
+
+    def __init__(self, path: str, fps: float, width: int, height: int,
+                 crf: int = DEFAULT_CRF, preset: str = DEFAULT_PRESET):
+        self.width, self.height = width - width % 2, height - height % 2
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError(f"Cannot encode {width}x{height} video")
+        self._container = av.open(path, "w", format="mp4")
+        self._stream = self._container.add_stream("libx264", rate=Fraction(fps).limit_denominator(1001))
+        self._stream.width = self.width
+        self._stream.height = self.height
+        self._stream.pix_fmt = "yuv420p"
+        self._stream.options = {"crf": str(crf), "preset": preset}
+
+    def write(self, frame: np.ndarray):
+        frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(frame[:self.height, :self.width]), format="bgr24")
+        self._container.mux(self._stream.encode(frame))
+
+    def close(self):
+        try:
+            # Flush the encoder's delayed frames
+            self._container.mux(self._stream.encode())
+        finally:
+            self._container.close()
+
+    def __enter__(self) -> "H264Writer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
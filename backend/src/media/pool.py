@@ -0,0 +1,38 @@
+"""
+Shared process pool for CPU-bound media work (OpenCV/numpy).
+Functions submitted here must be module-level so they can be pickled.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+from src.config import config
+
+T = TypeVar('T')
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_media_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs an event loop and client threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=config.MEDIA_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+async def run_in_media_pool(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run `fn(*args, **kwargs)` in the media process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_media_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_media_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
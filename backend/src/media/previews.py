@@ -0,0 +1,97 @@
+"""
+Poster frame and thumbnail sprite extraction.
+The video is decoded once, sequentially; only the sampled frames are converted
+and kept, and all thumbnails are resized together as one NumPy array.
+"""
+from typing import Any, Dict, List
+import cv2
+import numpy as np
+
+
+def resize_frames(frames: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Resize a stack of frames (N, H, W, C) in one vectorized pass: box-filter
+    downscale by the largest integer factor that keeps at least the target
+    size, then nearest-neighbour sample to the exact size.
+    """
+    count, src_height, src_width, channels = frames.shape
+    factor = max(min(src_width // width, src_height // height), 1)
+    if factor > 1:
+        cropped = frames[:, :src_height - src_height % factor, :src_width - src_width % factor]
+        frames = cropped.reshape(
+            count, cropped.shape[1] // factor, factor, cropped.shape[2] // factor, factor, channels
+        ).mean(axis=(2, 4), dtype=np.float32)
+    ys = np.linspace(0, frames.shape[1] - 1, height).round().astype(np.intp)
+    xs = np.linspace(0, frames.shape[2] - 1, width).round().astype(np.intp)
+    return frames[:, ys][:, :, xs].astype(np.uint8)
+
+
+def extract_previews(video_path: str, poster_path: str, sprite_path: str, columns: int, rows: int,
+                     thumb_width: int, poster_position: float = 0.5, jpeg_quality: int = 85) -> Dict[str, Any]:
+    """
+    Write a full-size JPEG poster frame (at `poster_position` of the video) and a
+    `columns` x `rows` JPEG sprite of evenly spaced thumbnails.
+    Returns the sprite layout so players can map a time to a tile.
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video {video_path}")
+    try:
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 16.0
+        if frame_count <= 0:
+            raise ValueError(f"Video {video_path} reports no frames")
+        tiles = columns * rows
+        sample_indices = np.linspace(0, frame_count - 1, min(tiles, frame_count)).round().astype(int)
+        wanted = set(sample_indices.tolist())
+        poster_index = min(int(frame_count * poster_position), frame_count - 1)
+
+        samples: List[np.ndarray] = []
+        poster = None
+        last_frame = None
+        for index in range(frame_count):
+            if not capture.grab():
+                break
+            if index in wanted or index == poster_index:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                last_frame = frame
+                if index == poster_index:
+                    poster = frame
+                # An index can be sampled twice when there are fewer frames than tiles
+                samples.extend([frame] * int((sample_indices == index).sum()))
+    finally:
+        capture.release()
+
+    if not samples:
+        raise ValueError(f"Could not decode frames from {video_path}")
+    if poster is None:
+        # Frame count metadata overshot the real stream
+        poster = last_frame
+
+    height, width = samples[0].shape[:2]
+    thumb_height = max(round(thumb_width * height / width), 1)
+    thumbs = resize_frames(np.stack(samples), thumb_width, thumb_height)
+    if len(thumbs) < tiles:
+        padding = np.zeros((tiles - len(thumbs),) + thumbs.shape[1:], dtype=np.uint8)
+        thumbs = np.concatenate([thumbs, padding])
+    # (rows*columns, h, w, c) -> (rows*h, columns*w, c)
+    sprite = thumbs.reshape(rows, columns, thumb_height, thumb_width, -1).transpose(0, 2, 1, 3, 4).reshape(
+        rows * thumb_height, columns * thumb_width, -1
+    )
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+    if not cv2.imwrite(poster_path, poster, params) or not cv2.imwrite(sprite_path, sprite, params):
+        raise ValueError("Failed to write preview images")
+
+    duration = frame_count / fps
+    return {
+        "columns": columns,
+        "rows": rows,
+        "count": len(samples),
+        "thumb_width": thumb_width,
+        "thumb_height": thumb_height,
+        "interval_seconds": round(duration / len(samples), 3),
+        "poster_time_seconds": round(poster_index / fps, 3),
+    }
@@ -0,0 +1,166 @@
+"""
+Level-of-detail packaging for Gaussian splat scenes (.splat and .ksplat).
+Splats are ordered by importance (opacity x footprint) and written as chunks
+of geometrically growing size, so a viewer can render the first, most
+important chunk almost immediately and refine as later chunks stream in.
+A .splat source is memory-mapped; only the fields needed for ranking are read
+in full, and chunks are gathered one at a time. A .ksplat source is decoded
+into .splat records first, so its chunks are .splat files too.
+"""
+import json
+import os
+from typing import Any, Dict, Tuple
+import numpy as np
+
+# antimatter15 .splat layout: position, scale, RGBA, rotation quaternion (32 bytes per splat)
+SPLAT_DTYPE = np.dtype([
+    ("position", "<f4", 3),
+    ("scale", "<f4", 3),
+    ("color", "u1", 4),
+    ("rotation", "u1", 4),
+])
+
+
+# GaussianSplats3D .ksplat layout (version 0.1): a 4096-byte header, one 1024-byte header per
+# section slot, then each section's partially filled bucket lengths, bucket centers and splats
+KSPLAT_HEADER_BYTES = 4096
+KSPLAT_SECTION_HEADER_BYTES = 1024
+# Per compression level: (center, scale/rotation float type, bytes per SH coefficient, default scale range)
+KSPLAT_COMPRESSION_LEVELS = {
+    0: ("<f4", "<f4", 4, 1),
+    1: ("<u2", "<f2", 2, 32767),
+    2: ("<u2", "<f2", 1, 32767),
+}
+KSPLAT_SH_COEFFICIENTS = {0: 0, 1: 9, 2: 24}
+
+
+def lod_chunk_filename(level: int) -> str:
+    return f"lod_{level}.splat"
+
+
+def splat_importance(splats: np.ndarray) -> np.ndarray:
+    """Opacity times the projected footprint of each splat's ellipsoid."""
+    scale = splats["scale"].astype(np.float32)
+    opacity = splats["color"][:, 3].astype(np.float32) / 255.0
+    # Sum of the pairwise products of the axes ~ the ellipsoid's surface area (up to a constant)
+    footprint = scale[:, 0] * scale[:, 1] + scale[:, 1] * scale[:, 2] + scale[:, 0] * scale[:, 2]
+    return opacity * footprint
+
+
+def read_ksplat(path: str) -> np.ndarray:
+    """Decode a .ksplat file into .splat records; spherical harmonics are dropped."""
+    data = np.fromfile(path, dtype=np.uint8)
+    if len(data) < KSPLAT_HEADER_BYTES:
+        raise ValueError(f"{path} is not a .ksplat file ({len(data)} bytes)")
+    header = data[:KSPLAT_HEADER_BYTES]
+    version = (int(header[0]), int(header[1]))
+    header32 = header.view("<u4")
+    max_sections, sections, splat_count = int(header32[1]), int(header32[2]), int(header32[4])
+    level = int(header.view("<u2")[10])
+    if version < (0, 1) or level not in KSPLAT_COMPRESSION_LEVELS:
+        raise ValueError(f"Unsupported .ksplat file {path} (version {version[0]}.{version[1]}, compression {level})")
+    center_type, float_type, sh_bytes, default_scale_range = KSPLAT_COMPRESSION_LEVELS[level]
+
+    splats = np.empty(splat_count, dtype=SPLAT_DTYPE)
+    written = 0
+    base = KSPLAT_HEADER_BYTES + max_sections * KSPLAT_SECTION_HEADER_BYTES
+    for section in range(sections):
+        start = KSPLAT_HEADER_BYTES + section * KSPLAT_SECTION_HEADER_BYTES
+        section_header = data[start:start + KSPLAT_SECTION_HEADER_BYTES]
+        h32, hf32, h16 = section_header.view("<u4"), section_header.view("<f4"), section_header.view("<u2")
+        count, max_count, bucket_size, bucket_count = (int(v) for v in h32[:4])
+        half_block = float(hf32[4]) / 2
+        bucket_bytes = int(h16[10])
+        scale_range = int(h32[6]) or default_scale_range
+        full_buckets, partial_buckets = int(h32[8]), int(h32[9])
+        sh_degree = int(h16[20])
+
+        record = np.dtype([
+            ("center", center_type, 3),
+            ("scale", float_type, 3),
+            ("rotation", float_type, 4),
+            ("color", "u1", 4),
+            ("sh", "u1", KSPLAT_SH_COEFFICIENTS.get(sh_degree, 0) * sh_bytes),
+        ])
+        buckets_start = base + partial_buckets * 4
+        splats_start = buckets_start + bucket_count * bucket_bytes
+        records = data[splats_start:splats_start + count * record.itemsize].view(record)
+        if len(records) != count:
+            raise ValueError(f"{path} is truncated (section {section})")
+
+        out = splats[written:written + count]
+        center = records["center"].astype(np.float32)
+        if level > 0:
+            # Quantized offsets from each splat's bucket center
+            partial_lengths = data[base:buckets_start].view("<u4")
+            bucket_centers = data[buckets_start:splats_start].view("<f4").reshape(bucket_count, -1)[:, :3]
+            bucket_of = np.concatenate([
+                np.repeat(np.arange(full_buckets), bucket_size),
+                np.repeat(np.arange(full_buckets, full_buckets + partial_buckets), partial_lengths),
+            ])[:count]
+            center = (center - scale_range) * (half_block / scale_range) + bucket_centers[bucket_of]
+        out["position"] = center
+        out["scale"] = records["scale"].astype(np.float32)
+        out["color"] = records["color"]
+        # Same (w, x, y, z) order as .splat, which stores each component as a byte around 128
+        out["rotation"] = np.clip(np.round(records["rotation"].astype(np.float32) * 128 + 128), 0, 255)
+        written += count
+        base = splats_start + max_count * record.itemsize
+    return splats[:written]
+
+
+def load_splats(path: str) -> Tuple[np.ndarray, str]:
+    """Open a .splat file (memory-mapped) or decode a .ksplat file. Returns (splats, source format)."""
+    if path.endswith(".ksplat"):
+        return read_ksplat(path), "ksplat"
+    size = os.path.getsize(path)
+    if size == 0 or size % SPLAT_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a .splat file ({size} bytes)")
+    return np.memmap(path, dtype=SPLAT_DTYPE, mode="r"), "splat"
+
+
+def package_splat_lods(source_path: str, output_dir: str, first_chunk_splats: int = 16_384,
+                       growth_factor: int = 4) -> Dict[str, Any]:
+    """
+    Write `lod_<level>.splat` chunks and `manifest.json` into `output_dir`.
+    Each chunk is a valid .splat file (whatever the source format); concatenating
+    chunks 0..k gives level k. Returns the manifest.
+    """
+    splats, source_format = load_splats(source_path)
+    count = len(splats)
+    if count == 0:
+        raise ValueError(f"{source_path} has no splats")
+
+    order = np.argsort(-splat_importance(splats), kind="stable")
+    positions = splats["position"]
+    chunks = []
+    start, chunk_size, level = 0, first_chunk_splats, 0
+    while start < count:
+        end = min(start + chunk_size, count)
+        # Gather in file order for sequential reads; order within a chunk does not matter
+        indices = np.sort(order[start:end])
+        filename = lod_chunk_filename(level)
+        splats[indices].tofile(os.path.join(output_dir, filename))
+        chunks.append({
+            "level": level,
+            "filename": filename,
+            "splat_count": int(end - start),
+            "bytes": int((end - start) * SPLAT_DTYPE.itemsize),
+        })
+        start, chunk_size, level = end, chunk_size * growth_factor, level + 1
+
+    manifest = {
+        "format": "splat",
+        "source_format": source_format,
+        "bytes_per_splat": SPLAT_DTYPE.itemsize,
+        "splat_count": int(count),
+        "bounds": {
+            "min": positions.min(axis=0).tolist(),
+            "max": positions.max(axis=0).tolist(),
+        },
+        "chunks": chunks,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    del splats
+    return manifest
@@ -0,0 +1,98 @@
+"""
+Concatenate shot videos into one H.264 MP4.
+When every shot is H.264 with the same size and codec parameters (the usual
+case: one model, one resolution), packets are copied without re-encoding and
+only their timestamps are shifted. Otherwise frames are decoded and re-encoded
+one at a time, so memory use does not grow with video length.
+"""
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+import av
+import cv2
+from src.media.h264 import H264Writer
+
+
+def _remux_signature(path: str) -> Optional[tuple]:
+    """What must match across inputs for their packets to share one stream, or None if not H.264."""
+    with av.open(path) as container:
+        if not container.streams.video:
+            return None
+        context = container.streams.video[0].codec_context
+        if context.name != "h264":
+            return None
+        return context.width, context.height, context.pix_fmt, bytes(context.extradata or b"")
+
+
+def _remux(input_paths: List[str], output_path: str) -> Dict[str, Any]:
+    packets = 0
+    end = Fraction(0)
+    with av.open(input_paths[0]) as first, av.open(output_path, "w", format="mp4") as output:
+        template = first.streams.video[0]
+        out_stream = output.add_stream_from_template(template)
+        width, height = template.codec_context.width, template.codec_context.height
+        fps = float(template.average_rate or 16)
+        for path in input_paths:
+            with av.open(path) as container:
+                stream = container.streams.video[0]
+                time_base = stream.time_base
+                # This shot starts where the previous one ended, in its own time base
+                offset = round(end / time_base)
+                last_dts = None
+                for packet in container.demux(stream):
+                    if packet.dts is None:
+                        continue
+                    packet.pts = (packet.pts if packet.pts is not None else packet.dts) + offset
+                    packet.dts += offset
+                    if last_dts is not None and packet.dts <= last_dts:
+                        packet.dts = last_dts + 1
+                    last_dts = packet.dts
+                    end = max(end, (packet.pts + (packet.duration or 0)) * time_base)
+                    packet.stream = out_stream
+                    output.mux(packet)
+                    packets += 1
+    return {"frames": packets, "fps": fps, "width": width, "height": height, "reencoded": False}
+
+
+def _reencode(input_paths: List[str], output_path: str) -> Dict[str, Any]:
+    first = cv2.VideoCapture(input_paths[0])
+    if not first.isOpened():
+        raise ValueError(f"Cannot open video {input_paths[0]}")
+    width = int(first.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(first.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = first.get(cv2.CAP_PROP_FPS) or 16.0
+    first.release()
+
+    frames = 0
+    with H264Writer(output_path, fps, width, height) as writer:
+        for path in input_paths:
+            capture = cv2.VideoCapture(path)
+            if not capture.isOpened():
+                raise ValueError(f"Cannot open video {path}")
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    if frame.shape[1] != width or frame.shape[0] != height:
+                        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                    writer.write(frame)
+                    frames += 1
+            finally:
+                capture.release()
+    return {"frames": frames, "fps": fps, "width": writer.width, "height": writer.height, "reencoded": True}
+
+
+def concat_videos(input_paths: List[str], output_path: str) -> Dict[str, Any]:
+    """
+    Concatenate videos in order. The first input sets the output size and frame
+    rate; when re-encoding, frames of other sizes are resized to match.
+    """
+    if not input_paths:
+        raise ValueError("No videos to concatenate")
+    try:
+        signatures = {_remux_signature(path) for path in input_paths}
+    except av.FFmpegError:
+        signatures = {None}
+    if len(signatures) == 1 and None not in signatures:
+        return _remux(input_paths, output_path)
+    return _reencode(input_paths, output_path)
@@ -0,0 +1 @@
+# Generation provider implementations 
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Base interface for generation providers.
+JobProcessor talks to providers only through this contract, so the hosted
+provider can be swapped for a local stand-in in development and load tests.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from src.schemas.job import JobType
+
+TERMINAL_PREDICTION_STATUSES = ("succeeded", "failed", "canceled")
+
+
+@dataclass
+class ProviderPrediction:
+    """Provider-neutral view of a prediction (mirrors Replicate's prediction fields)."""
+    id: str
+    status: str
+    logs: Optional[str] = None
+    output: Any = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_PREDICTION_STATUSES
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProviderPrediction":
+        return cls(
+            id=data.get("id"),
+            status=data.get("status"),
+            logs=data.get("logs"),
+            output=data.get("output"),
+            error=data.get("error"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "logs": self.logs,
+            "output": self.output,
+            "error": self.error,
+        }
+
+
+class GenerationProvider(ABC):
+    """Base interface for video and 3D asset generation providers."""
+
+    name: str
+    # Directory a provider that renders locally writes its outputs to; file:// outputs
+    # are only downloaded from here. None for providers that serve outputs over HTTP.
+    local_output_dir: Optional[str] = None
+
+    @abstractmethod
+    def supports(self, job_type: JobType) -> bool:
+        """Whether this provider can currently generate the given job type."""
+        pass
+
+    @abstractmethod
+    async def create_video_prediction(
+        self,
+        model_input: Dict[str, Any],
+        webhook: Optional[str] = None,
+        webhook_events_filter: Optional[List[str]] = None
+    ) -> ProviderPrediction:
+        """Start a video generation. If a webhook is given the provider POSTs prediction updates to it."""
+        pass
+
+    @abstractmethod
+    async def get_prediction(self, prediction_id: str) -> ProviderPrediction:
+        """Fetch the current state of a prediction."""
+        pass
+
+    @abstractmethod
+    async def cancel_prediction(self, prediction_id: str) -> None:
+        """Cancel a running prediction."""
+        pass
+
+    @abstractmethod
+    async def generate_object(self, job_id: str, parameters: Dict[str, Any]) -> Path:
+        """Generate a 3D asset and return the path of the local file holding it."""
+        pass
@@ -0,0 +1,28 @@
+"""
+Select the generation provider from config (overridable with GENERATION_PROVIDER).
+"""
+import os
+from src.config import config
+from src.providers.base import GenerationProvider
+from src.providers.fake_provider import FakeProvider
+from src.providers.replicate_provider import ReplicateProvider
+
+
+def build_generation_provider(name: str = None) -> GenerationProvider:
+    name = name or os.getenv("GENERATION_PROVIDER") or config.GENERATION_PROVIDER
+    match name:
+        case "replicate":
+            return ReplicateProvider(config.REPLICATE_VIDEO_MODEL_ID)
+        case "fake":
+            return FakeProvider(
+                duration_median_seconds=config.FAKE_PROVIDER_DURATION_MEDIAN_SECONDS,
+                duration_sigma=config.FAKE_PROVIDER_DURATION_SIGMA,
+                api_latency_median_seconds=config.FAKE_PROVIDER_API_LATENCY_MEDIAN_SECONDS,
+                failure_rate=config.FAKE_PROVIDER_FAILURE_RATE,
+                max_concurrent_requests=config.FAKE_PROVIDER_MAX_CONCURRENT_REQUESTS,
+                video_frames=config.FAKE_PROVIDER_VIDEO_FRAMES,
+                splat_count=config.FAKE_PROVIDER_SPLAT_COUNT,
+                seed=config.FAKE_PROVIDER_SEED,
+            )
+        case _:
+            raise ValueError(f"Unknown generation provider: {name}")
@@ -0,0 +1,247 @@
+"""
+Local, deterministic stand-in for a hosted generation provider.
+Generation time, API latency, failures and throttling are drawn from configurable
+distributions with a seeded RNG, and outputs are real files (H.264 MP4s, as the
+hosted models return, and .splat point clouds) so the whole job pipeline can be
+load-tested offline.
+"""
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from uuid import uuid4
+import aiohttp
+import cv2
+import numpy as np
+from replicate.exceptions import ReplicateError
+from src.media.h264 import H264Writer
+from src.media.splat_lod import SPLAT_DTYPE
+from src.providers.base import GenerationProvider, ProviderPrediction
+from src.schemas.job import JobType
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {"480p": (854, 480), "720p": (1280, 720)}
+# Generation time scales with pixels x frames relative to this baseline (the default model input)
+BASELINE_RENDER_WORK = 854 * 480 * 81
+
+
+def write_synthetic_video(path: str, width: int, height: int, num_frames: int, fps: int, seed: int):
+    """Encode a small moving-pattern H.264 MP4 (CPU-bound; run off the event loop)."""
+    rng = np.random.default_rng(seed)
+    base_color = rng.integers(0, 255, size=3, dtype=np.uint8)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    ys = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    with H264Writer(path, fps, width, height) as writer:
+        for i in range(num_frames):
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[..., 0] = (xs + i * 4) % 256
+            frame[..., 1] = (ys + i * 2) % 256
+            frame[..., 2] = base_color[2]
+            center = (int(width * (0.2 + 0.6 * i / max(num_frames - 1, 1))), height // 2)
+            cv2.circle(frame, center, height // 8, base_color.tolist(), -1)
+            writer.write(frame)
+
+
+def write_synthetic_splat(path: str, count: int, seed: int):
+    """Write a random Gaussian splat cloud in the .splat format."""
+    rng = np.random.default_rng(seed)
+    splats = np.empty(count, dtype=SPLAT_DTYPE)
+    splats["position"] = rng.normal(0, 2, size=(count, 3))
+    splats["scale"] = rng.lognormal(-4, 0.7, size=(count, 3))
+    splats["color"] = rng.integers(0, 256, size=(count, 4))
+    rotation = rng.normal(size=(count, 4))
+    rotation /= np.linalg.norm(rotation, axis=1, keepdims=True)
+    splats["rotation"] = np.clip(rotation * 128 + 128, 0, 255)
+    splats.tofile(path)
+
+
+class _FakePrediction:
+    """A prediction whose state is derived from the time since it was created."""
+
+    def __init__(self, duration_seconds: float, total_steps: int, fail: bool, render: asyncio.Task,
+                 output_path: str):
+        self.prediction = ProviderPrediction(id=f"fake-{uuid4().hex[:16]}", status="starting", logs="")
+        self._created = time.monotonic()
+        self._duration_seconds = duration_seconds
+        self._total_steps = total_steps
+        self._fail = fail
+        self._render = render
+        self._output_path = output_path
+
+    def refresh(self) -> ProviderPrediction:
+        prediction = self.prediction
+        if prediction.done:
+            return prediction
+        fraction = (time.monotonic() - self._created) / self._duration_seconds
+        if fraction < 0.1:
+            return prediction
+        step = min(int(fraction * self._total_steps), self._total_steps)
+        # Same tqdm-style lines Replicate models print, so progress parsing works unchanged
+        prediction.logs = "\n".join(
+            f"{i * 100 // self._total_steps}%|{'#' * i}| {i}/{self._total_steps}" for i in range(step + 1)
+        )
+        prediction.status = "processing"
+        if fraction >= 1.0 and self._fail:
+            prediction.status = "failed"
+            prediction.error = "Fake provider injected failure"
+        elif fraction >= 1.0 and self._render.done():
+            if self._render.exception():
+                prediction.status = "failed"
+                prediction.error = f"Fake render failed: {self._render.exception()}"
+            else:
+                prediction.status = "succeeded"
+                prediction.output = f"file://{self._output_path}"
+        return prediction
+
+    def cancel(self):
+        if not self.prediction.done:
+            self.prediction.status = "canceled"
+            self._render.cancel()
+
+
+class FakeProvider(GenerationProvider):
+    """
+    Generation provider that runs entirely in-process.
+    Generation times and API latencies are lognormal around their medians,
+    predictions fail with `failure_rate`, and API calls beyond
+    `max_concurrent_requests` are rejected with a 429 like a rate-limited upstream.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        duration_median_seconds: float = 5.0,
+        duration_sigma: float = 0.3,
+        api_latency_median_seconds: float = 0.0,
+        api_latency_sigma: float = 0.5,
+        failure_rate: float = 0.0,
+        max_concurrent_requests: int = 0,
+        video_size: Optional[tuple] = None,
+        video_frames: Optional[int] = None,
+        splat_count: int = 50_000,
+        seed: Optional[int] = None,
+        total_steps: int = 20,
+        output_dir: Optional[str] = None,
+    ):
+        self._duration_median_seconds = duration_median_seconds
+        self._duration_sigma = duration_sigma
+        self._api_latency_median_seconds = api_latency_median_seconds
+        self._api_latency_sigma = api_latency_sigma
+        self._failure_rate = failure_rate
+        self._max_concurrent_requests = max_concurrent_requests
+        self._video_size = video_size
+        self._video_frames = video_frames
+        self._splat_count = splat_count
+        self._total_steps = total_steps
+        self._rng = random.Random(seed)
+        self._output_dir = output_dir or tempfile.mkdtemp(prefix="fake_provider_")
+        self.local_output_dir = self._output_dir
+        self._predictions: Dict[str, _FakePrediction] = {}
+        self._background: set[asyncio.Task] = set()
+        self._requests_in_flight = 0
+        self.throttled_requests = 0
+
+    def supports(self, job_type: JobType) -> bool:
+        return job_type in (JobType.VIDEO, JobType.OBJECT)
+
+    def _sample(self, median: float, sigma: float) -> float:
+        if median <= 0:
+            return 0.0
+        return median * self._rng.lognormvariate(0, sigma)
+
+    async def _api_call(self):
+        """Simulate one API round trip, rejecting it when over capacity."""
+        self._requests_in_flight += 1
+        try:
+            if self._max_concurrent_requests and self._requests_in_flight > self._max_concurrent_requests:
+                self.throttled_requests += 1
+                raise ReplicateError(status=429, title="Too Many Requests", detail="Fake provider over capacity")
+            latency = self._sample(self._api_latency_median_seconds, self._api_latency_sigma)
+            if latency:
+                await asyncio.sleep(latency)
+        finally:
+            self._requests_in_flight -= 1
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def create_video_prediction(
+        self,
+        model_input: Dict[str, Any],
+        webhook: Optional[str] = None,
+        webhook_events_filter: Optional[List[str]] = None
+    ) -> ProviderPrediction:
+        await self._api_call()
+        width, height = self._video_size or RESOLUTIONS.get(model_input.get("resolution"), RESOLUTIONS["480p"])
+        num_frames = self._video_frames or int(model_input.get("num_frames", 81))
+        fps = int(model_input.get("frames_per_second", 16))
+        output_path = os.path.join(self._output_dir, f"{uuid4().hex}.mp4")
+        render = self._spawn(asyncio.to_thread(
+            write_synthetic_video, output_path, width, height, num_frames, fps, self._rng.getrandbits(32)
+        ))
+
+        model_width, model_height = RESOLUTIONS.get(model_input.get("resolution"), RESOLUTIONS["480p"])
+        work = model_width * model_height * int(model_input.get("num_frames", 81)) / BASELINE_RENDER_WORK
+        if not model_input.get("go_fast", True):
+            work *= 2
+        fake = _FakePrediction(
+            (self._sample(self._duration_median_seconds, self._duration_sigma) * work) or 0.001,
+            self._total_steps,
+            self._rng.random() < self._failure_rate,
+            render,
+            output_path
+        )
+        self._predictions[fake.prediction.id] = fake
+        if webhook:
+            self._spawn(self._deliver_callbacks(fake, webhook, webhook_events_filter))
+        return ProviderPrediction(**fake.prediction.to_dict())
+
+    async def get_prediction(self, prediction_id: str) -> ProviderPrediction:
+        await self._api_call()
+        fake = self._predictions[prediction_id]
+        prediction = fake.refresh()
+        if prediction.done:
+            self._predictions.pop(prediction_id, None)
+        return ProviderPrediction(**prediction.to_dict())
+
+    async def cancel_prediction(self, prediction_id: str) -> None:
+        await self._api_call()
+        fake = self._predictions.pop(prediction_id, None)
+        if fake:
+            fake.cancel()
+
+    async def generate_object(self, job_id: str, parameters: Dict[str, Any]) -> Path:
+        await asyncio.sleep(self._sample(self._duration_median_seconds, self._duration_sigma))
+        if self._rng.random() < self._failure_rate:
+            raise RuntimeError("Fake provider injected failure")
+        output_path = Path(self._output_dir) / f"{job_id}.splat"
+        await asyncio.to_thread(write_synthetic_splat, str(output_path), self._splat_count, self._rng.getrandbits(32))
+        return output_path
+
+    async def _deliver_callbacks(self, fake: _FakePrediction, webhook: str, events: Optional[List[str]]):
+        """POST prediction state to the webhook the way Replicate does."""
+        events = events or ["start", "output", "logs", "completed"]
+        interval = max(fake._duration_seconds / self._total_steps, 0.05)
+        async with aiohttp.ClientSession() as session:
+            while True:
+                await asyncio.sleep(interval)
+                prediction = fake.refresh()
+                if (prediction.done and "completed" in events) or (not prediction.done and "logs" in events):
+                    try:
+                        async with session.post(webhook, json=prediction.to_dict()) as response:
+                            if response.status >= 400:
+                                logger.warning(f"Fake callback for {prediction.id} returned {response.status}")
+                    except aiohttp.ClientError as e:
+                        logger.warning(f"Fake callback for {prediction.id} failed: {e}")
+                if prediction.done:
+                    # Kept until fetched: the callback handler reads the output through get_prediction
+                    return
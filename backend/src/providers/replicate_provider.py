@@ -0,0 +1,68 @@
+"""
+Replicate implementation of the generation provider interface.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+import replicate
+from src.providers.base import GenerationProvider, ProviderPrediction
+from src.schemas.job import JobType
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicateProvider(GenerationProvider):
+    """Video generation on Replicate; 3D generation still serves the example asset."""
+
+    name = "replicate"
+
+    def __init__(self, video_model_id: str, assets_dir: Path = Path("assets")):
+        self._video_model_id = video_model_id
+        self._assets_dir = assets_dir
+
+    def supports(self, job_type: JobType) -> bool:
+        if job_type == JobType.VIDEO:
+            return bool(os.getenv("REPLICATE_API_TOKEN"))
+        return job_type == JobType.OBJECT
+
+    def _to_prediction(self, prediction) -> ProviderPrediction:
+        return ProviderPrediction(
+            id=prediction.id,
+            status=prediction.status,
+            logs=prediction.logs,
+            output=prediction.output,
+            error=prediction.error,
+        )
+
+    async def create_video_prediction(
+        self,
+        model_input: Dict[str, Any],
+        webhook: Optional[str] = None,
+        webhook_events_filter: Optional[List[str]] = None
+    ) -> ProviderPrediction:
+        kwargs = {}
+        if webhook:
+            kwargs["webhook"] = webhook
+            kwargs["webhook_events_filter"] = webhook_events_filter or ["completed"]
+        prediction = await replicate.predictions.async_create(
+            model=self._video_model_id,
+            input=model_input,
+            **kwargs
+        )
+        return self._to_prediction(prediction)
+
+    async def get_prediction(self, prediction_id: str) -> ProviderPrediction:
+        return self._to_prediction(await replicate.predictions.async_get(prediction_id))
+
+    async def cancel_prediction(self, prediction_id: str) -> None:
+        await replicate.predictions.async_cancel(prediction_id)
+
+    async def generate_object(self, job_id: str, parameters: Dict[str, Any]) -> Path:
+        # TODO: Add actual 3D generation here
+        # For now, use an example K-Splat file
+        truck_ksplat_path = self._assets_dir / "ksplat" / "truck.ksplat"
+        if not truck_ksplat_path.exists():
+            raise FileNotFoundError(f"Truck K-Splat file not found: {truck_ksplat_path}")
+        logger.info(f"Using truck K-Splat file: {truck_ksplat_path}")
+        return truck_ksplat_path
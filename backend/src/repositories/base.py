@@ -3,7 +3,8 @@ Base repository interfaces for database operations.
 These define the contract that all database implementations must follow.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, Generic, TypeVar
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Any, Iterable, Optional, List, Set, Tuple, Generic, TypeVar
 
 T = TypeVar('T')
 
@@ -31,8 +32,15 @@ class DatabaseRepository(ABC, Generic[T]):
         pass
     
     @abstractmethod
-    async def find_all(self, filters: Dict[str, Any] = None, limit: int = None) -> List[T]:
-        """Find all entities matching optional filters."""
+    async def find_all(self, filters: Dict[str, Any] = None, limit: int = None,
+                       order_by: Optional[str] = None, descending: bool = False) -> List[T]:
+        """Find all entities matching optional filters, optionally sorted by one field."""
+        pass
+    
+    @abstractmethod
+    def stream(self, filters: Dict[str, Any] = None, order_by: Optional[str] = None,
+               page_size: int = 500) -> AsyncIterator[T]:
+        """Iterate over matching entities without loading them all, fetching `page_size` at a time."""
         pass
     
     @abstractmethod
@@ -64,6 +72,16 @@ class FileStorageRepository(ABC, Generic[T]):
         """Delete a file from storage."""
         pass
     
+    @abstractmethod
+    async def delete_files(self, filenames: List[str]) -> int:
+        """Delete many files in as few requests as possible; missing files are ignored. Returns the number requested."""
+        pass
+    
+    @abstractmethod
+    async def copy_files(self, source_prefix: str, destination_prefix: str) -> List[str]:
+        """Copy every file under source_prefix to the same relative name under destination_prefix. Returns the new names."""
+        pass
+    
     @abstractmethod
     async def file_exists(self, filename: str) -> bool:
         """Check if a file exists in storage."""
@@ -82,4 +100,193 @@ class FileStorageRepository(ABC, Generic[T]):
     @abstractmethod
     async def generate_download_url(self, filename: str, expiration: Optional[int] = None) -> str:
         """Generate a download URL for a file."""
-        pass
\ No newline at end of file
+        pass
+
+class JobQueueRepository(ABC):
+    """
+    Base interface for the job queue shared by the API (producer) and workers (consumers).
+    Entries are leased to a worker when claimed and the worker renews the lease
+    while the job runs; an entry whose lease expires without being acknowledged
+    becomes claimable again.
+    """
+    
+    @abstractmethod
+    async def enqueue(self, job: Dict[str, Any]) -> None:
+        """Add a job (as a JSON-serializable dict) to the queue. Does nothing if it is already queued."""
+        pass
+    
+    @abstractmethod
+    async def candidates(self, priority: str, limit: int, exclude_users: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` claimable entries of one priority class, oldest first, skipping the
+        jobs of `exclude_users`. Nothing is leased. Entries are {"job", "enqueued_at"}.
+        """
+        pass
+    
+    @abstractmethod
+    async def claim(self, worker_id: str, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Lease the given entries to a worker if they are still claimable. Returns the entries it
+        got, with "reclaimed" set when an earlier lease on the entry had lapsed.
+        """
+        pass
+    
+    @abstractmethod
+    async def renew(self, worker_id: str, job_ids: List[str]) -> List[str]:
+        """Extend the worker's leases on the given entries. Returns the ids it still holds."""
+        pass
+    
+    @abstractmethod
+    async def ack(self, job_id: str) -> None:
+        """Remove a job from the queue once a worker has finished with it."""
+        pass
+    
+    @abstractmethod
+    async def backlog(self) -> int:
+        """Number of jobs waiting to be claimed."""
+        pass
+
+class CreditLedgerRepository(ABC):
+    """
+    Base interface for per-user credit balances.
+    Credits are reserved when a job is created and later either committed
+    (spent) or refunded. Settling a reservation is idempotent.
+    """
+    
+    @abstractmethod
+    async def reserve(self, user_id: str, reservation_id: str, amount: int) -> bool:
+        """Hold `amount` credits under `reservation_id`. Returns False if the balance is too low."""
+        pass
+    
+    @abstractmethod
+    async def commit(self, reservation_id: str) -> bool:
+        """Spend a held reservation. Returns False if it was not outstanding."""
+        pass
+    
+    @abstractmethod
+    async def refund(self, reservation_id: str) -> bool:
+        """Return a held reservation to the balance. Returns False if it was not outstanding."""
+        pass
+    
+    @abstractmethod
+    async def balance(self, user_id: str) -> int:
+        """Credits available to reserve."""
+        pass
+
+class IdempotencyKeyRepository(ABC):
+    """
+    Base interface for idempotency keys.
+    Maps a key to the request hash and, once created, the job it produced.
+    """
+    
+    @abstractmethod
+    async def claim(self, key: str, request_hash: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Atomically reserve `key` for a new request.
+        Returns None if the key was free (or expired), otherwise the existing record
+        ({"request_hash", "job_id", "expires_at"}; job_id is None while in flight).
+        """
+        pass
+    
+    @abstractmethod
+    async def complete(self, key: str, job_id: str, ttl_seconds: float) -> None:
+        """Record the job created under a claimed key."""
+        pass
+    
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Drop a claimed key whose request failed, so it can be retried."""
+        pass
+
+class JobFinishedError(Exception):
+    """A write tried to change the status of a job that already finished; `job` is its current document."""
+    
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__(f"Job {job.get('job_id')} already finished")
+        self.job = job
+
+class ProjectStatsRepository(ABC):
+    """
+    Base interface for per-project job aggregates (see ProjectStats).
+    Job documents are written through it so each aggregate changes in the
+    same atomic write as the job it summarizes.
+    """
+    
+    @abstractmethod
+    async def create_job(self, job: Dict[str, Any]) -> None:
+        """Create a job document and count it in its project."""
+        pass
+    
+    @abstractmethod
+    async def update_job(self, job_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply `changes` to a job document and its project's aggregate. Returns the updated job,
+        or None if missing. Raises JobFinishedError, writing nothing, if the job is in a terminal
+        status and `changes` would move it to another status.
+        """
+        pass
+    
+    @abstractmethod
+    async def delete_jobs(self, jobs: List[Dict[str, Any]]) -> None:
+        """Delete job documents (as last read) with batched writes and take them out of their projects' aggregates."""
+        pass
+    
+    @abstractmethod
+    async def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """The project's aggregate document, if any job was ever written to it."""
+        pass
+
+class JobChangeFeedRepository(ABC):
+    """
+    Base interface for watching a user's most recent jobs.
+    Subscribers get the whole window (newest first) when they subscribe and
+    again after every change to it.
+    """
+    
+    @abstractmethod
+    def subscribe(self, user_id: str, limit: int,
+                  on_snapshot: Callable[[List[Dict[str, Any]]], None]) -> Callable[[], None]:
+        """
+        Watch the user's `limit` newest jobs; `on_snapshot` runs on the calling
+        event loop. Returns a function that stops the watch.
+        """
+        pass
+
+class JobArchiveRepository(ABC):
+    """Base interface for the bulk job reads used by archival and the worker's reaper (deletes go through ProjectStatsRepository)."""
+    
+    @abstractmethod
+    async def find_expired(self, statuses: List[str], before: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Up to `limit` jobs in one of `statuses` last modified before `before`, oldest first."""
+        pass
+    
+    @abstractmethod
+    async def existing_ids(self, job_ids: Iterable[str]) -> Set[str]:
+        """The subset of `job_ids` that still have a job document."""
+        pass
+
+class PromptSearchRepository(ABC):
+    """Base interface for full-text search over job prompts, scoped per user."""
+    
+    @abstractmethod
+    async def index(self, job_id: str, user_id: str, prompt: str, created_at: datetime) -> None:
+        """Add (or replace) a job's prompt."""
+        pass
+    
+    @abstractmethod
+    async def index_missing(self, user_id: str, entries: List[Tuple[str, str, datetime]]) -> int:
+        """Add the user's (job_id, prompt, created_at) entries that are not indexed yet; returns how many were added."""
+        pass
+    
+    @abstractmethod
+    async def remove(self, job_ids: List[str]) -> None:
+        """Drop jobs from the index."""
+        pass
+    
+    @abstractmethod
+    async def search(self, user_id: str, terms: List[str], limit: int, offset: int) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Rank the user's jobs whose prompt contains every term (as a word prefix).
+        Returns ([(job_id, score)] best first, with higher scores better, and the total match count).
+        """
+        pass
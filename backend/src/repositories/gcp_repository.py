@@ -2,13 +2,21 @@
 Google Cloud Firestore implementation of the repository interfaces.
 This handles all Google Cloud Firestore-specific logic while implementing the generic repository contracts.
 """
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Iterable, Optional, List, Set
 from src.repositories.base import (
-    DatabaseRepository, FileStorageRepository
+    DatabaseRepository, FileStorageRepository, JobQueueRepository, CreditLedgerRepository,
+    IdempotencyKeyRepository, ProjectStatsRepository, JobChangeFeedRepository, JobArchiveRepository,
+    JobFinishedError
 )
+from google.api_core.exceptions import AlreadyExists
 from google.cloud import firestore, storage
-from src.schemas.job import JobType, JobStatus
+from src.schemas.job import JobType, JobStatus, JobPriority, changes_terminal_status
+from src.schemas.project import project_stats_delta
+import asyncio
 import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
 
 
 class GCPFirestoreRepository(DatabaseRepository[Dict[str, Any]]):
@@ -34,6 +42,10 @@ class GCPFirestoreRepository(DatabaseRepository[Dict[str, Any]]):
         if "status" in converted_data and isinstance(converted_data["status"], JobStatus):
             converted_data["status"] = converted_data["status"].value
         
+        # Convert JobPriority enum to string
+        if "priority" in converted_data and isinstance(converted_data["priority"], JobPriority):
+            converted_data["priority"] = converted_data["priority"].value
+        
         return converted_data
     
     def _convert_strings_to_enums(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -54,6 +66,13 @@ class GCPFirestoreRepository(DatabaseRepository[Dict[str, Any]]):
             except ValueError:
                 pass  # Keep as string if not a valid enum value
         
+        # Convert string back to JobPriority enum
+        if "priority" in converted_data and isinstance(converted_data["priority"], str):
+            try:
+                converted_data["priority"] = JobPriority(converted_data["priority"])
+            except ValueError:
+                pass  # Keep as string if not a valid enum value
+        
         return converted_data 
 
     async def create(self, entity: Dict[str, Any]) -> Dict[str, Any]:
@@ -116,14 +135,21 @@ class GCPFirestoreRepository(DatabaseRepository[Dict[str, Any]]):
         await doc_ref.delete()
         return True
     
-    async def find_all(self, filters: Dict[str, Any] = None, limit: int = None) -> List[Dict[str, Any]]:
-        """Find all entities matching optional filters."""
+    async def find_all(self, filters: Dict[str, Any] = None, limit: int = None,
+                       order_by: Optional[str] = None, descending: bool = False) -> List[Dict[str, Any]]:
+        """Find all entities matching optional filters, optionally sorted by one field."""
         query = self._firestore_client.collection(self._collection_name)
         
         if filters:
             for key, value in filters.items():
                 query = query.where(key, "==", value)
         
+        if order_by:
+            # Combined with equality filters this needs a composite index
+            query = query.order_by(
+                order_by, direction=firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+            )
+        
         if limit:
             query = query.limit(limit)
         
@@ -131,6 +157,29 @@ class GCPFirestoreRepository(DatabaseRepository[Dict[str, Any]]):
         results = [doc.to_dict() async for doc in docs]
         return [self._convert_strings_to_enums(doc) for doc in results]
     
+    async def stream(self, filters: Dict[str, Any] = None, order_by: Optional[str] = None,
+                     page_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream matching entities page by page, resuming each page from the last
+        document seen, so no single query stream has to stay open for the whole scan.
+        """
+        query = self._firestore_client.collection(self._collection_name)
+        if filters:
+            for key, value in filters.items():
+                query = query.where(key, "==", value)
+        query = query.order_by(order_by or "__name__").limit(page_size)
+        
+        last_doc = None
+        while True:
+            page = query.start_after(last_doc) if last_doc is not None else query
+            count = 0
+            async for doc in page.stream():
+                count += 1
+                last_doc = doc
+                yield self._convert_strings_to_enums(doc.to_dict())
+            if count < page_size:
+                return
+    
     async def find_one(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Find a single entity matching the filters."""
         results = await self.find_all(filters, limit=1)
@@ -167,8 +216,7 @@ class GCPFileStorageRepository(FileStorageRepository[Dict[str, Any]]):
         """Upload a file to Google Cloud Storage."""
         bucket = self._storage.bucket(self._bucket_name)
         blob = bucket.blob(destination_blob_name)
-        if content_type:
-            blob.upload_from_filename(source_file_path, content_type=content_type)
+        blob.upload_from_filename(source_file_path, content_type=content_type)
         return {"blob_name": destination_blob_name, "bucket": self._bucket_name}
     
     async def upload_bytes(self, data: bytes, destination_blob_name: str, 
@@ -195,6 +243,30 @@ class GCPFileStorageRepository(FileStorageRepository[Dict[str, Any]]):
         blob.delete()
         return not blob.exists()
     
+    async def delete_files(self, blob_names: List[str]) -> int:
+        """Delete blobs using batch requests (100 deletes each), off the event loop."""
+        def delete():
+            bucket = self._storage.bucket(self._bucket_name)
+            for start in range(0, len(blob_names), 100):
+                # Don't fail the batch on blobs that are already gone
+                with self._storage.batch(raise_exception=False):
+                    for blob_name in blob_names[start:start + 100]:
+                        bucket.delete_blob(blob_name)
+        await asyncio.to_thread(delete)
+        return len(blob_names)
+    
+    async def copy_files(self, source_prefix: str, destination_prefix: str) -> List[str]:
+        """Server-side copies (no data passes through this process), off the event loop."""
+        def copy():
+            bucket = self._storage.bucket(self._bucket_name)
+            copied = []
+            for blob in self._storage.list_blobs(self._bucket_name, prefix=source_prefix):
+                destination = destination_prefix + blob.name[len(source_prefix):]
+                bucket.copy_blob(blob, bucket, destination)
+                copied.append(destination)
+            return copied
+        return await asyncio.to_thread(copy)
+    
     async def file_exists(self, blob_name: str) -> bool:
         """Check if a file exists in Google Cloud Storage."""
         bucket = self._storage.bucket(self._bucket_name)
@@ -246,3 +318,470 @@ class GCPFileStorageRepository(FileStorageRepository[Dict[str, Any]]):
         print(f"🔍 About to generate signed URL for blob: {blob_name}")
         return blob.generate_signed_url(expiration=timedelta(seconds=expiration), method="GET")
         print(f"✅ Generated signed URL successfully")
+
+
+
+@firestore.async_transactional
+async def _claim_queue_entry(transaction, doc_ref, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """Lease one queue entry if it is still unclaimed (or its lease has expired)."""
+    snapshot = await doc_ref.get(transaction=transaction)
+    now = time.time()
+    if not snapshot.exists or snapshot.get("lease_expires_at") > now:
+        return None
+    transaction.update(doc_ref, {"claimed_by": worker_id, "lease_expires_at": now + lease_seconds})
+    return snapshot.to_dict()
+
+
+@firestore.async_transactional
+async def _renew_queue_entries(transaction, doc_refs, worker_id: str, lease_seconds: float) -> List[str]:
+    """Extend the leases the worker still holds on the given entries."""
+    snapshots = [await doc_ref.get(transaction=transaction) for doc_ref in doc_refs]
+    now = time.time()
+    held = []
+    for doc_ref, snapshot in zip(doc_refs, snapshots):
+        if snapshot.exists and snapshot.get("claimed_by") == worker_id and snapshot.get("lease_expires_at") > now:
+            transaction.update(doc_ref, {"lease_expires_at": now + lease_seconds})
+            held.append(doc_ref.id)
+    return held
+
+
+class GCPFirestoreJobQueue(JobQueueRepository):
+    """
+    Firestore-backed job queue.
+    Each entry's `lease_expires_at` starts at its enqueue time, so a range query
+    ordered on that field returns unclaimed and expired entries oldest first.
+    """
+    
+    def __init__(self, collection_name: str, lease_seconds: float, backlog_cache_seconds: float = 2.0):
+        self._firestore_client = firestore.AsyncClient(
+            project=os.getenv("GCP_PROJECT_ID"), 
+            database=os.getenv("FIRESTORE_DATABASE_ID")
+        )
+        self._collection_name = collection_name
+        self._lease_seconds = lease_seconds
+        self._backlog_cache_seconds = backlog_cache_seconds
+        self._backlog = (0.0, 0)
+    
+    async def enqueue(self, job: Dict[str, Any]) -> None:
+        """Add a job to the queue collection; create() keeps an existing entry (and its lease) intact."""
+        doc_ref = self._firestore_client.collection(self._collection_name).document(job["job_id"])
+        now = time.time()
+        try:
+            await doc_ref.create({
+                "job": job,
+                # Top-level copies for the candidates query
+                "priority": job.get("priority") or JobPriority.INTERACTIVE.value,
+                "user_id": job["user_id"],
+                "claimed_by": None,
+                "enqueued_at": now,
+                "lease_expires_at": now,
+            })
+        except AlreadyExists:
+            pass
+    
+    async def candidates(self, priority: str, limit: int, exclude_users: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        One query per call. Up to 10 excluded users are filtered by the query (not-in),
+        any others client-side. Needs a composite index on (priority, lease_expires_at, user_id).
+        """
+        excluded = set(exclude_users)
+        query = (
+            self._firestore_client.collection(self._collection_name)
+            .where("priority", "==", priority)
+            .where("lease_expires_at", "<=", time.time())
+        )
+        if excluded:
+            query = query.where("user_id", "not-in", sorted(excluded)[:10])
+        query = query.order_by("lease_expires_at").limit(limit)
+        entries = []
+        async for doc in query.stream():
+            data = doc.to_dict()
+            if data["user_id"] not in excluded:
+                entries.append({"job": data["job"], "enqueued_at": data.get("enqueued_at", data["lease_expires_at"])})
+        return entries
+    
+    async def claim(self, worker_id: str, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """Lease each entry in its own transaction so workers never share one."""
+        claimed = []
+        for job_id in job_ids:
+            entry = await _claim_queue_entry(
+                self._firestore_client.transaction(),
+                self._firestore_client.collection(self._collection_name).document(job_id),
+                worker_id, self._lease_seconds
+            )
+            if entry:
+                claimed.append({
+                    "job": entry["job"],
+                    "enqueued_at": entry.get("enqueued_at", entry["lease_expires_at"]),
+                    "reclaimed": entry.get("claimed_by") is not None,
+                })
+        return claimed
+    
+    async def renew(self, worker_id: str, job_ids: List[str]) -> List[str]:
+        """One transaction for all of a worker's leases."""
+        if not job_ids:
+            return []
+        collection = self._firestore_client.collection(self._collection_name)
+        return await _renew_queue_entries(
+            self._firestore_client.transaction(),
+            [collection.document(job_id) for job_id in job_ids],
+            worker_id, self._lease_seconds
+        )
+    
+    async def ack(self, job_id: str) -> None:
+        """Delete a finished job's queue entry."""
+        await self._firestore_client.collection(self._collection_name).document(job_id).delete()
+    
+    async def backlog(self) -> int:
+        """Count claimable entries; cached briefly since admission control calls this per request."""
+        cached_at, count = self._backlog
+        if time.monotonic() - cached_at < self._backlog_cache_seconds:
+            return count
+        query = self._firestore_client.collection(self._collection_name).where("lease_expires_at", "<=", time.time())
+        result = await query.count().get()
+        count = int(result[0][0].value)
+        self._backlog = (time.monotonic(), count)
+        return count
+
+
+@firestore.async_transactional
+async def _initialize_credit_shards(transaction, account_ref, shard_refs, starting_credits: int):
+    """Create a user's shards, spreading the starting balance across them."""
+    snapshot = await account_ref.get(transaction=transaction)
+    if snapshot.exists:
+        return
+    base, extra = divmod(starting_credits, len(shard_refs))
+    transaction.create(account_ref, {"shard_count": len(shard_refs), "created_at": firestore.SERVER_TIMESTAMP})
+    for index, shard_ref in enumerate(shard_refs):
+        transaction.create(shard_ref, {"available": base + (1 if index < extra else 0)})
+
+
+@firestore.async_transactional
+async def _reserve_credits(transaction, shard_refs, reservation_ref, amount: int,
+                           reservation: Dict[str, Any]) -> Optional[bool]:
+    """
+    Take `amount` from the given shards (in order) and record the reservation.
+    Returns None if a shard does not exist yet, False if they hold too little.
+    """
+    snapshots = [await shard_ref.get(transaction=transaction) for shard_ref in shard_refs]
+    if not all(snapshot.exists for snapshot in snapshots):
+        return None
+    if sum(snapshot.get("available") for snapshot in snapshots) < amount:
+        return False
+    taken, remaining = {}, amount
+    for shard_ref, snapshot in zip(shard_refs, snapshots):
+        take = min(snapshot.get("available"), remaining)
+        if take:
+            transaction.update(shard_ref, {"available": firestore.Increment(-take)})
+            taken[shard_ref.id] = take
+            remaining -= take
+        if not remaining:
+            break
+    transaction.create(reservation_ref, {**reservation, "shards": taken})
+    return True
+
+
+@firestore.async_transactional
+async def _settle_reservation(transaction, ledger: "GCPFirestoreCreditLedger", reservation_ref, state: str) -> bool:
+    snapshot = await reservation_ref.get(transaction=transaction)
+    if not snapshot.exists or snapshot.get("state") != "reserved":
+        return False
+    if state == "refunded":
+        user_id = snapshot.get("user_id")
+        for shard_id, amount in snapshot.get("shards").items():
+            transaction.update(ledger._shard_ref(user_id, shard_id), {"available": firestore.Increment(amount)})
+    transaction.update(reservation_ref, {"state": state, "settled_at": firestore.SERVER_TIMESTAMP})
+    return True
+
+
+class GCPFirestoreCreditLedger(CreditLedgerRepository):
+    """
+    Firestore credit ledger with sharded balances.
+    Each user's balance is split across `shard_count` documents
+    ({collection}/{user_id}/shards/{n}); a reservation transaction touches one
+    random shard, so concurrent job creations for the same user rarely contend
+    and stay under Firestore's per-document write rate. Only when no single
+    shard can cover a reservation does it read (and lock) all of them.
+    """
+    
+    def __init__(self, collection_name: str, reservations_collection_name: str, shard_count: int,
+                 starting_credits: int):
+        self._firestore_client = firestore.AsyncClient(
+            project=os.getenv("GCP_PROJECT_ID"), 
+            database=os.getenv("FIRESTORE_DATABASE_ID")
+        )
+        self._collection_name = collection_name
+        self._reservations_collection_name = reservations_collection_name
+        self._shard_count = shard_count
+        self._starting_credits = starting_credits
+    
+    def _shard_ref(self, user_id: str, shard_id: Any):
+        return (self._firestore_client.collection(self._collection_name).document(user_id)
+                .collection("shards").document(str(shard_id)))
+    
+    def _reservation_ref(self, reservation_id: str):
+        return self._firestore_client.collection(self._reservations_collection_name).document(reservation_id)
+    
+    async def _initialize(self, user_id: str):
+        await _initialize_credit_shards(
+            self._firestore_client.transaction(),
+            self._firestore_client.collection(self._collection_name).document(user_id),
+            [self._shard_ref(user_id, index) for index in range(self._shard_count)],
+            self._starting_credits
+        )
+    
+    async def reserve(self, user_id: str, reservation_id: str, amount: int) -> bool:
+        reservation = {"user_id": user_id, "amount": amount, "state": "reserved",
+                       "created_at": firestore.SERVER_TIMESTAMP}
+        reservation_ref = self._reservation_ref(reservation_id)
+        shards = list(range(self._shard_count))
+        random.shuffle(shards)
+        # Fast path: one random shard; slow path: drain across all shards
+        for shard_ids in ([shards[0]], shards):
+            shard_refs = [self._shard_ref(user_id, shard_id) for shard_id in shard_ids]
+            reserved = await _reserve_credits(
+                self._firestore_client.transaction(), shard_refs, reservation_ref, amount, reservation
+            )
+            if reserved is None:
+                await self._initialize(user_id)
+                reserved = await _reserve_credits(
+                    self._firestore_client.transaction(), shard_refs, reservation_ref, amount, reservation
+                )
+            if reserved:
+                return True
+        return False
+    
+    async def commit(self, reservation_id: str) -> bool:
+        return await _settle_reservation(
+            self._firestore_client.transaction(), self, self._reservation_ref(reservation_id), "committed"
+        )
+    
+    async def refund(self, reservation_id: str) -> bool:
+        return await _settle_reservation(
+            self._firestore_client.transaction(), self, self._reservation_ref(reservation_id), "refunded"
+        )
+    
+    async def balance(self, user_id: str) -> int:
+        shards = (self._firestore_client.collection(self._collection_name).document(user_id)
+                  .collection("shards"))
+        total, found = 0, False
+        async for shard in shards.stream():
+            total += shard.get("available")
+            found = True
+        return total if found else self._starting_credits
+
+
+@firestore.async_transactional
+async def _claim_idempotency_key(transaction, doc_ref, request_hash: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+    snapshot = await doc_ref.get(transaction=transaction)
+    now = time.time()
+    if snapshot.exists and snapshot.get("expires_at") > now:
+        return snapshot.to_dict()
+    transaction.set(doc_ref, _idempotency_record(request_hash, None, now + ttl_seconds))
+    return None
+
+
+def _idempotency_record(request_hash: str, job_id: Optional[str], expires_at: float) -> Dict[str, Any]:
+    return {
+        "request_hash": request_hash,
+        "job_id": job_id,
+        "expires_at": expires_at,
+        # Timestamp copy for a Firestore TTL policy, which garbage-collects expired keys
+        "delete_at": datetime.fromtimestamp(expires_at, tz=timezone.utc),
+    }
+
+
+class GCPFirestoreIdempotencyKeys(IdempotencyKeyRepository):
+    """Firestore-backed idempotency keys; one document per key, claimed in a transaction."""
+    
+    def __init__(self, collection_name: str):
+        self._firestore_client = firestore.AsyncClient(
+            project=os.getenv("GCP_PROJECT_ID"), 
+            database=os.getenv("FIRESTORE_DATABASE_ID")
+        )
+        self._collection_name = collection_name
+    
+    def _doc_ref(self, key: str):
+        return self._firestore_client.collection(self._collection_name).document(key)
+    
+    async def claim(self, key: str, request_hash: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        return await _claim_idempotency_key(
+            self._firestore_client.transaction(), self._doc_ref(key), request_hash, ttl_seconds
+        )
+    
+    async def complete(self, key: str, job_id: str, ttl_seconds: float) -> None:
+        await self._doc_ref(key).update({"job_id": job_id, "expires_at": time.time() + ttl_seconds,
+                                         "delete_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)})
+    
+    async def release(self, key: str) -> None:
+        await self._doc_ref(key).delete()
+
+
+@firestore.async_transactional
+async def _write_job_with_project_stats(transaction, job_ref, stats_collection, changes: Dict[str, Any],
+                                        create: bool) -> Optional[Dict[str, Any]]:
+    """
+    Write a job document and increment its project's aggregate in one transaction.
+    Reading the job inside it also makes the terminal-status check atomic.
+    """
+    snapshot = await job_ref.get(transaction=transaction)
+    before = snapshot.to_dict() if snapshot.exists else None
+    if create:
+        if before is not None:
+            raise ValueError(f"Job {job_ref.id} already exists")
+        after = changes
+        transaction.set(job_ref, after)
+    else:
+        if before is None:
+            return None
+        if "status" in changes and changes_terminal_status(before["status"], changes["status"]):
+            raise JobFinishedError(before)
+        after = {**before, **changes}
+        transaction.update(job_ref, changes)
+
+    # Progress-only writes leave the aggregate alone
+    delta = project_stats_delta(before, after)
+    if delta:
+        stats = {"project_id": after["project_id"], "last_activity_at": after.get("modified_at"),
+                 **_project_stats_increments(delta)}
+        transaction.set(stats_collection.document(after["project_id"]), stats, merge=True)
+    return after
+
+
+def _project_stats_increments(delta: Dict[str, int]) -> Dict[str, Any]:
+    """A project_stats_delta as fields for a merged set of the aggregate document."""
+    fields: Dict[str, Any] = {}
+    for field, amount in delta.items():
+        if field.startswith("counts."):
+            fields.setdefault("counts", {})[field.split(".", 1)[1]] = firestore.Increment(amount)
+        else:
+            fields[field] = firestore.Increment(amount)
+    return fields
+
+
+class GCPFirestoreProjectStats(ProjectStatsRepository):
+    """
+    Firestore project aggregates, one document per project. Job writes go
+    through a transaction that reads the job's previous state, so concurrent
+    updates of the same job can't double-count a status transition.
+    """
+    
+    # Firestore allows 500 writes per batch: up to 250 deletes plus one aggregate per project
+    BATCH_SIZE = 250
+    
+    def __init__(self, job_repo: GCPFirestoreRepository, collection_name: str):
+        self._job_repo = job_repo
+        self._firestore_client = job_repo._firestore_client
+        self._collection_name = collection_name
+    
+    def _job_ref(self, job_id: str):
+        return self._firestore_client.collection(self._job_repo._collection_name).document(job_id)
+    
+    async def create_job(self, job: Dict[str, Any]) -> None:
+        await _write_job_with_project_stats(
+            self._firestore_client.transaction(), self._job_ref(job["job_id"]),
+            self._firestore_client.collection(self._collection_name),
+            self._job_repo._convert_enums_for_firestore(job), True
+        )
+    
+    async def update_job(self, job_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            updated = await _write_job_with_project_stats(
+                self._firestore_client.transaction(), self._job_ref(job_id),
+                self._firestore_client.collection(self._collection_name),
+                self._job_repo._convert_enums_for_firestore(changes), False
+            )
+        except JobFinishedError as e:
+            raise JobFinishedError(self._job_repo._convert_strings_to_enums(e.job))
+        return self._job_repo._convert_strings_to_enums(updated) if updated is not None else None
+    
+    async def delete_jobs(self, jobs: List[Dict[str, Any]]) -> None:
+        """
+        Each batch deletes its jobs and applies their summed decrements per project, so
+        a batch is atomic. Jobs must not change between being read and deleted
+        (archival only deletes terminal jobs, and runs once per deployment).
+        """
+        stats_collection = self._firestore_client.collection(self._collection_name)
+        for start in range(0, len(jobs), self.BATCH_SIZE):
+            batch = self._firestore_client.batch()
+            deltas: Dict[str, Dict[str, int]] = {}
+            for job in jobs[start:start + self.BATCH_SIZE]:
+                batch.delete(self._job_ref(job["job_id"]))
+                project_delta = deltas.setdefault(job["project_id"], {})
+                for field, amount in project_stats_delta(job, None).items():
+                    project_delta[field] = project_delta.get(field, 0) + amount
+            for project_id, delta in deltas.items():
+                batch.set(stats_collection.document(project_id), _project_stats_increments(delta), merge=True)
+            await batch.commit()
+    
+    async def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        doc = await self._firestore_client.collection(self._collection_name).document(project_id).get()
+        return doc.to_dict() if doc.exists else None
+
+
+class GCPFirestoreJobChangeFeed(JobChangeFeedRepository):
+    """
+    Firestore snapshot listeners on users' recent jobs (one query listener per
+    watched user). Listeners exist only on the synchronous client; callbacks
+    arrive on its watch thread and are handed to the event loop.
+    """
+    
+    def __init__(self, job_repo: GCPFirestoreRepository):
+        self._job_repo = job_repo
+        self._client = firestore.Client(
+            project=os.getenv("GCP_PROJECT_ID"),
+            database=os.getenv("FIRESTORE_DATABASE_ID")
+        )
+    
+    def subscribe(self, user_id: str, limit: int, on_snapshot):
+        loop = asyncio.get_running_loop()
+        query = (
+            self._client.collection(self._job_repo._collection_name)
+            .where("user_id", "==", user_id)
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        
+        def callback(docs, changes, read_time):
+            # `docs` is the full result set in query order
+            jobs = [self._job_repo._convert_strings_to_enums(doc.to_dict()) for doc in docs]
+            loop.call_soon_threadsafe(on_snapshot, jobs)
+        
+        watch = query.on_snapshot(callback)
+        return watch.unsubscribe
+
+
+class GCPFirestoreJobArchive(JobArchiveRepository):
+    """Paged expiry queries and batched existence checks on the jobs collection."""
+    
+    # Firestore allows 500 writes per batch
+    BATCH_SIZE = 500
+    
+    def __init__(self, job_repo: GCPFirestoreRepository):
+        self._job_repo = job_repo
+        self._firestore_client = job_repo._firestore_client
+    
+    def _collection(self):
+        return self._firestore_client.collection(self._job_repo._collection_name)
+    
+    async def find_expired(self, statuses: List[str], before, limit: int) -> List[Dict[str, Any]]:
+        # Needs a composite index on (status, modified_at)
+        query = (
+            self._collection()
+            .where("status", "in", statuses)
+            .where("modified_at", "<", before)
+            .order_by("modified_at")
+            .limit(limit)
+        )
+        return [self._job_repo._convert_strings_to_enums(doc.to_dict()) async for doc in query.stream()]
+    
+    async def existing_ids(self, job_ids: Iterable[str]) -> Set[str]:
+        job_ids = list(job_ids)
+        existing = set()
+        for start in range(0, len(job_ids), self.BATCH_SIZE):
+            refs = [self._collection().document(job_id) for job_id in job_ids[start:start + self.BATCH_SIZE]]
+            # One batched read instead of a get per job
+            async for snapshot in self._firestore_client.get_all(refs, field_paths=["job_id"]):
+                if snapshot.exists:
+                    existing.add(snapshot.id)
+        return existing
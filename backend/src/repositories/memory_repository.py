@@ -0,0 +1,454 @@
+"""
+In-process implementations of the repository interfaces.
+Used for local development and load tests so the job pipeline can run
+without Firestore or Cloud Storage.
+"""
+import asyncio
+import copy
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from collections import defaultdict
+from itertools import count
+from typing import AsyncIterator, Callable, Dict, Any, Iterable, Optional, List, Set
+from src.repositories.base import (
+    DatabaseRepository, FileStorageRepository, JobQueueRepository, CreditLedgerRepository,
+    IdempotencyKeyRepository, ProjectStatsRepository, JobChangeFeedRepository, JobArchiveRepository,
+    JobFinishedError
+)
+from src.schemas.job import JobPriority, changes_terminal_status
+from src.schemas.project import project_stats_delta
+
+
+class InMemoryDatabaseRepository(DatabaseRepository[Dict[str, Any]]):
+    """Dict-backed implementation of the base repository interface."""
+
+    def __init__(self, collection_name: str):
+        self._collection_name = collection_name
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        # Called with each written (or deleted) document; see InMemoryJobChangeFeed
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        self._listeners.append(listener)
+
+    def _notify(self, document: Dict[str, Any]):
+        for listener in self._listeners:
+            listener(document)
+
+    def _entity_id(self, entity: Dict[str, Any]) -> str:
+        entity_id = entity.get('id') or entity.get('job_id') or entity.get('user_id')
+        if not entity_id:
+            raise ValueError("Entity must have an 'id', 'user_id', or 'job_id' field")
+        return entity_id
+
+    async def create(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        self._documents[self._entity_id(entity)] = copy.deepcopy(entity)
+        self._notify(entity)
+        return entity
+
+    async def get_by_id(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._documents.get(entity_id)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def update(self, entity_id: str, entity: Dict[str, Any]) -> Dict[str, Any]:
+        if entity_id not in self._documents:
+            raise ValueError(f"Entity {entity_id} not found in {self._collection_name}")
+        self._documents[entity_id].update(copy.deepcopy(entity))
+        self._notify(self._documents[entity_id])
+        return copy.deepcopy(self._documents[entity_id])
+
+    async def delete(self, entity_id: str) -> bool:
+        deleted = self._documents.pop(entity_id, None)
+        if deleted is not None:
+            self._notify(deleted)
+        return True
+
+    async def find_all(self, filters: Dict[str, Any] = None, limit: int = None,
+                       order_by: Optional[str] = None, descending: bool = False) -> List[Dict[str, Any]]:
+        matches = [
+            doc for doc in self._documents.values()
+            if not filters or all(doc.get(key) == value for key, value in filters.items())
+        ]
+        if order_by:
+            # Like Firestore, documents without the field are left out of ordered queries
+            matches = sorted((doc for doc in matches if doc.get(order_by) is not None),
+                             key=lambda doc: doc[order_by], reverse=descending)
+        if limit:
+            matches = matches[:limit]
+        return [copy.deepcopy(doc) for doc in matches]
+
+    async def stream(self, filters: Dict[str, Any] = None, order_by: Optional[str] = None,
+                     page_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        matches = [doc for doc in self._documents.values()
+                   if not filters or all(doc.get(key) == value for key, value in filters.items())]
+        if order_by:
+            matches = sorted((doc for doc in matches if doc.get(order_by) is not None), key=lambda doc: doc[order_by])
+        for index, doc in enumerate(matches):
+            if index % page_size == 0:
+                # Let other tasks run between pages, like a paged database read would
+                await asyncio.sleep(0)
+            yield copy.deepcopy(doc)
+
+    async def find_one(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        results = await self.find_all(filters, limit=1)
+        return results[0] if results else None
+
+    async def upsert(self, entity: Dict[str, Any]) -> Dict[str, Any]:
+        entity_id = self._entity_id(entity)
+        if entity_id in self._documents:
+            return await self.update(entity_id, entity)
+        return await self.create(entity)
+
+
+class LocalFileStorageRepository(FileStorageRepository[Dict[str, Any]]):
+    """Local-directory implementation of the storage interface; download URLs are file:// URLs."""
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = Path(root or tempfile.mkdtemp(prefix="local_storage_"))
+
+    def _path(self, blob_name: str) -> Path:
+        path = self._root / blob_name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    async def upload_file(self, source_file_path: str, destination_blob_name: str,
+                          content_type: Optional[str] = None) -> Dict[str, Any]:
+        shutil.copyfile(source_file_path, self._path(destination_blob_name))
+        return {"blob_name": destination_blob_name, "bucket": str(self._root)}
+
+    async def upload_bytes(self, data: bytes, destination_blob_name: str,
+                           content_type: str = "application/octet-stream") -> Dict[str, Any]:
+        self._path(destination_blob_name).write_bytes(data)
+        return {"blob_name": destination_blob_name, "bucket": str(self._root)}
+
+    async def download_file(self, blob_name: str, destination_file_path: str) -> bool:
+        path = self._root / blob_name
+        if not path.exists():
+            return False
+        shutil.copyfile(path, destination_file_path)
+        return True
+
+    async def delete_file(self, blob_name: str) -> bool:
+        path = self._root / blob_name
+        if path.exists():
+            os.remove(path)
+        return True
+
+    async def delete_files(self, blob_names: List[str]) -> int:
+        for blob_name in blob_names:
+            await self.delete_file(blob_name)
+        return len(blob_names)
+
+    async def copy_files(self, source_prefix: str, destination_prefix: str) -> List[str]:
+        copied = []
+        for blob_name in await self.list_files(source_prefix):
+            destination = destination_prefix + blob_name[len(source_prefix):]
+            shutil.copyfile(self._root / blob_name, self._path(destination))
+            copied.append(destination)
+        return copied
+
+    async def file_exists(self, blob_name: str) -> bool:
+        return (self._root / blob_name).exists()
+
+    async def list_files(self, prefix: Optional[str] = None) -> List[str]:
+        names = [str(path.relative_to(self._root)) for path in self._root.rglob("*") if path.is_file()]
+        return sorted(name for name in names if not prefix or name.startswith(prefix))
+
+    async def get_file_metadata(self, blob_name: str) -> Optional[Dict[str, Any]]:
+        path = self._root / blob_name
+        if not path.exists():
+            return None
+        return {"name": blob_name, "size": path.stat().st_size}
+
+    async def generate_download_url(self, blob_name: str, expiration: Optional[int] = None) -> str:
+        return f"file://{self._root / blob_name}"
+
+
+class InMemoryJobQueue(JobQueueRepository):
+    """Process-local job queue; API and workers must share the process."""
+
+    def __init__(self, lease_seconds: float):
+        self._lease_seconds = lease_seconds
+        # job_id -> [lease_expires_at, job, enqueued_at, claimed_by]; dicts keep insertion (FIFO) order
+        self._entries: Dict[str, list] = {}
+        self._available = asyncio.Event()
+
+    async def enqueue(self, job: Dict[str, Any]) -> None:
+        if job["job_id"] in self._entries:
+            return
+        now = time.time()
+        self._entries[job["job_id"]] = [now, copy.deepcopy(job), now, None]
+        self._available.set()
+
+    async def candidates(self, priority: str, limit: int, exclude_users: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        now = time.time()
+        excluded = set(exclude_users)
+        entries = []
+        # Leased entries keep their insertion position, so order by lease expiry explicitly
+        for lease_expires_at, job, enqueued_at, _ in sorted(self._entries.values(), key=lambda entry: entry[0]):
+            if len(entries) >= limit or lease_expires_at > now:
+                break
+            if (job.get("priority") or JobPriority.INTERACTIVE.value) == priority and job["user_id"] not in excluded:
+                entries.append({"job": copy.deepcopy(job), "enqueued_at": enqueued_at})
+        return entries
+
+    async def claim(self, worker_id: str, job_ids: List[str]) -> List[Dict[str, Any]]:
+        now = time.time()
+        claimed = []
+        for job_id in job_ids:
+            entry = self._entries.get(job_id)
+            if entry is not None and entry[0] <= now:
+                claimed.append({"job": copy.deepcopy(entry[1]), "enqueued_at": entry[2], "reclaimed": entry[3] is not None})
+                entry[0], entry[3] = now + self._lease_seconds, worker_id
+        return claimed
+
+    async def renew(self, worker_id: str, job_ids: List[str]) -> List[str]:
+        now = time.time()
+        held = []
+        for job_id in job_ids:
+            entry = self._entries.get(job_id)
+            if entry is not None and entry[3] == worker_id and entry[0] > now:
+                entry[0] = now + self._lease_seconds
+                held.append(job_id)
+        return held
+
+    async def ack(self, job_id: str) -> None:
+        self._entries.pop(job_id, None)
+
+    async def backlog(self) -> int:
+        now = time.time()
+        return sum(1 for entry in self._entries.values() if entry[0] <= now)
+
+    async def wait_for_jobs(self, timeout: float):
+        """Let an in-process worker sleep until something is enqueued."""
+        self._available.clear()
+        try:
+            await asyncio.wait_for(self._available.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class InMemoryCreditLedger(CreditLedgerRepository):
+    """
+    Sharded credit ledger mirroring the Firestore layout.
+    `document_write_seconds` holds a shard's lock for that long per write,
+    which models per-document write serialization for benchmarks.
+    """
+
+    def __init__(self, shard_count: int, starting_credits: int, document_write_seconds: float = 0.0):
+        self._shard_count = shard_count
+        self._starting_credits = starting_credits
+        self._document_write_seconds = document_write_seconds
+        self._shards: Dict[str, List[int]] = {}
+        self._locks: Dict[tuple, asyncio.Lock] = {}
+        self._reservations: Dict[str, Dict[str, Any]] = {}
+
+    def _user_shards(self, user_id: str) -> List[int]:
+        if user_id not in self._shards:
+            base, extra = divmod(self._starting_credits, self._shard_count)
+            self._shards[user_id] = [base + (1 if i < extra else 0) for i in range(self._shard_count)]
+        return self._shards[user_id]
+
+    def _lock(self, user_id: str, shard: int) -> asyncio.Lock:
+        return self._locks.setdefault((user_id, shard), asyncio.Lock())
+
+    async def _write(self):
+        if self._document_write_seconds:
+            await asyncio.sleep(self._document_write_seconds)
+
+    async def reserve(self, user_id: str, reservation_id: str, amount: int) -> bool:
+        shards = self._user_shards(user_id)
+        order = list(range(self._shard_count))
+        random.shuffle(order)
+        # Fast path: one random shard; slow path: drain across all shards
+        for shard_ids in ([order[0]], sorted(order)):
+            locks = [self._lock(user_id, shard) for shard in shard_ids]
+            for lock in locks:
+                await lock.acquire()
+            try:
+                if sum(shards[shard] for shard in shard_ids) < amount:
+                    continue
+                taken, remaining = {}, amount
+                for shard in shard_ids:
+                    take = min(shards[shard], remaining)
+                    if take:
+                        shards[shard] -= take
+                        taken[shard] = take
+                        remaining -= take
+                    if not remaining:
+                        break
+                await self._write()
+                self._reservations[reservation_id] = {
+                    "user_id": user_id, "amount": amount, "state": "reserved", "shards": taken
+                }
+                return True
+            finally:
+                for lock in locks:
+                    lock.release()
+        return False
+
+    async def _settle(self, reservation_id: str, state: str) -> bool:
+        reservation = self._reservations.get(reservation_id)
+        if reservation is None or reservation["state"] != "reserved":
+            return False
+        reservation["state"] = state
+        if state == "refunded":
+            shards = self._user_shards(reservation["user_id"])
+            for shard, amount in reservation["shards"].items():
+                async with self._lock(reservation["user_id"], shard):
+                    shards[shard] += amount
+                    await self._write()
+        return True
+
+    async def commit(self, reservation_id: str) -> bool:
+        return await self._settle(reservation_id, "committed")
+
+    async def refund(self, reservation_id: str) -> bool:
+        return await self._settle(reservation_id, "refunded")
+
+    async def balance(self, user_id: str) -> int:
+        return sum(self._user_shards(user_id))
+
+
+class InMemoryIdempotencyKeys(IdempotencyKeyRepository):
+    """Process-local idempotency keys; claims are atomic because they never await."""
+
+    def __init__(self, sweep_interval_seconds: float = 60.0):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._sweep_interval_seconds = sweep_interval_seconds
+        self._next_sweep = time.time() + sweep_interval_seconds
+
+    async def claim(self, key: str, request_hash: str, ttl_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        record = self._records.get(key)
+        if record is not None and record["expires_at"] > now:
+            return dict(record)
+        if now >= self._next_sweep:
+            # Sweep expired keys occasionally so the dict stays bounded by the TTL
+            self._next_sweep = now + self._sweep_interval_seconds
+            for expired in [k for k, r in self._records.items() if r["expires_at"] <= now]:
+                del self._records[expired]
+        self._records[key] = {"request_hash": request_hash, "job_id": None, "expires_at": now + ttl_seconds}
+        return None
+
+    async def complete(self, key: str, job_id: str, ttl_seconds: float) -> None:
+        record = self._records.get(key)
+        if record is not None:
+            record.update(job_id=job_id, expires_at=time.time() + ttl_seconds)
+
+    async def release(self, key: str) -> None:
+        self._records.pop(key, None)
+
+
+class InMemoryProjectStats(ProjectStatsRepository):
+    """Project aggregates over an InMemoryDatabaseRepository of jobs; each write is atomic since it never awaits."""
+
+    def __init__(self, job_repo: InMemoryDatabaseRepository):
+        self._job_repo = job_repo
+        self._jobs = job_repo._documents
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _apply(self, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        delta = project_stats_delta(before, after)
+        if not delta:
+            return
+        project_id = (after or before)["project_id"]
+        stats = self._stats.setdefault(project_id, {
+            "project_id": project_id, "total_jobs": 0, "counts": {}, "asset_bytes": 0
+        })
+        for field, amount in delta.items():
+            if field.startswith("counts."):
+                status = field.split(".", 1)[1]
+                stats["counts"][status] = stats["counts"].get(status, 0) + amount
+            else:
+                stats[field] += amount
+        if after is not None:
+            stats["last_activity_at"] = after.get("modified_at")
+
+    async def create_job(self, job: Dict[str, Any]) -> None:
+        if job["job_id"] in self._jobs:
+            raise ValueError(f"Job {job['job_id']} already exists")
+        self._jobs[job["job_id"]] = copy.deepcopy(job)
+        self._apply(None, job)
+        self._job_repo._notify(job)
+
+    async def update_job(self, job_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        current = self._jobs.get(job_id)
+        if current is None:
+            return None
+        if "status" in changes and changes_terminal_status(current["status"], changes["status"]):
+            raise JobFinishedError(copy.deepcopy(current))
+        # Top-level copy is enough: updates replace whole fields
+        before = dict(current)
+        current.update(copy.deepcopy(changes))
+        self._apply(before, current)
+        self._job_repo._notify(current)
+        return copy.deepcopy(current)
+
+    async def delete_jobs(self, jobs: List[Dict[str, Any]]) -> None:
+        for job in jobs:
+            deleted = self._jobs.pop(job["job_id"], None)
+            if deleted is not None:
+                self._apply(deleted, None)
+                self._job_repo._notify(deleted)
+
+    async def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        stats = self._stats.get(project_id)
+        return copy.deepcopy(stats) if stats is not None else None
+
+
+class InMemoryJobChangeFeed(JobChangeFeedRepository):
+    """Local stand-in for snapshot listeners, fed by writes to an InMemoryDatabaseRepository of jobs."""
+
+    def __init__(self, job_repo: InMemoryDatabaseRepository):
+        self._job_repo = job_repo
+        # user_id -> {subscription id: (limit, on_snapshot)}
+        self._subscriptions: Dict[str, Dict[int, tuple]] = defaultdict(dict)
+        self._ids = count()
+        job_repo.add_listener(self._on_change)
+
+    def _window(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        jobs = [doc for doc in self._job_repo._documents.values() if doc.get("user_id") == user_id]
+        jobs.sort(key=lambda doc: doc["created_at"], reverse=True)
+        return [copy.deepcopy(doc) for doc in jobs[:limit]]
+
+    def subscribe(self, user_id: str, limit: int, on_snapshot):
+        loop = asyncio.get_running_loop()
+        subscription_id = next(self._ids)
+        self._subscriptions[user_id][subscription_id] = (limit, on_snapshot)
+        loop.call_soon(on_snapshot, self._window(user_id, limit))
+
+        def unsubscribe():
+            subscriptions = self._subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.pop(subscription_id, None)
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+        return unsubscribe
+
+    def _on_change(self, document: Dict[str, Any]):
+        user_id = document.get("user_id")
+        for limit, on_snapshot in list(self._subscriptions.get(user_id, {}).values()):
+            on_snapshot(self._window(user_id, limit))
+
+
+class InMemoryJobArchive(JobArchiveRepository):
+    """Bulk job reads over an InMemoryDatabaseRepository."""
+
+    def __init__(self, job_repo: InMemoryDatabaseRepository):
+        self._job_repo = job_repo
+
+    async def find_expired(self, statuses: List[str], before, limit: int) -> List[Dict[str, Any]]:
+        expired = [
+            doc for doc in self._job_repo._documents.values()
+            if getattr(doc["status"], "value", doc["status"]) in statuses and doc["modified_at"] < before
+        ]
+        expired.sort(key=lambda doc: doc["modified_at"])
+        return [copy.deepcopy(doc) for doc in expired[:limit]]
+
+    async def existing_ids(self, job_ids: Iterable[str]) -> Set[str]:
+        return {job_id for job_id in job_ids if job_id in self._job_repo._documents}
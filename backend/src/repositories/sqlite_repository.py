@@ -0,0 +1,112 @@
+"""
+SQLite implementations of the repository interfaces.
+The prompt search index is an FTS5 table (an inverted index with BM25
+ranking), kept in memory or in a local file. SQLite calls block, so they run
+in worker threads, one at a time per connection.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Tuple
+from src.repositories.base import PromptSearchRepository
+
+
+def _owner_token(user_id: str) -> str:
+    # One opaque token per user, so a user filter is a single posting-list lookup
+    return "u" + hashlib.sha1(user_id.encode()).hexdigest()[:20]
+
+
+class SQLitePromptSearchIndex(PromptSearchRepository):
+    """
+    FTS5 index over prompts. The owner token is indexed next to the prompt so
+    "this user's jobs matching these terms" is answered from the inverted index
+    alone (weight 0 keeps it out of the ranking).
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS prompt_jobs (
+                id INTEGER PRIMARY KEY,
+                job_id TEXT NOT NULL UNIQUE,
+                created_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS prompt_fts USING fts5(
+                prompt, owner, tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+        """)
+
+    async def index(self, job_id: str, user_id: str, prompt: str, created_at: datetime) -> None:
+        await asyncio.to_thread(self._locked, self._index, job_id, user_id, prompt, created_at)
+
+    async def index_missing(self, user_id: str, entries: List[Tuple[str, str, datetime]]) -> int:
+        return await asyncio.to_thread(self._locked, self._index_missing, user_id, entries)
+
+    async def remove(self, job_ids: List[str]) -> None:
+        await asyncio.to_thread(self._locked, self._remove, job_ids)
+
+    async def search(self, user_id: str, terms: List[str], limit: int, offset: int) -> Tuple[List[Tuple[str, float]], int]:
+        if not terms:
+            return [], 0
+        return await asyncio.to_thread(self._locked, self._search, user_id, terms, limit, offset)
+
+    def _locked(self, func, *args):
+        # One connection is shared by every thread, so transactions must not interleave
+        with self._lock:
+            return func(*args)
+
+    def _insert(self, job_id: str, user_id: str, prompt: str, created_at: datetime):
+        cursor = self._db.execute(
+            "INSERT INTO prompt_jobs (job_id, created_at) VALUES (?, ?)", (job_id, created_at.timestamp())
+        )
+        self._db.execute(
+            "INSERT INTO prompt_fts (rowid, prompt, owner) VALUES (?, ?, ?)",
+            (cursor.lastrowid, prompt, _owner_token(user_id))
+        )
+
+    def _index(self, job_id: str, user_id: str, prompt: str, created_at: datetime):
+        with self._db:
+            self._delete(job_id)
+            self._insert(job_id, user_id, prompt, created_at)
+
+    def _index_missing(self, user_id: str, entries: List[Tuple[str, str, datetime]]) -> int:
+        added = 0
+        with self._db:
+            for job_id, prompt, created_at in entries:
+                if not self._db.execute("SELECT 1 FROM prompt_jobs WHERE job_id = ?", (job_id,)).fetchone():
+                    self._insert(job_id, user_id, prompt, created_at)
+                    added += 1
+        return added
+
+    def _delete(self, job_id: str):
+        row = self._db.execute("SELECT id FROM prompt_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row:
+            self._db.execute("DELETE FROM prompt_fts WHERE rowid = ?", (row[0],))
+            self._db.execute("DELETE FROM prompt_jobs WHERE id = ?", (row[0],))
+
+    def _remove(self, job_ids: List[str]):
+        with self._db:
+            for job_id in job_ids:
+                self._delete(job_id)
+
+    def _search(self, user_id: str, terms: List[str], limit: int, offset: int) -> Tuple[List[Tuple[str, float]], int]:
+        # Quoted prefix terms: user input never reaches the FTS query syntax
+        prompt_query = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        match = f'owner : "{_owner_token(user_id)}" AND prompt : ({prompt_query})'
+        total = self._db.execute("SELECT count(*) FROM prompt_fts WHERE prompt_fts MATCH ?", (match,)).fetchone()[0]
+        rows = self._db.execute(
+            """
+            SELECT prompt_jobs.job_id, bm25(prompt_fts, 1.0, 0.0) AS rank
+            FROM prompt_fts JOIN prompt_jobs ON prompt_jobs.id = prompt_fts.rowid
+            WHERE prompt_fts MATCH ?
+            ORDER BY rank, prompt_jobs.created_at DESC
+            LIMIT ? OFFSET ?
+            """,
+            (match, limit, offset)
+        ).fetchall()
+        # bm25() is lower-is-better and negative; report higher-is-better scores
+        return [(job_id, -rank) for job_id, rank in rows], total
@@ -8,12 +8,27 @@ class JobType(Enum):
     VIDEO = "Video"
     AUDIO = "Audio"
     IMAGE = "Image"
+    # Multi-shot video: parameters["shots"] fan out to child VIDEO jobs that are stitched together
+    COMPOSITE = "Composite"
+
+class JobPriority(Enum):
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
 
 class JobStatus(Enum):
     QUEUED = "queued"
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+# A job in one of these never changes status again
+TERMINAL_JOB_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+def changes_terminal_status(current: Any, new: Any) -> bool:
+    """Whether moving a job from status `current` to `new` (enums or values) would change a terminal status."""
+    current, new = JobStatus(getattr(current, "value", current)), JobStatus(getattr(new, "value", new))
+    return current in TERMINAL_JOB_STATUSES and new != current
 
 # TODO: Potentially abstract types for job and job update
 class Job(BaseModel):
@@ -22,6 +37,7 @@ class Job(BaseModel):
     user_id: str = Field(..., description="User who created the job")
     job_type: JobType = Field(..., description="Type of job")
     status: JobStatus = Field(..., description="Current job status")
+    priority: JobPriority = Field(JobPriority.INTERACTIVE, description="Scheduling class")
     created_at: datetime = Field(..., description="Job creation timestamp")
     modified_at: datetime = Field(..., description="Last update timestamp")
     started_at: Optional[datetime] = Field(None, description="When processing started")
@@ -31,11 +47,14 @@ class Job(BaseModel):
     error: Optional[str] = Field(None, description="Error message if failed")
     webhook_url: Optional[str] = Field(None, description="Webhook URL for notifications")
     parameters: Optional[Dict[str, Any]] = Field(None, description="Parameters for the job")
+    prediction_id: Optional[str] = Field(None, description="Provider prediction awaiting a completion callback")
+    parent_job_id: Optional[str] = Field(None, description="Composite job this job is a shot of")
 
 class JobCreate(BaseModel):
     job_id: str = Field(None, description="Unique job identifier")
     job_type: JobType = Field(..., description="Type of job to create")
     project_id: str = Field(..., description="Project ID that the job is associated with")
+    priority: JobPriority = Field(JobPriority.INTERACTIVE, description="Scheduling class: interactive previews or batch work")
     webhook_url: Optional[str] = Field(None, description="Optional webhook URL for notifications")
     parameters: Optional[Dict[str, Any]] = Field(None, description="Parameters for the job")
 
@@ -46,6 +65,18 @@ class JobUpdate(BaseModel):
     error: Optional[str] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    prediction_id: Optional[str] = None
+
+class JobSearchHit(BaseModel):
+    score: float = Field(..., description="Relevance, or prompt similarity for near-duplicate lookups (higher is better)")
+    job: Job
+
+class JobSearchResults(BaseModel):
+    query: str
+    total: int = Field(..., description="Matching jobs across all pages")
+    limit: int
+    offset: int
+    results: list[JobSearchHit]
 
 class WebhookNotification(BaseModel):
     job_id: str = Field(..., description="Job identifier")
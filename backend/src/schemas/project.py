@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Any, Dict, Optional
 
 class Project(BaseModel):
     project_id: str
@@ -7,3 +8,36 @@ class Project(BaseModel):
     name: str
     created_at: datetime
     modified_at: datetime
+
+class ProjectStats(BaseModel):
+    project_id: str = Field(..., description="Project the aggregates cover")
+    total_jobs: int = Field(0, description="Jobs ever created in the project, including archived ones")
+    counts: Dict[str, int] = Field(default_factory=dict, description="Current (not yet archived) job count by status")
+    asset_bytes: int = Field(0, description="Total size of completed job assets not yet archived")
+    last_activity_at: Optional[datetime] = Field(None, description="Last job creation or status change")
+
+def project_stats_delta(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Counter increments for a job document changing from `before` (None when it is
+    created) to `after` (None when it is deleted), keyed by ProjectStats field
+    ("counts.<status>" for counts). Deletions leave total_jobs alone.
+    """
+    def status(job):
+        return getattr(job["status"], "value", job["status"])
+
+    def asset_bytes(job):
+        return int((job.get("result") or {}).get("size_bytes") or 0)
+
+    delta: Dict[str, int] = {}
+    if before is None:
+        delta["total_jobs"] = 1
+        delta[f"counts.{status(after)}"] = 1
+    elif after is None:
+        delta[f"counts.{status(before)}"] = -1
+    elif status(before) != status(after):
+        delta[f"counts.{status(before)}"] = -1
+        delta[f"counts.{status(after)}"] = 1
+    size_change = (asset_bytes(after) if after else 0) - (asset_bytes(before) if before else 0)
+    if size_change:
+        delta["asset_bytes"] = size_change
+    return delta
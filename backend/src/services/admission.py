@@ -0,0 +1,98 @@
+"""
+Admission control for job creation.
+Requests are checked against the job queue backlog and against per-user and
+global token buckets before anything is written, so overload is shed cheaply
+at the front door instead of slowing every queued job down.
+"""
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.config import config
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens/second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token. Returns 0 on success, otherwise seconds until one is available."""
+        self._refill(time.monotonic())
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def refund(self):
+        self._tokens = min(self.capacity, self._tokens + 1)
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self._tokens >= self.capacity
+
+
+@dataclass
+class Rejection:
+    status_code: int
+    retry_after_seconds: int
+    reason: str
+
+
+class AdmissionController:
+    """Decides whether a new job may be created right now."""
+
+    def __init__(self, backlog: Callable[[], Awaitable[int]]):
+        self._backlog = backlog
+        self._global_bucket = TokenBucket(config.ADMISSION_GLOBAL_RATE_PER_SECOND, config.ADMISSION_GLOBAL_BURST)
+        self._user_buckets: Dict[str, TokenBucket] = {}
+        self._admitted = 0
+        self._rejected: Dict[str, int] = {"backlog": 0, "global_rate": 0, "user_rate": 0}
+
+    def _user_bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            if len(self._user_buckets) >= config.ADMISSION_MAX_TRACKED_USERS:
+                # Full buckets carry no state worth keeping
+                for idle_user in [uid for uid, b in self._user_buckets.items() if b.is_full()]:
+                    del self._user_buckets[idle_user]
+            bucket = self._user_buckets[user_id] = TokenBucket(
+                config.ADMISSION_USER_RATE_PER_SECOND, config.ADMISSION_USER_BURST
+            )
+        return bucket
+
+    async def admit(self, user_id: str) -> Optional[Rejection]:
+        """Return None if the job is admitted, otherwise why it was rejected."""
+        if await self._backlog() >= config.ADMISSION_MAX_BACKLOG:
+            self._rejected["backlog"] += 1
+            return Rejection(503, config.ADMISSION_BACKLOG_RETRY_AFTER_SECONDS, "Job backlog is full")
+
+        user_bucket = self._user_bucket(user_id)
+        wait = user_bucket.try_acquire()
+        if wait:
+            self._rejected["user_rate"] += 1
+            return Rejection(429, math.ceil(wait), "Too many jobs submitted")
+
+        wait = self._global_bucket.try_acquire()
+        if wait:
+            user_bucket.refund()
+            self._rejected["global_rate"] += 1
+            return Rejection(503, math.ceil(wait), "Service is at capacity")
+
+        self._admitted += 1
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "tracked_users": len(self._user_buckets),
+        }
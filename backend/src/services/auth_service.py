@@ -2,14 +2,21 @@
 Simple authentication service for AuthKit integration.
 Provides server-side token validation for AuthKit frontend authentication.
 """
+import asyncio
+import hashlib
 import os
+import time
+from typing import Optional
 from fastapi import HTTPException, Request
 import logging
+import jwt
 from workos import WorkOSClient
+from workos.session import unseal_data
 from fastapi.responses import RedirectResponse
 from src.schemas.user import User
 from src.repositories.base import DatabaseRepository
 from src.config import config
+from src.services.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +30,49 @@ class AuthService:
         self._cookie_password = os.getenv("WORKOS_COOKIE_PASSWORD")
         self._frontend_redirect_url = os.getenv("FRONTEND_REDIRECT_URL")
         self._is_dev = os.getenv("APP_ENV") == "development"
+        # sha256(sealed cookie) -> user_id, each entry expiring with the cookie's access token
+        self._session_cache: TTLCache[str] = TTLCache(
+            config.SESSION_CACHE_MAX_ENTRIES, config.SESSION_CACHE_MAX_TTL_SECONDS
+        )
+        # user_id -> user document
+        self._user_cache: TTLCache[dict] = TTLCache(config.USER_CACHE_MAX_ENTRIES, config.USER_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def _session_key(sealed_session: str) -> str:
+        # Never keep the raw cookie (it contains the refresh token) in memory longer than needed
+        return hashlib.sha256(sealed_session.encode()).hexdigest()
+
+    def _access_token_ttl(self, sealed_session: str) -> float:
+        """Seconds until the session's access token expires, capped by the configured max TTL."""
+        session = unseal_data(sealed_session, self._cookie_password)
+        # Signature was already verified by authenticate(); only the exp claim is needed here
+        claims = jwt.decode(session["access_token"], options={"verify_signature": False})
+        return min(claims["exp"] - time.time(), config.SESSION_CACHE_MAX_TTL_SECONDS)
+
+    def _cache_session(self, session_key: str, sealed_session: str, user_id: str):
+        """Cache a verified session; if its expiry can't be read, it just isn't cached."""
+        try:
+            ttl = self._access_token_ttl(sealed_session)
+        except Exception as e:
+            logger.warning(f"Not caching session of user {user_id}: cannot read access token expiry: {e}")
+            return
+        self._session_cache.set(session_key, user_id, ttl)
+
+    async def _get_user(self, user_id: str, user_repo: DatabaseRepository) -> Optional[User]:
+        user = self._user_cache.get(user_id)
+        if user is None:
+            user = await user_repo.get_by_id(user_id)
+            if user is None:
+                return None
+            self._user_cache.set(user_id, user)
+        return User(**user)
+
+    def invalidate_user(self, user_id: str):
+        """Drop a cached user profile after the user document changes."""
+        self._user_cache.pop(user_id)
+
+    def cache_snapshot(self) -> dict:
+        return {"sessions": self._session_cache.snapshot(), "users": self._user_cache.snapshot()}
 
     async def login(self) -> RedirectResponse:
         """
@@ -45,7 +95,8 @@ class AuthService:
         try:
             code = request.query_params.get("code")
             
-            auth_response = self._auth_client.user_management.authenticate_with_code(
+            auth_response = await asyncio.to_thread(
+                self._auth_client.user_management.authenticate_with_code,
                 code=code,
                 session={"seal_session": True, "cookie_password": self._cookie_password},
             )
@@ -59,6 +110,7 @@ class AuthService:
             )
             
             await user_repo.upsert(user_data.model_dump())
+            self.invalidate_user(user_data.user_id)
             
             # Create redirect response to frontend
             response = RedirectResponse(url=self._frontend_redirect_url, status_code=302)
@@ -81,18 +133,31 @@ class AuthService:
     async def get_current_user_from_cookie(self, request: Request, user_repo: DatabaseRepository) -> User:
         """
         Get the current user from an access token.
+        Verified sessions are cached until their access token expires, so the
+        steady state is two memory lookups.
         """
+        sealed_session = request.cookies.get(config.COOKIE_NAME)
+        session_key = self._session_key(sealed_session) if sealed_session else None
+        if session_key:
+            user_id = self._session_cache.get(session_key)
+            if user_id:
+                user = await self._get_user(user_id, user_repo)
+                if user:
+                    return user
+                raise HTTPException(status_code=401, detail="User not found")
         try:
             session = self._auth_client.user_management.load_sealed_session(
-                sealed_session=request.cookies.get(config.COOKIE_NAME),
+                sealed_session=sealed_session,
                 cookie_password=self._cookie_password,
             )
-            auth_response = session.authenticate()
+            # JWT verification may fetch the signing keys over the network
+            auth_response = await asyncio.to_thread(session.authenticate)
             if auth_response.authenticated:
                 user_id = auth_response.user.id
-                user = await user_repo.get_by_id(user_id)
+                self._cache_session(session_key, sealed_session, user_id)
+                user = await self._get_user(user_id, user_repo)
                 if user:
-                    return User(**user)
+                    return user
                 else:
                     raise HTTPException(status_code=401, detail="User not found")
             elif (
@@ -108,7 +173,7 @@ class AuthService:
                 # If no session, attempt a refresh
                 try:
                     print("Refreshing session")
-                    result = session.refresh()
+                    result = await asyncio.to_thread(session.refresh)
                     if result.authenticated is False:
                         return RedirectResponse(url=f"{self._frontend_redirect_url}", status_code=302)
                     response = RedirectResponse(url=request.url, status_code=302)
@@ -130,8 +195,11 @@ class AuthService:
             raise HTTPException(status_code=401, detail="Invalid token") from e
 
     async def logout(self, request: Request):
+        sealed_session = request.cookies.get(config.COOKIE_NAME)
+        if sealed_session:
+            self._session_cache.pop(self._session_key(sealed_session))
         session = self._auth_client.user_management.load_sealed_session(
-            sealed_session=request.cookies.get(config.COOKIE_NAME),
+            sealed_session=sealed_session,
             cookie_password=self._cookie_password,
         )
         url = session.get_logout_url()
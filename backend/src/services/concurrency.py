@@ -0,0 +1,136 @@
+"""
+AIMD adaptive concurrency limiting for provider calls.
+The limit grows additively while calls are fast and succeed, and is cut
+multiplicatively on throttling (429) or when latency exceeds the target.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, TypeVar
+from src.config import config
+from src.services.resilience import ThrottledProviderError, RetryableProviderError, classify_provider_error
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class AdaptiveConcurrencyLimiter:
+    """Caps in-flight calls to one provider/model with an AIMD-adjusted limit."""
+
+    def __init__(self, name: str, initial_limit: float, min_limit: float, max_limit: float,
+                 latency_target_seconds: float, decrease_factor: float = 0.5):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self._limit = initial_limit
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        # Metrics
+        self._wait_seconds_ewma = 0.0
+        self._max_wait_seconds = 0.0
+        self._throttled = 0
+        self._completed = 0
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    async def acquire(self):
+        """Wait for a slot; FIFO so bursts do not starve earlier callers."""
+        start = time.monotonic()
+        if self._in_flight >= self.limit or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # Slot was handed to us while being cancelled; pass it on
+                    self._in_flight -= 1
+                    self._wake()
+                raise
+        else:
+            self._in_flight += 1
+        waited = time.monotonic() - start
+        self._wait_seconds_ewma = 0.9 * self._wait_seconds_ewma + 0.1 * waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+    def release(self, latency_seconds: float, throttled: bool = False, failed: bool = False):
+        """Return a slot and feed the outcome of the call into the limit."""
+        self._in_flight -= 1
+        self._completed += 1
+        if throttled:
+            self._throttled += 1
+        if throttled or failed or latency_seconds > self.latency_target_seconds:
+            self._decrease()
+        else:
+            # Additive increase: roughly +1 per limit's worth of healthy calls
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+        self._wake()
+
+    def _decrease(self):
+        now = time.monotonic()
+        # One multiplicative cut per latency window, not one per in-flight call that observed it
+        if now - self._last_decrease < self.latency_target_seconds:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        if self.limit != previous:
+            logger.info(f"Concurrency limit for {self.name} reduced {previous} -> {self.limit}")
+
+    def _wake(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def run(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run one provider call inside a slot, classifying its outcome."""
+        await self.acquire()
+        start = time.monotonic()
+        throttled = failed = False
+        try:
+            return await operation()
+        except Exception as e:
+            error = classify_provider_error(e)
+            throttled = isinstance(error, ThrottledProviderError)
+            failed = isinstance(error, RetryableProviderError) and not throttled
+            raise
+        finally:
+            self.release(time.monotonic() - start, throttled=throttled, failed=failed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "wait_seconds_ewma": round(self._wait_seconds_ewma, 4),
+            "max_wait_seconds": round(self._max_wait_seconds, 4),
+            "throttled_calls": self._throttled,
+            "completed_calls": self._completed,
+        }
+
+
+# Limiters are shared by every job calling the same provider/model
+concurrency_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(name: str) -> AdaptiveConcurrencyLimiter:
+    if name not in concurrency_limiters:
+        concurrency_limiters[name] = AdaptiveConcurrencyLimiter(
+            name,
+            initial_limit=config.PROVIDER_CONCURRENCY_INITIAL,
+            min_limit=config.PROVIDER_CONCURRENCY_MIN,
+            max_limit=config.PROVIDER_CONCURRENCY_MAX,
+            latency_target_seconds=config.PROVIDER_LATENCY_TARGET_SECONDS
+        )
+    return concurrency_limiters[name]
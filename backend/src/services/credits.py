@@ -0,0 +1,20 @@
+"""
+Credit pricing for jobs.
+Credits are reserved in the ledger when a job is created, committed when it
+completes and refunded when it fails or is cancelled (see JobService).
+"""
+from typing import Any, Dict, Optional
+from src.config import config
+from src.schemas.job import JobType
+
+
+class InsufficientCreditsError(Exception):
+    """Raised when a user's balance cannot cover a new job."""
+
+
+def job_credit_cost(job_type: JobType, parameters: Optional[Dict[str, Any]]) -> int:
+    """Credits charged for a job; a composite job costs one video per shot."""
+    if job_type == JobType.COMPOSITE:
+        shots = (parameters or {}).get("shots")
+        return config.JOB_CREDIT_COSTS.get(JobType.VIDEO.value, 1) * (len(shots) if isinstance(shots, list) else 1)
+    return config.JOB_CREDIT_COSTS.get(job_type.value, 1)
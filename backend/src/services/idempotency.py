@@ -0,0 +1,84 @@
+"""
+Idempotency keys for job creation.
+A retried POST /api/jobs carrying the same Idempotency-Key returns the job the
+first attempt created instead of starting another generation. Keys are scoped
+per user and bound to a hash of the request body. Completed keys are also cached
+in-process, so a retry normally costs a single job lookup.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+from src.config import config
+from src.repositories.base import IdempotencyKeyRepository
+from src.services.cache import TTLCache
+
+
+class IdempotencyError(Exception):
+    status_code = 400
+
+
+class IdempotencyKeyReusedError(IdempotencyError):
+    """The key was already used for a different request body."""
+    status_code = 422
+
+
+class IdempotencyKeyInFlightError(IdempotencyError):
+    """The original request with this key has not finished yet."""
+    status_code = 409
+
+
+def request_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class IdempotencyService:
+    def __init__(self, repo: IdempotencyKeyRepository):
+        self.repo = repo
+        # scoped key -> (request hash, job id), for completed keys only
+        self._completed: TTLCache[Tuple[str, str]] = TTLCache(
+            config.IDEMPOTENCY_CACHE_MAX_ENTRIES, config.IDEMPOTENCY_CACHE_TTL_SECONDS
+        )
+
+    @staticmethod
+    def _scoped_key(user_id: str, key: str) -> str:
+        return hashlib.sha256(f"{user_id}\0{key}".encode()).hexdigest()
+
+    async def begin(self, user_id: str, key: str, body_hash: str) -> Optional[str]:
+        """
+        Claim `key` for a new request. Returns None if the caller should create
+        the job, or the id of the job an earlier request with this key created.
+        """
+        if not key or len(key) > config.IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise IdempotencyError(
+                f"Idempotency-Key must be between 1 and {config.IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+        scoped_key = self._scoped_key(user_id, key)
+        cached = self._completed.get(scoped_key)
+        if cached is None:
+            record = await self.repo.claim(scoped_key, body_hash, config.IDEMPOTENCY_PENDING_TTL_SECONDS)
+            if record is None:
+                return None
+            cached = (record["request_hash"], record["job_id"])
+            if record["job_id"]:
+                self._completed.set(scoped_key, cached, min(
+                    record["expires_at"] - time.time(), config.IDEMPOTENCY_CACHE_TTL_SECONDS
+                ))
+
+        stored_hash, job_id = cached
+        if stored_hash != body_hash:
+            raise IdempotencyKeyReusedError("Idempotency-Key was already used with a different request body")
+        if job_id is None:
+            raise IdempotencyKeyInFlightError("A request with this Idempotency-Key is still being processed")
+        return job_id
+
+    async def complete(self, user_id: str, key: str, body_hash: str, job_id: str):
+        scoped_key = self._scoped_key(user_id, key)
+        await self.repo.complete(scoped_key, job_id, config.IDEMPOTENCY_KEY_TTL_SECONDS)
+        self._completed.set(scoped_key, (body_hash, job_id))
+
+    async def release(self, user_id: str, key: str):
+        await self.repo.release(self._scoped_key(user_id, key))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._completed.snapshot()
@@ -1,22 +1,80 @@
+import asyncio
 import logging
 import os
-import requests
+import posixpath
+import shutil
+import tempfile
+import aiohttp
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
-from src.repositories.base import FileStorageRepository
+from typing import Dict, Any, Optional, List
+from src.repositories.base import FileStorageRepository, JobQueueRepository
 from src.services.job_service import JobService
-from src.schemas.job import JobType, JobUpdate, JobStatus
+from src.schemas.job import Job, JobCreate, JobType, JobUpdate, JobStatus, TERMINAL_JOB_STATUSES
+from src.media.pool import get_media_pool, run_in_media_pool
+from src.media.interpolate import interpolate_video
+from src.media.faststart import make_faststart
+from src.media.previews import extract_previews
+from src.media.splat_lod import lod_chunk_filename, package_splat_lods
+from src.media.stitch import concat_videos
 from src.config import config
-import replicate
+from src.services.resilience import call_with_retry, get_circuit_breaker
+from src.services.concurrency import get_concurrency_limiter
+from src.providers.base import GenerationProvider, ProviderPrediction
+from replicate.prediction import Prediction
 
 logger = logging.getLogger(__name__)
 
+# Job progress milestones; provider progress is mapped between submitted and generated
+PROGRESS_SUBMITTED = 5.0
+PROGRESS_GENERATED = 90.0
+# Progressive mode: the draft render covers submitted..draft-ready, the final render the rest
+PROGRESS_DRAFT_READY = 40.0
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class JobCancelledError(Exception):
+    """Raised at a cancellation point once a job has been cancelled."""
+
+
+def interpolation_factor(parameters: Optional[Dict[str, Any]]) -> int:
+    """
+    The job's frame interpolation factor (parameters.interpolation_factor, 1 = off),
+    capped at VIDEO_INTERPOLATION_MAX_FACTOR. Raises ValueError unless it is an integer >= 1.
+    """
+    factor = (parameters or {}).get("interpolation_factor", config.VIDEO_INTERPOLATION_FACTOR)
+    if isinstance(factor, float) and factor.is_integer():
+        factor = int(factor)
+    if isinstance(factor, bool) or not isinstance(factor, int) or factor < 1:
+        raise ValueError(f"interpolation_factor must be an integer >= 1, got {factor!r}")
+    return min(factor, config.VIDEO_INTERPOLATION_MAX_FACTOR)
+
+
+def _seconds_since(moment: datetime) -> float:
+    # Firestore returns timezone-aware datetimes, the in-memory repository naive ones
+    return (datetime.now(moment.tzinfo) - moment).total_seconds()
+
+
+def completion_entry(job: Job) -> Dict[str, Any]:
+    """Queue entry asking a worker to finish a handed-off job from its completed prediction."""
+    return {**job.model_dump(mode="json"), "completes_prediction": job.prediction_id}
+
+
 class JobProcessor:
-    def __init__(self, job_service: JobService, file_storage: FileStorageRepository):
+    def __init__(self, job_service: JobService, file_storage: FileStorageRepository, provider: GenerationProvider,
+                 job_queue: Optional[JobQueueRepository] = None, callback_base_url: Optional[str] = None):
         self.job_service = job_service
         self.file_storage = file_storage
+        self.provider = provider
+        # Set in callback mode: predictions are submitted with a webhook, and their callback queues the job's completion
+        self.callback_base_url = (callback_base_url or config.PROVIDER_CALLBACK_BASE_URL or "").rstrip("/") or None
+        # Where composite jobs send their shots; without one, shots run as tasks in this process
+        self.job_queue = job_queue
+        self.provider_breaker = get_circuit_breaker(config.REPLICATE_VIDEO_MODEL_ID)
+        self.provider_limiter = get_concurrency_limiter(config.REPLICATE_VIDEO_MODEL_ID)
         self.assets_dir = Path("assets")  # Directory for temporary asset files
+        # Cancellation requests for jobs handled by this process
+        self._cancel_events: Dict[str, asyncio.Event] = {}
         
     async def process_3d_asset_job(self, job_id: str, parameters: Dict[str, Any]):
         """Process a 3D asset generation job."""
@@ -33,26 +91,18 @@ class JobProcessor:
                 raise ValueError(f"Job {job_id} failed: prompt is required")
             logger.info(f"Starting 3D asset generation for job {job_id} with prompt: {prompt}")
             
-            output_filename = f"{job_id}.{parameters.get('file_type')}"
+            source_path = await self.provider.generate_object(job_id, parameters)
+            file_type = parameters.get('file_type') or source_path.suffix.lstrip('.')
+            output_filename = f"{job_id}.{file_type}"
             output_path = self.assets_dir / output_filename
-            
-            # TODO: Add actual 3D generation here
-            # For now, use an example K-Splat file
-            truck_ksplat_path = self.assets_dir / "ksplat" / "truck.ksplat"
-            if truck_ksplat_path.exists():
-                with open(truck_ksplat_path, 'rb') as f:
-                    file_content = f.read()
-                logger.info(f"Using truck K-Splat file: {truck_ksplat_path}")
-            else:
-                # Fallback to placeholder if example file doesn't exist
-                logger.warning(f"Truck K-Splat file not found, using placeholder content for {output_filename}")
-                raise FileNotFoundError(f"Truck K-Splat file not found: {truck_ksplat_path}")
+
+            self._check_cancelled(job_id)
 
             # Upload the generated asset to Firebase Storage
             storage_path = f"assets/{job_id}/{output_filename}"
             
-            upload_result = await self.file_storage.upload_bytes(
-                file_content, 
+            upload_result = await self.file_storage.upload_file(
+                str(source_path), 
                 storage_path, 
                 content_type="application/octet-stream"
             )
@@ -71,8 +121,10 @@ class JobProcessor:
                 "filename": output_filename,
                 "storage_path": storage_path,
                 "signed_url": signed_url,
-                "asset_id": job_id
+                "asset_id": job_id,
+                "size_bytes": os.path.getsize(source_path)
             } 
+            result.update(await self._package_splat_lods(job_id, source_path))
             await self.job_service.update_job(job_id, JobUpdate(
                 status=JobStatus.COMPLETED,
                 completed_at=datetime.now(),
@@ -82,6 +134,8 @@ class JobProcessor:
             
             logger.info(f"Job {job_id} completed successfully")
             
+        except JobCancelledError:
+            await self._mark_cancelled(job_id)
         except Exception as e:
             logger.error(f"Job {job_id} failed: {e}")
             await self.job_service.update_job(job_id, JobUpdate(
@@ -103,98 +157,555 @@ class JobProcessor:
             prompt = parameters.get("prompt")
             if not prompt:
                 raise ValueError(f"Job {job_id} failed: prompt is required")
+            # Checked before paying for generation, not when post-processing its output
+            try:
+                interpolation_factor(parameters)
+            except ValueError as e:
+                raise ValueError(f"Job {job_id} failed: {e}") from e
             logger.info(f"Starting video generation for job {job_id} with prompt: {prompt}")
 
-            # Define storage paths (moved outside the if/else blocks)
             storage_path = f"assets/{job_id}/video.mp4"
-            output_filename = f"{job_id}.mp4"
-            replicate_video_url = ""
 
             # TODO: Customize the video generation parameters
-            if os.getenv("REPLICATE_API_TOKEN"):
-                output = replicate.run(
-                    config.REPLICATE_VIDEO_MODEL_ID,  # Use the model ID from config
-                    input={
-                        "prompt": prompt,
-                        "go_fast": True,
-                        "num_frames": 81,
-                        "resolution": "480p",
-                        "aspect_ratio": "16:9",
-                        "sample_shift": 12,
-                        "frames_per_second": 16
-                    } 
-                )
+            if self.provider.supports(JobType.VIDEO):
+                model_input = {
+                    "prompt": prompt,
+                    "go_fast": True,
+                    "num_frames": 81,
+                    "resolution": "480p",
+                    "aspect_ratio": "16:9",
+                    "sample_shift": 12,
+                    "frames_per_second": 16
+                }
+                render_mode = parameters.get("render_mode", "standard")
+                if render_mode not in ("standard", "draft", "progressive"):
+                    raise ValueError(f"Job {job_id} failed: unknown render_mode {render_mode!r}")
+                if render_mode == "draft":
+                    model_input.update(config.VIDEO_DRAFT_INPUT)
+                progress_start = PROGRESS_SUBMITTED
 
-                # Get the direct URL from Replicate output
-                logger.info(f"Replicate output type: {type(output)}")
-                logger.info(f"Replicate output: {output}")
-                
-                if hasattr(output, 'url'):
-                    url_attr = output.url
-                    replicate_video_url = url_attr() if callable(url_attr) else url_attr
-                    logger.info(f"Extracted URL from FileOutput: {replicate_video_url}")
-                else:
-                    replicate_video_url = str(output)
-                    logger.info(f"Using output as string URL: {replicate_video_url}")
-                
-                # Clear the output variable to prevent any accidental storage
-                del output
-                response = requests.get(replicate_video_url)
-                response.raise_for_status()
-                
-                video_content = response.content
+                # Park new work while the provider is unhealthy instead of piling onto it
+                await self.provider_breaker.wait_until_available(config.PROVIDER_PARK_TIMEOUT_SECONDS)
+                self._check_cancelled(job_id)
+                if render_mode == "progressive":
+                    # Show a fast draft first, then continue to the full-quality render
+                    await self._publish_draft(job_id, {**model_input, **config.VIDEO_DRAFT_INPUT})
+                    model_input.update(config.VIDEO_FINAL_INPUT)
+                    progress_start = PROGRESS_DRAFT_READY
+                if self.callback_base_url:
+                    # Hand the prediction off to the provider; its callback queues the job for completion
+                    await self._submit_video_prediction(job_id, model_input, progress_start)
+                    return
+                output = await self._run_video_prediction(job_id, model_input, progress_start)
+                await self.complete_video_job(job_id, output)
+                return
+
+            # Use an existing video from our bucket as backup
+            backup_video_path = "assets/134a3dd8-66e4-4561-ac42-4391585e7cf1/video.mp4"
+            logger.info(f"Using backup video from bucket: {backup_video_path}")
             
-            else: 
-                # Use an existing video from our bucket as backup
-                backup_video_path = "assets/134a3dd8-66e4-4561-ac42-4391585e7cf1/video.mp4"
-                logger.info(f"Using backup video from bucket: {backup_video_path}")
-                
-                # Check if the backup video exists
-                if await self.file_storage.file_exists(backup_video_path):
-                    # Download the backup video from our storage
-                    temp_file = f"/tmp/backup_{job_id}.mp4"
-                    if await self.file_storage.download_file(backup_video_path, temp_file):
-                        with open(temp_file, 'rb') as f:
-                            video_content = f.read()
-                        # Clean up temp file
-                        os.remove(temp_file)
-                    else:
-                        raise ValueError(f"Failed to download backup video from {backup_video_path}")
+            # Check if the backup video exists
+            if await self.file_storage.file_exists(backup_video_path):
+                # Download the backup video from our storage
+                temp_file = f"/tmp/backup_{job_id}.mp4"
+                if await self.file_storage.download_file(backup_video_path, temp_file):
+                    with open(temp_file, 'rb') as f:
+                        video_content = f.read()
+                    # Clean up temp file
+                    os.remove(temp_file)
                 else:
-                    # If backup doesn't exist, create a simple placeholder
-                    logger.warning(f"Backup video not found at {backup_video_path}, creating placeholder")
-                    video_content = b'\x00' * 1024
+                    raise ValueError(f"Failed to download backup video from {backup_video_path}")
+            else:
+                # If backup doesn't exist, create a simple placeholder
+                logger.warning(f"Backup video not found at {backup_video_path}, creating placeholder")
+                video_content = b'\x00' * 1024
+
+            self._check_cancelled(job_id)
 
-            # Upload the video content to our storage (for both Replicate and backup flows)
+            # Upload the video content to our storage
             upload_result = await self.file_storage.upload_bytes(
                 video_content, 
                 storage_path, 
                 content_type="video/mp4"
             )
-
-            # Generate signed URL for the uploaded video
-            signed_url = await self.file_storage.generate_download_url(storage_path, 86400)  # 24 hours
-            print(f"✅ Generated signed URL: {signed_url[:100]}...")  # Show first 100 chars
+            await self._publish_video_result(job_id, storage_path, "", extra_result={"size_bytes": len(video_content)})
             
-            # Ensure all result values are serializable strings
-            result = { 
-                "filename": str(output_filename),
-                "storage_path": str(storage_path),
-                "signed_url": str(signed_url),
-                "replicate_url": str(replicate_video_url),  # Keep the original Replicate URL as backup
-                "asset_id": str(job_id)
+        except JobCancelledError:
+            await self._mark_cancelled(job_id)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self.job_service.update_job(job_id, JobUpdate(
+                status=JobStatus.FAILED,
+                completed_at=datetime.now(),
+                error=str(e)
+            ))
+
+    async def _publish_draft(self, job_id: str, model_input: Dict[str, Any]):
+        """
+        Render and store the draft of a progressive job, then publish it as an
+        intermediate result (via the job update stream) while the job keeps processing.
+        """
+        output = await self._run_video_prediction(job_id, model_input, PROGRESS_SUBMITTED, PROGRESS_DRAFT_READY)
+        storage_path = f"assets/{job_id}/draft.mp4"
+        with tempfile.TemporaryDirectory(prefix=f"{job_id}_") as work_dir:
+            video_path = os.path.join(work_dir, "draft.mp4")
+            await self._fetch_provider_video(job_id, output, video_path)
+            await self._make_faststart(job_id, video_path)
+            await self.file_storage.upload_file(video_path, storage_path, content_type="video/mp4")
+        draft = {
+            "storage_path": storage_path,
+            "signed_url": await self.file_storage.generate_download_url(storage_path, 86400),  # 24 hours
+            "resolution": model_input.get("resolution"),
+            "num_frames": model_input.get("num_frames"),
+        }
+        await self.job_service.update_job(job_id, JobUpdate(
+            progress=PROGRESS_DRAFT_READY,
+            result={"draft": draft}
+        ))
+        logger.info(f"Published draft for job {job_id}")
+
+    async def complete_video_job(self, job_id: str, output: Any):
+        """
+        Finish a video job from a provider output: stream the video to a temp file,
+        upload it to our storage and mark the job completed.
+        Shared by the polling path and the provider callback.
+        """
+        storage_path = f"assets/{job_id}/video.mp4"
+        with tempfile.TemporaryDirectory(prefix=f"{job_id}_") as work_dir:
+            video_path = os.path.join(work_dir, "video.mp4")
+            replicate_video_url = await self._fetch_provider_video(job_id, output, video_path)
+            extra_result = await self._interpolate_frames(job_id, video_path, work_dir)
+            await self._make_faststart(job_id, video_path)
+            await self.file_storage.upload_file(video_path, storage_path, content_type="video/mp4")
+            extra_result["size_bytes"] = os.path.getsize(video_path)
+            extra_result.update(await self._generate_previews(job_id, video_path, work_dir))
+        await self._publish_video_result(job_id, storage_path, replicate_video_url, extra_result=extra_result)
+
+    async def _fetch_provider_video(self, job_id: str, output: Any, destination: str) -> str:
+        """Stream a provider output video to a local file. Returns the provider URL."""
+        # Get the direct URL from Replicate output
+        logger.info(f"Replicate output type: {type(output)}")
+        logger.info(f"Replicate output: {output}")
+
+        if isinstance(output, list):
+            output = output[0] if output else ""
+        if hasattr(output, 'url'):
+            url_attr = output.url
+            replicate_video_url = url_attr() if callable(url_attr) else url_attr
+            logger.info(f"Extracted URL from FileOutput: {replicate_video_url}")
+        else:
+            replicate_video_url = str(output)
+            logger.info(f"Using output as string URL: {replicate_video_url}")
+        if not replicate_video_url:
+            raise ValueError(f"Job {job_id} failed: provider returned no output")
+
+        size = await call_with_retry(
+            lambda: self._download_to_file(replicate_video_url, destination, job_id),
+            self.provider_breaker
+        )
+        logger.info(f"Downloaded {size} bytes for job {job_id}")
+        self._check_cancelled(job_id)
+        return replicate_video_url
+
+    async def _package_splat_lods(self, job_id: str, source_path: Path) -> Dict[str, Any]:
+        """
+        Split a .splat or .ksplat scene into importance-ordered .splat LOD chunks plus a
+        manifest, uploaded under assets/{job_id}/lod/, so viewers can stream it coarse-to-fine.
+        The monolithic asset stays available; packaging failures leave it as the only output.
+        """
+        if source_path.suffix not in (".splat", ".ksplat"):
+            return {}
+        try:
+            with tempfile.TemporaryDirectory(prefix=f"{job_id}_lod_") as work_dir:
+                manifest = await run_in_media_pool(
+                    package_splat_lods, str(source_path), work_dir,
+                    config.SPLAT_LOD_FIRST_CHUNK_SPLATS, config.SPLAT_LOD_GROWTH_FACTOR
+                )
+                self._check_cancelled(job_id)
+                lod_prefix = f"assets/{job_id}/lod"
+                chunk_urls = []
+                for chunk in manifest["chunks"]:
+                    chunk_path = f"{lod_prefix}/{chunk['filename']}"
+                    await self.file_storage.upload_file(
+                        os.path.join(work_dir, chunk["filename"]), chunk_path, content_type="application/octet-stream"
+                    )
+                    chunk_urls.append(await self.file_storage.generate_download_url(chunk_path, 86400))  # 24 hours
+                manifest_path = f"{lod_prefix}/manifest.json"
+                await self.file_storage.upload_file(
+                    os.path.join(work_dir, "manifest.json"), manifest_path, content_type="application/json"
+                )
+        except JobCancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"LOD packaging failed for job {job_id}: {e}")
+            return {}
+        logger.info(f"Packaged {manifest['splat_count']} splats into {len(chunk_urls)} LOD chunks for job {job_id}")
+        return {
+            "lod": {
+                "manifest_path": manifest_path,
+                "manifest_url": await self.file_storage.generate_download_url(manifest_path, 86400),  # 24 hours
+                # Signed in chunk order; the manifest itself only holds file names
+                "chunk_urls": chunk_urls,
             }
-            
-            logger.info(f"Job result: {result}")
-            logger.info(f"Result types: {[(k, type(v)) for k, v in result.items()]}") 
+        }
+
+    async def _interpolate_frames(self, job_id: str, video_path: str, work_dir: str) -> Dict[str, Any]:
+        """
+        Raise the frame rate of a downloaded video in place when the job asks for it
+        (parameters.interpolation_factor, e.g. 2 for 16 -> 32 fps). Returns result fields.
+        """
+        job = await self.job_service.get_job_by_id(job_id)
+        interpolated_path = os.path.join(work_dir, "interpolated.mp4")
+        try:
+            factor = interpolation_factor(job.parameters if job else None)
+            if factor < 2:
+                return {}
+            # Decode/encode loop in a thread; the optical flow itself runs in the media pool
+            stats = await asyncio.to_thread(
+                interpolate_video, video_path, interpolated_path, factor, get_media_pool(),
+                config.VIDEO_INTERPOLATION_CHUNK_FRAMES
+            )
+        except Exception as e:
+            logger.warning(f"Frame interpolation failed for job {job_id}, keeping the original: {e}")
+            return {}
+        os.replace(interpolated_path, video_path)
+        logger.info(f"Interpolated video for job {job_id}: {stats}")
+        self._check_cancelled(job_id)
+        return {"frame_interpolation": stats}
+
+    async def _make_faststart(self, job_id: str, video_path: str):
+        """Move the MP4 index to the front so signed URLs start playing before the download finishes."""
+        try:
+            if await run_in_media_pool(make_faststart, video_path):
+                logger.info(f"Remuxed video for job {job_id} for fast start")
+        except Exception as e:
+            # Playback still works, it just has to download the whole file first
+            logger.warning(f"Fast-start remux failed for job {job_id}: {e}")
+
+    async def _generate_previews(self, job_id: str, video_path: str, work_dir: str) -> Dict[str, Any]:
+        """
+        Extract a poster frame and thumbnail sprite in the media pool and upload them
+        next to the video. Previews are best effort: failures leave them out of the result.
+        """
+        poster_path = os.path.join(work_dir, "poster.jpg")
+        sprite_path = os.path.join(work_dir, "sprite.jpg")
+        try:
+            sprite = await run_in_media_pool(
+                extract_previews, video_path, poster_path, sprite_path,
+                config.PREVIEW_SPRITE_COLUMNS, config.PREVIEW_SPRITE_ROWS, config.PREVIEW_THUMB_WIDTH,
+                config.PREVIEW_POSTER_POSITION
+            )
+            previews = {"sprite": sprite}
+            for name, local_path in (("poster", poster_path), ("sprite", sprite_path)):
+                storage_path = f"assets/{job_id}/{name}.jpg"
+                await self.file_storage.upload_file(local_path, storage_path, content_type="image/jpeg")
+                previews[f"{name}_path"] = storage_path
+                previews[f"{name}_url"] = await self.file_storage.generate_download_url(storage_path, 86400)  # 24 hours
+            return previews
+        except Exception as e:
+            logger.warning(f"Failed to generate previews for job {job_id}: {e}")
+            return {}
 
+    async def _publish_video_result(self, job_id: str, storage_path: str, replicate_video_url: str,
+                                    extra_result: Optional[Dict[str, Any]] = None):
+        """Sign the uploaded video and mark the job completed."""
+        self._check_cancelled(job_id)
+        output_filename = f"{job_id}.mp4"
+
+        # Generate signed URL for the uploaded video
+        signed_url = await self.file_storage.generate_download_url(storage_path, 86400)  # 24 hours
+        print(f"✅ Generated signed URL: {signed_url[:100]}...")  # Show first 100 chars
+        
+        # Ensure all result values are serializable strings
+        result = { 
+            "filename": str(output_filename),
+            "storage_path": str(storage_path),
+            "signed_url": str(signed_url),
+            "replicate_url": str(replicate_video_url),  # Keep the original Replicate URL as backup
+            "asset_id": str(job_id)
+        }
+        result.update(extra_result or {})
+        # Progressive jobs keep their draft next to the final rendition
+        job = await self.job_service.get_job_by_id(job_id)
+        draft = (job.result or {}).get("draft") if job else None
+        if draft:
+            result["draft"] = draft
+            result["renditions"] = {
+                "draft": draft,
+                "final": {"storage_path": result["storage_path"], "signed_url": result["signed_url"]},
+            }
+        
+        logger.info(f"Job result: {result}")
+
+        await self.job_service.update_job(job_id, JobUpdate(
+            status=JobStatus.COMPLETED,
+            completed_at=datetime.now(),
+            progress=100.0,
+            result=result
+        ))
+
+    async def process_composite_job(self, job_id: str, parameters: Dict[str, Any]):
+        """
+        Process a multi-shot video job.
+        Each entry of parameters["shots"] becomes a child VIDEO job (other parameters are
+        shared by every shot) with this job's user and priority. The children go
+        through the job queue like any other job, their progress is aggregated into
+        this job, and the finished shots are concatenated in order.
+        """
+        children: List[Job] = []
+        try:
             await self.job_service.update_job(job_id, JobUpdate(
-                status=JobStatus.COMPLETED,
+                status=JobStatus.PROCESSING,
+                started_at=datetime.now(),
+                progress=0.0
+            ))
+
+            shots = parameters.get("shots")
+            if not isinstance(shots, list) or not shots:
+                raise ValueError(f"Job {job_id} failed: shots must be a non-empty list")
+            if len(shots) > config.COMPOSITE_MAX_SHOTS:
+                raise ValueError(f"Job {job_id} failed: at most {config.COMPOSITE_MAX_SHOTS} shots are supported")
+            logger.info(f"Starting composite job {job_id} with {len(shots)} shots")
+
+            children = await self._create_shot_jobs(job_id, parameters)
+            # Shots already handed to the provider finish through its callback
+            pending = [child for child in children
+                       if child.status not in TERMINAL_JOB_STATUSES and not child.prediction_id]
+            runs = []
+            if self.job_queue:
+                for child in pending:
+                    await self.job_queue.enqueue(child.model_dump(mode="json"))
+            else:
+                runs = [asyncio.create_task(self.process_job(JobType.VIDEO, child.job_id, child.parameters))
+                        for child in pending]
+            try:
+                children = await self._await_shot_jobs(job_id, children)
+            finally:
+                for run in runs:
+                    run.cancel()
+                await asyncio.gather(*runs, return_exceptions=True)
+
+            await self._stitch_shots(job_id, children)
+
+        except JobCancelledError:
+            await self._cancel_shot_jobs(children)
+            await self._mark_cancelled(job_id)
+        except asyncio.CancelledError:
+            # Deadline or shutdown: don't leave shots running without a parent
+            await self._cancel_shot_jobs(children)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self._cancel_shot_jobs(children)
+            await self.job_service.update_job(job_id, JobUpdate(
+                status=JobStatus.FAILED,
                 completed_at=datetime.now(),
-                progress=100.0,
-                result=result
+                error=str(e)
             ))
-            
+
+    async def _create_shot_jobs(self, job_id: str, parameters: Dict[str, Any]) -> List[Job]:
+        """Create one VIDEO job per shot, reusing children from an earlier attempt at this job."""
+        existing = await self.job_service.get_child_jobs(job_id)
+        if existing:
+            return existing
+
+        parent = await self.job_service.get_job_by_id(job_id)
+        shared = {key: value for key, value in parameters.items() if key != "shots"}
+        children = []
+        for index, shot in enumerate(parameters["shots"]):
+            shot_parameters = {**shared, **(shot if isinstance(shot, dict) else {"prompt": shot}), "shot_index": index}
+            children.append(await self.job_service.create_job(
+                JobCreate(
+                    job_type=JobType.VIDEO,
+                    project_id=parent.project_id,
+                    priority=parent.priority,
+                    parameters=shot_parameters
+                ),
+                user_id=parent.user_id,
+                parent_job_id=job_id
+            ))
+        return children
+
+    async def _await_shot_jobs(self, job_id: str, children: List[Job]) -> List[Job]:
+        """
+        Wait for every shot to complete, mirroring their mean progress onto the parent.
+        Reads shot state from the database, since callbacks may finish shots in another process.
+        """
+        last_progress = None
+        while True:
+            children = [await self.job_service.get_job_by_id(child.job_id) for child in children]
+            for index, child in enumerate(children):
+                # Archived or deleted while the composite was waiting on it
+                if child is None:
+                    raise ValueError(f"Shot {index} is missing")
+                if child.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                    raise ValueError(f"Shot {index} {child.status.value}: {child.error or 'no error reported'}")
+            if all(child.status == JobStatus.COMPLETED for child in children):
+                return children
+
+            shot_progress = sum(
+                100.0 if child.status == JobStatus.COMPLETED else (child.progress or 0.0) for child in children
+            ) / len(children)
+            progress = round(shot_progress * PROGRESS_GENERATED / 100.0, 1)
+            if progress != last_progress:
+                await self.job_service.update_job(job_id, JobUpdate(progress=progress))
+                last_progress = progress
+            await self._wait_cancellable(job_id, config.COMPOSITE_PROGRESS_POLL_INTERVAL_SECONDS)
+
+    async def _stitch_shots(self, job_id: str, children: List[Job]):
+        """Download the finished shots, concatenate them in the media pool and publish the result."""
+        storage_path = f"assets/{job_id}/video.mp4"
+        with tempfile.TemporaryDirectory(prefix=f"{job_id}_") as work_dir:
+            shot_paths = []
+            for index, child in enumerate(children):
+                shot_path = os.path.join(work_dir, f"shot_{index:03d}.mp4")
+                if not await self.file_storage.download_file(child.result["storage_path"], shot_path):
+                    raise ValueError(f"Job {job_id} failed: could not download shot {index}")
+                shot_paths.append(shot_path)
+            self._check_cancelled(job_id)
+
+            output_path = os.path.join(work_dir, "video.mp4")
+            stats = await run_in_media_pool(concat_videos, shot_paths, output_path)
+            logger.info(f"Stitched {len(shot_paths)} shots for job {job_id}: {stats}")
+            self._check_cancelled(job_id)
+            await self._make_faststart(job_id, output_path)
+            await self.file_storage.upload_file(output_path, storage_path, content_type="video/mp4")
+            size_bytes = os.path.getsize(output_path)
+            previews = await self._generate_previews(job_id, output_path, work_dir)
+
+        await self._publish_video_result(job_id, storage_path, "", extra_result={
+            "shots": [
+                {"job_id": child.job_id, "storage_path": child.result["storage_path"]} for child in children
+            ],
+            "frames": stats["frames"],
+            "size_bytes": size_bytes,
+            **previews,
+        })
+
+    async def _cancel_shot_jobs(self, children: List[Job]):
+        for child in children:
+            try:
+                current = await self.job_service.get_job_by_id(child.job_id)
+                if current is None or current.status in TERMINAL_JOB_STATUSES:
+                    continue
+                await self.job_service.update_job(child.job_id, JobUpdate(
+                    status=JobStatus.CANCELLED,
+                    completed_at=datetime.now()
+                ))
+                await self.cancel_job(child.job_id, current.prediction_id)
+            except Exception as e:
+                logger.warning(f"Failed to cancel shot job {child.job_id}: {e}")
+
+    async def _download_to_file(self, url: str, destination: str, job_id: str) -> int:
+        """Stream a provider output to disk in chunks instead of buffering it in memory."""
+        if url.startswith("file://"):
+            # Local provider outputs (fake provider), only from the provider's own directory
+            path = os.path.realpath(url[len("file://"):])
+            output_dir = self.provider.local_output_dir
+            if not output_dir or os.path.commonpath([path, os.path.realpath(output_dir)]) != os.path.realpath(output_dir):
+                raise ValueError(f"Refusing to read {url}: not in the provider's output directory")
+            shutil.copyfile(path, destination)
+            return os.path.getsize(destination)
+
+        size = 0
+        timeout = aiohttp.ClientTimeout(
+            total=config.DOWNLOAD_TIMEOUT_SECONDS,
+            sock_connect=config.DOWNLOAD_CONNECT_TIMEOUT_SECONDS,
+            sock_read=config.DOWNLOAD_READ_TIMEOUT_SECONDS
+        )
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                with open(destination, "wb") as f:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        self._check_cancelled(job_id)
+                        f.write(chunk)
+                        size += len(chunk)
+        return size
+
+    async def _submit_video_prediction(self, job_id: str, model_input: Dict[str, Any],
+                                       progress_start: float = PROGRESS_SUBMITTED):
+        """
+        Submit a prediction with a callback URL and release the worker.
+        The prediction id is recorded on the job so the callback can be matched to it.
+        """
+        callback_url = f"{self.callback_base_url}/api/webhooks/replicate/{job_id}"
+        prediction = await call_with_retry(
+            lambda: self.provider.create_video_prediction(
+                model_input,
+                webhook=callback_url,
+                webhook_events_filter=["logs", "completed"]
+            ),
+            self.provider_breaker,
+            self.provider_limiter
+        )
+        logger.info(f"Submitted prediction {prediction.id} for job {job_id} with callback {callback_url}")
+        await self.job_service.update_job(job_id, JobUpdate(
+            prediction_id=prediction.id,
+            progress=progress_start
+        ))
+
+    async def record_prediction_callback(self, job_id: str, payload: Dict[str, Any]) -> Optional[Job]:
+        """
+        Record a provider callback for a handed-off job. Progress events update the
+        job; for a finished prediction the job is returned, to be queued for a worker
+        to complete (see complete_prediction). Duplicate or stale deliveries are ignored.
+        """
+        prediction = ProviderPrediction.from_dict(payload)
+        job = await self.job_service.get_job_by_id(job_id)
+        if not job:
+            logger.warning(f"Callback for unknown job {job_id}")
+            return None
+        if job.prediction_id != prediction.id:
+            logger.warning(f"Callback for job {job_id} has prediction {prediction.id}, expected {job.prediction_id}")
+            return None
+        if job.status in TERMINAL_JOB_STATUSES:
+            logger.info(f"Ignoring callback for finished job {job_id}")
+            return None
+        if prediction.done:
+            return job
+
+        progress = self._handed_off_progress(job, prediction)
+        if int(progress) > int(job.progress or 0):
+            await self.job_service.update_job(job_id, JobUpdate(progress=round(progress, 1)))
+        return None
+
+    async def complete_prediction(self, job: Job):
+        """
+        Finish a handed-off job from its prediction: download, upload and complete
+        it, or fail it if the prediction failed. Run by a worker for a queued
+        completion. The worker's reaper also queues jobs whose callbacks went quiet;
+        a prediction still running then has its progress recorded, and is cancelled
+        and the job failed once past the job's deadline or stalled.
+        """
+        job_id, prediction_id = job.job_id, job.prediction_id
+        try:
+            # Download what the provider reports, never URLs taken from a callback body
+            prediction = await call_with_retry(
+                lambda: self.provider.get_prediction(prediction_id),
+                self.provider_breaker,
+                self.provider_limiter
+            )
+            if not prediction.done:
+                deadline = config.JOB_DEADLINE_SECONDS.get(job.job_type.value)
+                progress = self._handed_off_progress(job, prediction)
+                if deadline and _seconds_since(job.started_at or job.created_at) > deadline:
+                    error = f"Job exceeded its {deadline:.0f}s deadline"
+                elif int(progress) > int(job.progress or 0):
+                    await self.job_service.update_job(job_id, JobUpdate(progress=round(progress, 1)))
+                    return
+                elif _seconds_since(job.modified_at) > config.PREDICTION_STALL_TIMEOUT_SECONDS:
+                    error = f"Prediction {prediction_id} made no progress for {config.PREDICTION_STALL_TIMEOUT_SECONDS:.0f}s"
+                else:
+                    return
+                await self._cancel_prediction(prediction)
+                raise RuntimeError(error)
+            if prediction.status != "succeeded":
+                raise RuntimeError(f"Prediction {prediction_id} {prediction.status}: {prediction.error}")
+            await self.job_service.update_job(job_id, JobUpdate(progress=PROGRESS_GENERATED))
+            await self.complete_video_job(job_id, prediction.output)
+        except JobCancelledError:
+            await self._mark_cancelled(job_id)
         except Exception as e:
             logger.error(f"Job {job_id} failed: {e}")
             await self.job_service.update_job(job_id, JobUpdate(
@@ -202,18 +713,239 @@ class JobProcessor:
                 completed_at=datetime.now(),
                 error=str(e)
             ))
-    
+
+    def _handed_off_progress(self, job: Job, prediction: ProviderPrediction) -> float:
+        # A progressive job's final render continues from where its draft left off
+        progress_start = PROGRESS_DRAFT_READY if (job.result or {}).get("draft") else PROGRESS_SUBMITTED
+        return self._map_prediction_progress(prediction.status, prediction.logs, progress_start)
+
+    async def _run_video_prediction(self, job_id: str, model_input: Dict[str, Any],
+                                    progress_start: float = PROGRESS_SUBMITTED,
+                                    progress_end: float = PROGRESS_GENERATED) -> Any:
+        """
+        Create a provider prediction and poll it until it finishes.
+        Provider progress is mapped onto the job's progress, and the prediction
+        is cancelled when the job is cancelled, hits its deadline or stops
+        reporting progress.
+        """
+        loop = asyncio.get_running_loop()
+        prediction = await call_with_retry(
+            lambda: self.provider.create_video_prediction(model_input),
+            self.provider_breaker,
+            self.provider_limiter
+        )
+        logger.info(f"Created prediction {prediction.id} for job {job_id}")
+
+        last_change = loop.time()
+        last_seen = (prediction.status, len(prediction.logs or ""))
+        reported_progress = progress_start
+        await self.job_service.update_job(job_id, JobUpdate(progress=reported_progress))
+
+        try:
+            while not prediction.done:
+                if loop.time() - last_change > config.PREDICTION_STALL_TIMEOUT_SECONDS:
+                    raise TimeoutError(
+                        f"Prediction {prediction.id} made no progress for {config.PREDICTION_STALL_TIMEOUT_SECONDS:.0f}s"
+                    )
+
+                await self._wait_cancellable(job_id, config.REPLICATE_POLL_INTERVAL_SECONDS)
+                prediction = await call_with_retry(
+                    lambda: self.provider.get_prediction(prediction.id),
+                    self.provider_breaker,
+                    self.provider_limiter
+                )
+
+                seen = (prediction.status, len(prediction.logs or ""))
+                if seen != last_seen:
+                    last_seen = seen
+                    last_change = loop.time()
+
+                progress = self._map_prediction_progress(prediction.status, prediction.logs, progress_start, progress_end)
+                # Only write when the integer percentage moves to avoid a Firestore write per poll
+                if int(progress) > int(reported_progress):
+                    reported_progress = progress
+                    await self.job_service.update_job(job_id, JobUpdate(progress=round(progress, 1)))
+        except (asyncio.CancelledError, TimeoutError, JobCancelledError):
+            await self._cancel_prediction(prediction)
+            raise
+
+        if prediction.status != "succeeded":
+            raise RuntimeError(f"Prediction {prediction.id} {prediction.status}: {prediction.error}")
+        return prediction.output
+
+    def _map_prediction_progress(self, status: str, logs: Optional[str],
+                                 start: float = PROGRESS_SUBMITTED, end: float = PROGRESS_GENERATED) -> float:
+        """Map provider progress (0-1 from the prediction logs) onto the job progress range start..end."""
+        if status == "starting" or not logs:
+            return start
+        progress = Prediction.Progress.parse(logs)
+        if progress is None:
+            return start
+        return start + (end - start) * min(max(progress.percentage, 0.0), 1.0)
+
+    async def _cancel_prediction(self, prediction: ProviderPrediction) -> None:
+        """Best-effort cancellation so abandoned predictions stop billing."""
+        try:
+            await self.provider.cancel_prediction(prediction.id)
+            logger.info(f"Cancelled prediction {prediction.id}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel prediction {prediction.id}: {e}")
+
     async def process_job(self, job_type: JobType, job_id: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Route job to appropriate processor based on type."""
+        """Route job to appropriate processor based on type, enforcing the job type's deadline."""
         result = {}
         if not parameters:
             raise ValueError(f"Job {job_id} failed: parameters are required")
-        
-        match job_type:
-            case JobType.OBJECT:
-                result = await self.process_3d_asset_job(job_id, parameters)
-            case JobType.VIDEO:
-                result = await self.process_video_job(job_id, parameters)
-            case _:
-                raise ValueError(f"Unknown job type: {job_type}")
+        job = await self.job_service.get_job_by_id(job_id)
+        if job and job.status == JobStatus.CANCELLED:
+            logger.info(f"Skipping cancelled job {job_id}")
+            return result
+
+        deadline = config.JOB_DEADLINE_SECONDS.get(job_type.value)
+        self._cancel_events.setdefault(job_id, asyncio.Event())
+        try:
+            async with asyncio.timeout(deadline):
+                if job and job.status == JobStatus.PROCESSING and job.prediction_id and self.callback_base_url:
+                    # Handed off to the provider and queued again by its callback (or the reaper)
+                    await self.complete_prediction(job)
+                    return result
+                if job and await self._reuse_similar_asset(job):
+                    return result
+                match job_type:
+                    case JobType.OBJECT:
+                        result = await self.process_3d_asset_job(job_id, parameters)
+                    case JobType.VIDEO:
+                        result = await self.process_video_job(job_id, parameters)
+                    case JobType.COMPOSITE:
+                        result = await self.process_composite_job(job_id, parameters)
+                    case _:
+                        raise ValueError(f"Unknown job type: {job_type}")
+        except TimeoutError:
+            logger.error(f"Job {job_id} exceeded its {deadline:.0f}s deadline")
+            await self.job_service.update_job(job_id, JobUpdate(
+                status=JobStatus.FAILED,
+                completed_at=datetime.now(),
+                error=f"Job exceeded its {deadline:.0f}s deadline"
+            ))
+        finally:
+            self._cancel_events.pop(job_id, None)
         return result
+
+    async def _reuse_similar_asset(self, job: Job) -> bool:
+        """
+        Lookup stage before generation: when the job opts into reuse ("auto") and an
+        earlier job with a near-duplicate prompt and the same parameters has completed,
+        copy that job's assets under this job and complete it without generating.
+        Any failure falls through to a normal generation.
+        """
+        parameters = job.parameters or {}
+        if parameters.get("reuse", config.PROMPT_REUSE_MODE) != "auto" or self._is_cancelled(job.job_id):
+            return False
+        try:
+            hits = await self.job_service.find_similar_jobs(job.user_id, job.project_id, job.job_type, parameters)
+            if not hits:
+                return False
+            source = hits[0].job
+            result = await self._copy_job_assets(source, job.job_id)
+        except Exception as e:
+            logger.warning(f"Asset reuse lookup failed for job {job.job_id}, generating instead: {e}")
+            return False
+        if self._is_cancelled(job.job_id):
+            # Let the normal path record the cancellation
+            return False
+        result.update({"reused_from": source.job_id, "similarity": round(hits[0].score, 4)})
+        now = datetime.now()
+        await self.job_service.update_job(job.job_id, JobUpdate(
+            status=JobStatus.COMPLETED,
+            started_at=now,
+            completed_at=now,
+            progress=100.0,
+            result=result
+        ))
+        logger.info(f"Job {job.job_id} reused the assets of job {source.job_id} (similarity {hits[0].score:.3f})")
+        return True
+
+    async def _copy_job_assets(self, source: Job, job_id: str) -> Dict[str, Any]:
+        """
+        Copy a completed job's blobs to assets/{job_id}/ and return its result rewritten
+        to point at the copies, with freshly signed URLs. Copies keep the asset alive for
+        this job's own retention period, independently of the source job.
+        """
+        if not await self.file_storage.copy_files(f"assets/{source.job_id}/", f"assets/{job_id}/"):
+            raise ValueError(f"Job {source.job_id} has no stored assets")
+
+        def rebase(value):
+            if isinstance(value, dict):
+                return {key: rebase(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [rebase(item) for item in value]
+            if isinstance(value, str):
+                return value.replace(source.job_id, job_id)
+            return value
+
+        async def sign(value):
+            if isinstance(value, list):
+                for item in value:
+                    await sign(item)
+            if not isinstance(value, dict):
+                return
+            for key, item in list(value.items()):
+                if key == "storage_path" and "signed_url" in value:
+                    value["signed_url"] = await self.file_storage.generate_download_url(item, 86400)  # 24 hours
+                elif key.endswith("_path") and f"{key[:-5]}_url" in value:
+                    value[f"{key[:-5]}_url"] = await self.file_storage.generate_download_url(item, 86400)
+                else:
+                    await sign(item)
+            if "manifest_path" in value and "chunk_urls" in value:
+                lod_prefix = posixpath.dirname(value["manifest_path"])
+                value["chunk_urls"] = [
+                    await self.file_storage.generate_download_url(f"{lod_prefix}/{lod_chunk_filename(level)}", 86400)
+                    for level in range(len(value["chunk_urls"]))
+                ]
+
+        result = rebase(source.result or {})
+        await sign(result)
+        return result
+
+    async def cancel_job(self, job_id: str, prediction_id: Optional[str] = None):
+        """
+        Request cancellation of a job. Running jobs stop at their next
+        cancellation point; a prediction handed off to the provider is cancelled directly.
+        """
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        if prediction_id:
+            try:
+                await self.provider.cancel_prediction(prediction_id)
+                logger.info(f"Cancelled prediction {prediction_id} for job {job_id}")
+            except Exception as e:
+                logger.warning(f"Failed to cancel prediction {prediction_id}: {e}")
+
+    def _is_cancelled(self, job_id: str) -> bool:
+        event = self._cancel_events.get(job_id)
+        return event is not None and event.is_set()
+
+    def _check_cancelled(self, job_id: str):
+        """Cancellation point."""
+        if self._is_cancelled(job_id):
+            raise JobCancelledError(f"Job {job_id} was cancelled")
+
+    async def _wait_cancellable(self, job_id: str, seconds: float):
+        """Sleep that wakes up early (and raises) when the job is cancelled."""
+        event = self._cancel_events.get(job_id)
+        if event is None:
+            await asyncio.sleep(seconds)
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            return
+        self._check_cancelled(job_id)
+
+    async def _mark_cancelled(self, job_id: str):
+        logger.info(f"Job {job_id} cancelled")
+        await self.job_service.update_job(job_id, JobUpdate(
+            status=JobStatus.CANCELLED,
+            completed_at=datetime.now()
+        ))
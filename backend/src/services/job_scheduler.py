@@ -0,0 +1,276 @@
+"""
+In-process job runtime with priority classes and per-user fair sharing.
+Jobs are queued per priority class, then per user, then per project. Each level
+is served with start-time weighted fair queuing, so one user's large backlog
+cannot starve other users and batch work cannot starve interactive work.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from src.config import config
+from src.schemas.job import Job, JobPriority, JobType
+from src.services.job_processor import JobProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class _FairQueue:
+    """
+    Weighted fair queue over keyed flows (start-time fair queuing).
+    Each flow has a virtual start tag; the eligible flow with the lowest tag is
+    served next and its tag advances by 1/weight. A flow that becomes backlogged
+    starts at the current virtual time so idle flows cannot bank credit.
+    Children are either nested _FairQueues or deques of items.
+    """
+
+    def __init__(self, weight_for: Callable[[Any], float], child_factory: Callable[[Any], Any]):
+        self._weight_for = weight_for
+        self._child_factory = child_factory
+        self._children: Dict[Any, Any] = {}
+        self._tags: Dict[Any, float] = {}
+        self._virtual_time = 0.0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, path: Tuple, item: Any):
+        key, rest = path[0], path[1:]
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._child_factory(key)
+        if len(child) == 0:
+            self._tags[key] = max(self._tags.get(key, 0.0), self._virtual_time)
+        if rest:
+            child.push(rest, item)
+        else:
+            child.append(item)
+        self._size += 1
+
+    def pop(self, eligible: Callable[[Tuple], bool], prefix: Tuple = ()) -> Optional[Any]:
+        """Remove and return the next item whose flow path passes `eligible`, or None."""
+        for key in sorted((k for k, child in self._children.items() if len(child)), key=self._tags.__getitem__):
+            path = prefix + (key,)
+            if not eligible(path):
+                continue
+            child = self._children[key]
+            item = child.pop(eligible, path) if isinstance(child, _FairQueue) else child.popleft()
+            if item is None:
+                continue
+            self._size -= 1
+            self._virtual_time = self._tags[key]
+            self._tags[key] += 1.0 / self._weight_for(key)
+            if len(child) == 0:
+                # Drop idle flows so the maps only hold backlogged users/projects
+                del self._children[key]
+                if self._tags[key] <= self._virtual_time:
+                    del self._tags[key]
+            return item
+        return None
+
+    def clear(self):
+        """
+        Drop every queued item. Tags ahead of the virtual time are kept, so flows
+        served in this round stay behind the others in the next one.
+        """
+        for child in self._children.values():
+            child.clear()
+        self._children.clear()
+        self._size = 0
+        self._tags = {key: tag for key, tag in self._tags.items() if tag > self._virtual_time}
+
+    def depth(self, key: Any) -> int:
+        child = self._children.get(key)
+        return len(child) if child is not None else 0
+
+
+def _dispatch_queue(user_queues: Optional[Dict[JobPriority, _FairQueue]] = None) -> _FairQueue:
+    """Priority class -> user -> project fair queue. Passing `user_queues` keeps each class's user tags between rounds."""
+    def user_queue(priority: JobPriority) -> _FairQueue:
+        queue = _FairQueue(
+            lambda user_id: config.JOB_USER_WEIGHTS.get(user_id, 1.0),
+            lambda user_id: _FairQueue(lambda project_id: 1.0, lambda project_id: deque())
+        )
+        return queue if user_queues is None else user_queues.setdefault(priority, queue)
+    return _FairQueue(lambda priority: config.JOB_PRIORITY_WEIGHTS.get(priority.value, 1.0), user_queue)
+
+
+class JobScheduler:
+    """
+    Runs jobs on a fixed pool of asyncio workers.
+    Dispatch order: priority class (weighted), then user (weighted, capped
+    concurrency), then project, then submission order. The same order decides
+    which jobs a worker claims from the shared queue (see select). Composite
+    jobs start right away beside the pool, since they only wait on their shots.
+    """
+
+    def __init__(self, job_processor: JobProcessor, worker_count: Optional[int] = None,
+                 on_finished: Optional[Callable[[Job], Awaitable[None]]] = None):
+        self.job_processor = job_processor
+        self.worker_count = worker_count or config.JOB_WORKER_CONCURRENCY
+        self._on_finished = on_finished
+        self._queue = _dispatch_queue()
+        # Filled and emptied on every select() call; only its fair-share tags persist
+        self._claim_queue = _dispatch_queue(user_queues={})
+        self._running_per_user: Dict[str, int] = {}
+        # Submitted but not yet started
+        self._pending_per_user: Dict[str, int] = {}
+        self._running: Dict[str, Job] = {}
+        # Composite jobs, which only coordinate their shots (see config.JOB_COMPOSITE_COORDINATORS)
+        self._coordinators: Dict[str, asyncio.Task] = {}
+        self._coordinator_slots = asyncio.Semaphore(config.JOB_COMPOSITE_COORDINATORS)
+        self._wakeup = asyncio.Condition()
+        self._workers: list[asyncio.Task] = []
+        # Recent queue waits per priority class, for percentiles
+        self._waits: Dict[JobPriority, Deque[float]] = {priority: deque(maxlen=1000) for priority in JobPriority}
+        self._started: Dict[JobPriority, int] = {priority: 0 for priority in JobPriority}
+
+    async def start(self):
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info(f"Job scheduler started with {self.worker_count} workers")
+
+    async def stop(self):
+        tasks = self._workers + list(self._coordinators.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue)
+
+    @property
+    def free_slots(self) -> int:
+        """Workers that would be idle once everything already queued has started."""
+        return max(self.worker_count - len(self._running) - len(self._queue), 0)
+
+    @property
+    def running_job_ids(self) -> list[str]:
+        return list(self._running) + list(self._coordinators)
+
+    def user_headroom(self, user_id: str) -> int:
+        """How many more jobs the user may have running or queued here before hitting the cap."""
+        load = self._running_per_user.get(user_id, 0) + self._pending_per_user.get(user_id, 0)
+        return max(config.JOB_USER_CONCURRENCY_CAP - load, 0)
+
+    @property
+    def saturated_users(self) -> list[str]:
+        """Users with no headroom left."""
+        return [user_id for user_id in set(self._running_per_user) | set(self._pending_per_user)
+                if not self.user_headroom(user_id)]
+
+    def select(self, jobs: list[Job], limit: int) -> list[Job]:
+        """
+        Choose up to `limit` of `jobs` (candidates from the shared queue) in dispatch
+        order, skipping users whose jobs would exceed their concurrency cap.
+        """
+        for job in jobs:
+            self._claim_queue.push((job.priority or JobPriority.INTERACTIVE, job.user_id, job.project_id), job)
+        planned: Dict[str, int] = {}
+
+        def eligible(path: Tuple) -> bool:
+            return len(path) < 2 or planned.get(path[1], 0) < self.user_headroom(path[1])
+
+        chosen = []
+        while len(chosen) < limit:
+            job = self._claim_queue.pop(eligible)
+            if job is None:
+                break
+            planned[job.user_id] = planned.get(job.user_id, 0) + 1
+            chosen.append(job)
+        self._claim_queue.clear()
+        return chosen
+
+    async def submit(self, job: Job, queued_seconds: float = 0.0):
+        """Queue a job for processing. `queued_seconds` is time already spent waiting elsewhere (the shared queue)."""
+        priority = job.priority or JobPriority.INTERACTIVE
+        if job.job_type == JobType.COMPOSITE:
+            self._coordinators[job.job_id] = asyncio.create_task(self._coordinate(job, time.monotonic() - queued_seconds))
+            return
+        self._queue.push((priority, job.user_id, job.project_id), (time.monotonic() - queued_seconds, job))
+        self._pending_per_user[job.user_id] = self._pending_per_user.get(job.user_id, 0) + 1
+        async with self._wakeup:
+            self._wakeup.notify()
+
+    def _eligible(self, path: Tuple) -> bool:
+        # path is (priority,) or (priority, user_id) or (priority, user_id, project_id)
+        if len(path) >= 2:
+            return self._running_per_user.get(path[1], 0) < config.JOB_USER_CONCURRENCY_CAP
+        return True
+
+    async def _worker(self, index: int):
+        while True:
+            async with self._wakeup:
+                entry = self._queue.pop(self._eligible)
+                while entry is None:
+                    await self._wakeup.wait()
+                    entry = self._queue.pop(self._eligible)
+                enqueued_at, job = entry
+                pending = self._pending_per_user[job.user_id] - 1
+                if pending:
+                    self._pending_per_user[job.user_id] = pending
+                else:
+                    del self._pending_per_user[job.user_id]
+                self._running_per_user[job.user_id] = self._running_per_user.get(job.user_id, 0) + 1
+                self._running[job.job_id] = job
+            priority = job.priority or JobPriority.INTERACTIVE
+            self._waits[priority].append(time.monotonic() - enqueued_at)
+            self._started[priority] += 1
+            try:
+                await self.job_processor.process_job(job.job_type, job.job_id, job.parameters)
+            except Exception as e:
+                logger.error(f"Worker {index} failed running job {job.job_id}: {e}")
+            finally:
+                del self._running[job.job_id]
+                remaining = self._running_per_user[job.user_id] - 1
+                if remaining:
+                    self._running_per_user[job.user_id] = remaining
+                else:
+                    del self._running_per_user[job.user_id]
+                async with self._wakeup:
+                    # A freed user slot may make a capped user's job eligible for any worker
+                    self._wakeup.notify_all()
+            if self._on_finished:
+                try:
+                    await self._on_finished(job)
+                except Exception as e:
+                    logger.error(f"Worker {index} failed to acknowledge job {job.job_id}: {e}")
+
+    async def _coordinate(self, job: Job, enqueued_at: float):
+        try:
+            async with self._coordinator_slots:
+                priority = job.priority or JobPriority.INTERACTIVE
+                self._waits[priority].append(time.monotonic() - enqueued_at)
+                self._started[priority] += 1
+                try:
+                    await self.job_processor.process_job(job.job_type, job.job_id, job.parameters)
+                except Exception as e:
+                    logger.error(f"Coordinator failed running job {job.job_id}: {e}")
+        finally:
+            self._coordinators.pop(job.job_id, None)
+        if self._on_finished:
+            try:
+                await self._on_finished(job)
+            except Exception as e:
+                logger.error(f"Coordinator failed to acknowledge job {job.job_id}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        classes = {}
+        for priority in JobPriority:
+            waits = sorted(self._waits[priority])
+            classes[priority.value] = {
+                "queued": self._queue.depth(priority),
+                "started": self._started[priority],
+                "queue_wait_p50_seconds": round(waits[len(waits) // 2], 4) if waits else None,
+                "queue_wait_p95_seconds": round(waits[min(int(len(waits) * 0.95), len(waits) - 1)], 4) if waits else None,
+            }
+        return {
+            "workers": self.worker_count,
+            "running": len(self._running),
+            "coordinating": len(self._coordinators),
+            "backlog": self.backlog,
+            "classes": classes,
+        }
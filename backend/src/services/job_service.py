@@ -1,22 +1,50 @@
 import aiohttp
 import logging
+import re
+import time
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Dict, Optional
 from uuid import uuid4
-from src.repositories.base import DatabaseRepository
-from src.schemas.job import JobStatus, JobUpdate, WebhookNotification, Job, JobCreate
+from src.config import config
+from src.repositories.base import (
+    DatabaseRepository, CreditLedgerRepository, ProjectStatsRepository, PromptSearchRepository, JobFinishedError
+)
+from src.schemas.job import (
+    JobStatus, JobType, JobUpdate, WebhookNotification, Job, JobCreate, JobSearchHit, JobSearchResults,
+    changes_terminal_status
+)
+from src.schemas.project import ProjectStats
 from src.api.webhooks import publish_job_update
+from src.services.credits import InsufficientCreditsError, job_credit_cost
+from src.services.prompt_similarity import PromptVectorIndex, embed_prompts, reuse_signature
 
 logger = logging.getLogger(__name__)
 
+# Job types whose output is a single stored asset that a near-duplicate job can reuse
+REUSABLE_JOB_TYPES = (JobType.VIDEO, JobType.OBJECT)
+
 class JobService:
-    def __init__(self, job_repo: DatabaseRepository[Job]):
+    def __init__(self, job_repo: DatabaseRepository[Job], credit_ledger: Optional[CreditLedgerRepository] = None,
+                 project_stats: Optional[ProjectStatsRepository] = None,
+                 search_index: Optional[PromptSearchRepository] = None,
+                 prompt_index: Optional[PromptVectorIndex] = None):
         self.db = job_repo
+        # Credits are not enforced without a ledger (e.g. offline load tests)
+        self.credit_ledger = credit_ledger
+        # When set, job writes go through it so project aggregates stay in step
+        self.project_stats = project_stats
+        # Prompt index for search_jobs; each user's jobs are backfilled from the database on
+        # their first search and again every PROMPT_SEARCH_RESYNC_SECONDS (monotonic time per user)
+        self.search_index = search_index
+        self._search_synced_at: Dict[str, float] = {}
+        # Completed jobs' prompt vectors, for near-duplicate reuse; scopes load from the database on first lookup
+        self.prompt_index = prompt_index
     
     async def create_job(
         self, 
         job_request: JobCreate,
         user_id: str,
+        parent_job_id: Optional[str] = None,
     ) -> Job:
         """Create a new job and store it in Firestore."""
         if not user_id: 
@@ -29,23 +57,43 @@ class JobService:
         job_id = str(uuid4())
         now = datetime.now()
         
+        # Shots of a composite job are paid for by their parent
+        charge_credits = self.credit_ledger is not None and parent_job_id is None
+        if charge_credits:
+            cost = job_credit_cost(job_request.job_type, job_request.parameters)
+            if not await self.credit_ledger.reserve(user_id, job_id, cost):
+                raise InsufficientCreditsError(f"Job costs {cost} credits, which exceeds the available balance")
+        
         job_data = Job(
             job_id=job_id,
             user_id=user_id,
             project_id=job_request.project_id,
             job_type=job_request.job_type,
             status=JobStatus.QUEUED,
+            priority=job_request.priority,
             created_at=now,
             modified_at=now,
             parameters=job_request.parameters or {},
-            webhook_url=job_request.webhook_url
+            webhook_url=job_request.webhook_url,
+            parent_job_id=parent_job_id
         )
         
         # Store in database using repository
         job_dict = job_data.model_dump()
         job_dict["job_id"] = job_id  # Ensure job_id is set
         logger.info(f"About to create job in database: {job_dict}")
-        await self.db.create(job_dict)
+        try:
+            if self.project_stats:
+                await self.project_stats.create_job(job_dict)
+            else:
+                await self.db.create(job_dict)
+        except Exception:
+            if charge_credits:
+                await self.credit_ledger.refund(job_id)
+            raise
+        
+        if self.search_index and parent_job_id is None:
+            await self._index_prompt(job_data)
         
         # Verify the job was created
         created_job = await self.db.get_by_id(job_id)
@@ -58,17 +106,38 @@ class JobService:
         return job_data
     
     async def update_job(self, job_id: str, update_data: JobUpdate) -> Job:
-        """Update job status and send webhook notification if configured."""
-        # Get current job data
-        current_data = await self.db.get_by_id(job_id)
-        if current_data is None:
-            raise ValueError(f"Job {job_id} not found")
-        
-        current_data.update(update_data.model_dump(exclude_unset=True))
-        current_data["modified_at"] = datetime.now()
+        """
+        Update job status and send webhook notification if configured.
+        A finished job keeps its status: an update that would change it (say a
+        completion racing a cancellation) is dropped and the job returned as it is.
+        """
+        changes = update_data.model_dump(exclude_unset=True)
+        changes["modified_at"] = datetime.now()
+        if self.project_stats:
+            # Reads the current job and updates it with its project's aggregate in one write
+            try:
+                current_data = await self.project_stats.update_job(job_id, changes)
+            except JobFinishedError as e:
+                return self._ignore_finished_update(e.job, update_data)
+            if current_data is None:
+                raise ValueError(f"Job {job_id} not found")
+        else:
+            # Get current job data
+            current_data = await self.db.get_by_id(job_id)
+            if current_data is None:
+                raise ValueError(f"Job {job_id} not found")
+            if update_data.status is not None and changes_terminal_status(current_data["status"], update_data.status):
+                return self._ignore_finished_update(current_data, update_data)
+            
+            current_data.update(changes)
+            
+            # Update in database using repository
+            await self.db.update(job_id, current_data)
         
-        # Update in database using repository
-        await self.db.update(job_id, current_data)
+        if update_data.status is not None:
+            await self._settle_credits(job_id, current_data)
+        if update_data.status == JobStatus.COMPLETED and self.prompt_index:
+            self._remember_prompt(Job(**current_data))
         
         # Publish job update to webhook streams
         status_value = current_data["status"]
@@ -109,10 +178,126 @@ class JobService:
         return Job(**data) if data else None
     
     async def get_user_jobs(self, user_id: str, limit: int = 50) -> list[Job]:
-        """Get all jobs for a specific user."""
-        docs = await self.db.find_all(filters={"user_id": user_id}, limit=limit)
+        """Get a user's most recent jobs, newest first."""
+        docs = await self.db.find_all(filters={"user_id": user_id}, limit=limit, order_by="created_at", descending=True)
         return [Job(**doc) for doc in docs]
     
+    async def stream_user_jobs(self, user_id: str, project_id: Optional[str] = None) -> AsyncIterator[Job]:
+        """Iterate over all of a user's jobs, oldest first, without loading them all at once."""
+        filters = {"user_id": user_id}
+        if project_id:
+            filters["project_id"] = project_id
+        async for doc in self.db.stream(filters=filters, order_by="created_at", page_size=config.JOB_EXPORT_PAGE_SIZE):
+            yield Job(**doc)
+    
+    async def _index_prompt(self, job: Job):
+        prompt = (job.parameters or {}).get("prompt")
+        if not isinstance(prompt, str) or not prompt.strip():
+            return
+        try:
+            await self.search_index.index(job.job_id, job.user_id, prompt, job.created_at)
+        except Exception as e:
+            # Search is best effort; never fail job creation over it
+            logger.error(f"Failed to index prompt of job {job.job_id}: {e}")
+    
+    async def _sync_search_index(self, user_id: str):
+        """Index the user's jobs that are not indexed yet, e.g. created by other processes."""
+        synced_at = self._search_synced_at.get(user_id)
+        if synced_at is not None and time.monotonic() - synced_at < config.PROMPT_SEARCH_RESYNC_SECONDS:
+            return
+        self._search_synced_at[user_id] = time.monotonic()
+        batch = []
+        try:
+            async for job in self.stream_user_jobs(user_id):
+                prompt = (job.parameters or {}).get("prompt")
+                if job.parent_job_id is None and isinstance(prompt, str) and prompt.strip():
+                    batch.append((job.job_id, prompt, job.created_at))
+                if len(batch) >= config.JOB_EXPORT_PAGE_SIZE:
+                    await self.search_index.index_missing(user_id, batch)
+                    batch = []
+            if batch:
+                await self.search_index.index_missing(user_id, batch)
+        except Exception as e:
+            # Search what is indexed so far; the next search tries again
+            self._search_synced_at.pop(user_id, None)
+            logger.error(f"Failed to sync search index for user {user_id}: {e}")
+    
+    async def search_jobs(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> JobSearchResults:
+        """Rank the user's jobs by how well their prompt matches `query` (every word must match)."""
+        terms = re.findall(r"\w+", query.lower())[:config.PROMPT_SEARCH_MAX_TERMS]
+        results = JobSearchResults(query=query, total=0, limit=limit, offset=offset, results=[])
+        if not self.search_index or not terms:
+            return results
+        
+        await self._sync_search_index(user_id)
+        hits, results.total = await self.search_index.search(user_id, terms, limit, offset)
+        missing = []
+        for job_id, score in hits:
+            job = await self.get_job_by_id(job_id)
+            if job is None:
+                # Archived or deleted since it was indexed
+                missing.append(job_id)
+                continue
+            results.results.append(JobSearchHit(score=score, job=job))
+        if missing:
+            await self.search_index.remove(missing)
+        return results
+    
+    def _reuse_scope(self, user_id: str, project_id: Optional[str]) -> tuple:
+        return (user_id, project_id) if config.PROMPT_REUSE_SCOPE == "project" else (user_id,)
+    
+    @staticmethod
+    def _is_reusable(job: Job) -> bool:
+        return (job.job_type in REUSABLE_JOB_TYPES and job.status == JobStatus.COMPLETED
+                and isinstance((job.parameters or {}).get("prompt"), str)
+                and bool((job.result or {}).get("storage_path")))
+    
+    def _remember_prompt(self, job: Job):
+        if self._is_reusable(job):
+            self.prompt_index.add(
+                self._reuse_scope(job.user_id, job.project_id), job.job_id,
+                reuse_signature(job.job_type.value, job.parameters),
+                embed_prompts([job.parameters["prompt"]], self.prompt_index.dim)[0]
+            )
+    
+    async def _load_reuse_scope(self, scope: tuple):
+        age = self.prompt_index.scope_age(scope)
+        if age is not None and age < config.PROMPT_REUSE_RESYNC_SECONDS:
+            return
+        jobs = [job async for job in self.stream_user_jobs(*scope) if self._is_reusable(job)]
+        self.prompt_index.load(
+            scope,
+            [job.job_id for job in jobs],
+            [reuse_signature(job.job_type.value, job.parameters) for job in jobs],
+            embed_prompts([job.parameters["prompt"] for job in jobs], self.prompt_index.dim)
+        )
+    
+    async def find_similar_jobs(self, user_id: str, project_id: Optional[str], job_type: JobType,
+                                parameters: dict, limit: int = 1) -> list[JobSearchHit]:
+        """
+        Completed jobs in the caller's reuse scope whose prompt is a near duplicate
+        (cosine similarity >= PROMPT_REUSE_THRESHOLD) and whose other parameters are
+        identical, most similar first.
+        """
+        prompt = (parameters or {}).get("prompt")
+        if not self.prompt_index or job_type not in REUSABLE_JOB_TYPES or not isinstance(prompt, str):
+            return []
+        scope = self._reuse_scope(user_id, project_id)
+        await self._load_reuse_scope(scope)
+        matches = await self.prompt_index.query(
+            scope, embed_prompts([prompt], self.prompt_index.dim)[0],
+            reuse_signature(job_type.value, parameters), limit, config.PROMPT_REUSE_THRESHOLD
+        )
+        hits = []
+        for job_id, similarity in matches:
+            job = await self.get_job_by_id(job_id)
+            if job is None or not self._is_reusable(job):
+                # Archived or deleted since the scope was loaded
+                self.prompt_index.remove(scope, job_id)
+                continue
+            hits.append(JobSearchHit(score=similarity, job=job))
+        return hits
+    
     async def get_project_jobs(self, project_id: str, user_id: Optional[str] = None, limit: int = 50) -> list[Job]:
         """Get all jobs for a specific project."""
         filters = {"project_id": project_id}
@@ -121,6 +306,40 @@ class JobService:
         docs = await self.db.find_all(filters=filters, limit=limit)
         return [Job(**doc) for doc in docs]
     
+    @staticmethod
+    def _ignore_finished_update(job_data: dict, update_data: JobUpdate) -> Job:
+        job = Job(**job_data)
+        logger.info(f"Ignoring {update_data.status.value} update for job {job.job_id}, already {job.status.value}")
+        return job
+    
+    async def get_project_stats(self, project_id: str) -> ProjectStats:
+        """Aggregates for a project; empty if it has no jobs (or aggregates are not maintained)."""
+        stats = await self.project_stats.get(project_id) if self.project_stats else None
+        return ProjectStats(**stats) if stats else ProjectStats(project_id=project_id)
+    
+    async def _settle_credits(self, job_id: str, job_data: dict):
+        """Commit a finished job's credit reservation, or refund it if the job did not complete (or reused an asset)."""
+        if self.credit_ledger is None or job_data.get("parent_job_id"):
+            return
+        status = JobStatus(job_data["status"])
+        # Jobs completed from an existing asset are free
+        reused = status == JobStatus.COMPLETED and bool((job_data.get("result") or {}).get("reused_from"))
+        try:
+            if status == JobStatus.COMPLETED and not reused:
+                await self.credit_ledger.commit(job_id)
+            elif status in (JobStatus.FAILED, JobStatus.CANCELLED) or reused:
+                if await self.credit_ledger.refund(job_id):
+                    logger.info(f"Refunded credits for job {job_id}")
+        except Exception as e:
+            # The reservation stays outstanding and can be settled later; don't fail the update
+            logger.error(f"Failed to settle credits for job {job_id}: {e}")
+    
+    async def get_child_jobs(self, parent_job_id: str) -> list[Job]:
+        """Get the shot jobs of a composite job, in shot order."""
+        docs = await self.db.find_all(filters={"parent_job_id": parent_job_id})
+        jobs = [Job(**doc) for doc in docs]
+        return sorted(jobs, key=lambda job: (job.parameters or {}).get("shot_index", 0))
+    
     async def _send_webhook_notification(self, webhook_url: str, notification: WebhookNotification):
         """Send webhook notification asynchronously."""
         try:
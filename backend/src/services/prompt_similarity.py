@@ -0,0 +1,201 @@
+"""
+Near-duplicate prompt lookup.
+Prompts are embedded locally as hashed bag-of-words plus character-trigram
+vectors (L2-normalized), so rewordings that only change punctuation, case or
+word order land on (nearly) the same vector. Completed jobs are kept in one
+dense matrix per scope (a user, or a user's project) and a lookup is a single
+matrix-vector product: exact cosine nearest neighbours, no approximate index.
+Only jobs with the same type and non-prompt parameters are candidates.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+# Trigrams make plurals, typos and inflections overlap; whole words dominate
+CHAR_NGRAM = 3
+CHAR_NGRAM_WEIGHT = 0.5
+_WORD_SEED = 0
+_CHAR_SEED = 0x9E3779B9
+# Parameters that don't change the generated asset
+_UNSIGNED_PARAMETERS = ("prompt", "reuse", "shot_index")
+# A lookup reads the whole scope (~10ms per 100k vectors at 256 dims); above this size it runs in a thread
+OFFLOAD_MIN_VECTORS = 50_000
+
+
+def embed_prompts(prompts: Sequence[str], dim: int) -> np.ndarray:
+    """Embed prompts as rows of a (len(prompts), dim) float32 matrix of unit vectors (zero rows for empty prompts)."""
+    rows: List[int] = []
+    hashes: List[int] = []
+    weights: List[float] = []
+    for row, prompt in enumerate(prompts):
+        for word in WORD_PATTERN.findall(prompt.lower()):
+            rows.append(row)
+            hashes.append(zlib.crc32(word.encode(), _WORD_SEED))
+            weights.append(1.0)
+            padded = f"<{word}>".encode()
+            for start in range(len(padded) - CHAR_NGRAM + 1):
+                rows.append(row)
+                hashes.append(zlib.crc32(padded[start:start + CHAR_NGRAM], _CHAR_SEED))
+                weights.append(CHAR_NGRAM_WEIGHT)
+    if not rows:
+        return np.zeros((len(prompts), dim), dtype=np.float32)
+
+    hashed = np.array(hashes, dtype=np.uint32)
+    # Low bits pick the bucket, the top bit the sign, so collisions cancel out on average
+    signs = np.where(hashed & 0x80000000, -1.0, 1.0)
+    cells = np.array(rows, dtype=np.int64) * dim + hashed % dim
+    vectors = np.bincount(
+        cells, weights=np.array(weights) * signs, minlength=len(prompts) * dim
+    ).reshape(len(prompts), dim).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def reuse_signature(job_type: str, parameters: Dict[str, Any]) -> int:
+    """Hash of everything but the prompt that determines a job's output; reuse needs an exact match."""
+    signed = {key: value for key, value in (parameters or {}).items() if key not in _UNSIGNED_PARAMETERS}
+    payload = json.dumps([job_type, signed], sort_keys=True, separators=(",", ":"), default=str)
+    return int.from_bytes(hashlib.blake2b(payload.encode(), digest_size=8).digest(), "little", signed=True)
+
+
+class _Scope:
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.signatures = np.empty(capacity, dtype=np.int64)
+        self.job_ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def reserve(self, count: int):
+        if count > len(self.signatures):
+            capacity = max(count, len(self.signatures) * 2)
+            vectors = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:len(self)] = self.vectors[:len(self)]
+            signatures = np.empty(capacity, dtype=np.int64)
+            signatures[:len(self)] = self.signatures[:len(self)]
+            self.vectors, self.signatures = vectors, signatures
+
+
+class PromptVectorIndex:
+    """
+    Per-scope prompt vectors in memory. Scopes are loaded whole (see load) and
+    evicted least recently queried first once max_vectors is exceeded; an
+    evicted scope is simply loaded again on its next lookup.
+    """
+
+    def __init__(self, dim: int, max_vectors: int):
+        self.dim = dim
+        self.max_vectors = max_vectors
+        self._scopes: "OrderedDict[Hashable, _Scope]" = OrderedDict()
+        self._vectors = 0
+        self._queries = 0
+        self._matches = 0
+        self._evictions = 0
+
+    def scope_age(self, scope: Hashable) -> Optional[float]:
+        """Seconds since the scope was loaded, or None if it isn't."""
+        entry = self._scopes.get(scope)
+        return None if entry is None else time.monotonic() - entry.loaded_at
+
+    def load(self, scope: Hashable, job_ids: List[str], signatures: List[int], vectors: np.ndarray):
+        """Replace a scope's contents."""
+        self.drop(scope)
+        entry = self._scopes[scope] = _Scope(self.dim, max(len(job_ids), 16))
+        self._vectors += self._append(entry, job_ids, signatures, vectors)
+        self._evict(keep=scope)
+
+    def add(self, scope: Hashable, job_id: str, signature: int, vector: np.ndarray):
+        """Add one job to a loaded scope. Unloaded scopes pick it up when they are loaded."""
+        entry = self._scopes.get(scope)
+        if entry is not None:
+            self._vectors += self._append(entry, [job_id], [signature], vector[None, :])
+            self._evict(keep=scope)
+
+    @staticmethod
+    def _append(entry: _Scope, job_ids: List[str], signatures: List[int], vectors: np.ndarray) -> int:
+        added = 0
+        entry.reserve(len(entry) + len(job_ids))
+        for job_id, signature, vector in zip(job_ids, signatures, vectors):
+            if job_id in entry.rows:
+                continue
+            row = entry.rows[job_id] = len(entry)
+            entry.vectors[row] = vector
+            entry.signatures[row] = signature
+            entry.job_ids.append(job_id)
+            added += 1
+        return added
+
+    def remove(self, scope: Hashable, job_id: str):
+        entry = self._scopes.get(scope)
+        row = entry.rows.pop(job_id, None) if entry is not None else None
+        if row is None:
+            return
+        # Move the last row into the hole
+        last = len(entry) - 1
+        if row != last:
+            moved = entry.job_ids[last]
+            entry.vectors[row] = entry.vectors[last]
+            entry.signatures[row] = entry.signatures[last]
+            entry.job_ids[row] = moved
+            entry.rows[moved] = row
+        entry.job_ids.pop()
+        self._vectors -= 1
+
+    def drop(self, scope: Hashable):
+        entry = self._scopes.pop(scope, None)
+        if entry is not None:
+            self._vectors -= len(entry)
+
+    async def query(self, scope: Hashable, vector: np.ndarray, signature: int,
+                    limit: int, threshold: float) -> List[Tuple[str, float]]:
+        """Up to `limit` (job_id, cosine similarity) pairs at or above `threshold`, most similar first."""
+        entry = self._scopes.get(scope)
+        self._queries += 1
+        if entry is None or not len(entry):
+            return []
+        self._scopes.move_to_end(scope)
+        # Growing a scope swaps in new arrays, so these stay consistent while a thread reads them
+        count, vectors, signatures, job_ids = len(entry), entry.vectors, entry.signatures, entry.job_ids
+        if count >= OFFLOAD_MIN_VECTORS:
+            similarities = await asyncio.to_thread(np.matmul, vectors[:count], vector)
+        else:
+            similarities = vectors[:count] @ vector
+        similarities[signatures[:count] != signature] = -1.0
+        if limit < count:
+            candidates = np.argpartition(similarities, count - limit)[count - limit:]
+        else:
+            candidates = np.arange(count)
+        candidates = candidates[similarities[candidates] >= threshold]
+        candidates = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        # Rows removed meanwhile are dropped; callers check every hit against the database anyway
+        hits = [(job_ids[row], float(similarities[row])) for row in candidates if row < len(job_ids)]
+        if hits:
+            self._matches += 1
+        return hits
+
+    def _evict(self, keep: Hashable):
+        while self._vectors > self.max_vectors and len(self._scopes) > 1:
+            scope = next(iter(self._scopes))
+            if scope == keep:
+                self._scopes.move_to_end(scope)
+                continue
+            self.drop(scope)
+            self._evictions += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "scopes": len(self._scopes), "vectors": self._vectors,
+            "bytes": self._vectors * self.dim * 4, "queries": self._queries,
+            "matches": self._matches, "evictions": self._evictions,
+        }
@@ -0,0 +1,111 @@
+"""
+Materialized "recent jobs" view.
+Holds the newest jobs of each active user in memory, kept current by a job
+change feed (Firestore snapshot listeners, or the in-memory stand-in), so
+GET /api/jobs is answered without a query. Users idle for a while are evicted
+and their listeners closed.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from src.config import config
+from src.repositories.base import JobChangeFeedRepository
+from src.schemas.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+class _UserView:
+    def __init__(self):
+        self.jobs: Optional[List[Job]] = None
+        self.ready = asyncio.Event()
+        self.unsubscribe: Optional[Callable[[], None]] = None
+        self.last_access = time.monotonic()
+
+
+class RecentJobsView:
+    def __init__(self, change_feed: JobChangeFeedRepository, jobs_per_user: int,
+                 idle_seconds: float, max_users: int):
+        self.change_feed = change_feed
+        self.jobs_per_user = jobs_per_user
+        self.idle_seconds = idle_seconds
+        self.max_users = max_users
+        # Least recently read first
+        self._users: "OrderedDict[str, _UserView]" = OrderedDict()
+        self._next_sweep = time.monotonic() + idle_seconds
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    async def get(self, user_id: str, limit: int) -> Optional[List[Job]]:
+        """
+        The user's `limit` newest jobs, newest first, or None if the view can't
+        answer (limit beyond the window, or the first snapshot is late); callers
+        then fall back to a query.
+        """
+        if limit > self.jobs_per_user:
+            return None
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._evict_idle(now)
+
+        view = self._users.get(user_id)
+        if view is None:
+            self._misses += 1
+            view = self._watch(user_id)
+        else:
+            self._hits += 1
+            self._users.move_to_end(user_id)
+        view.last_access = now
+
+        if view.jobs is None:
+            try:
+                await asyncio.wait_for(view.ready.wait(), config.RECENT_JOBS_FIRST_SNAPSHOT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"No recent-jobs snapshot for user {user_id} yet; falling back to a query")
+                return None
+        return view.jobs[:limit]
+
+    def _watch(self, user_id: str) -> _UserView:
+        while len(self._users) >= self.max_users:
+            self._evict(next(iter(self._users)))
+        view = self._users[user_id] = _UserView()
+
+        def on_snapshot(jobs: List[Dict[str, Any]]):
+            try:
+                view.jobs = [Job(**job) for job in jobs]
+            except Exception as e:
+                # Keep serving the previous window rather than failing reads
+                logger.error(f"Bad recent-jobs snapshot for user {user_id}: {e}")
+            view.ready.set()
+
+        view.unsubscribe = self.change_feed.subscribe(user_id, self.jobs_per_user, on_snapshot)
+        return view
+
+    def _evict(self, user_id: str):
+        view = self._users.pop(user_id, None)
+        if view is None:
+            return
+        self._evictions += 1
+        try:
+            view.unsubscribe()
+        except Exception as e:
+            logger.warning(f"Failed to close recent-jobs listener for user {user_id}: {e}")
+
+    def _evict_idle(self, now: float):
+        self._next_sweep = now + self.idle_seconds
+        # Ordered by last read, so idle users are at the front
+        while self._users:
+            user_id, view = next(iter(self._users.items()))
+            if now - view.last_access < self.idle_seconds:
+                break
+            self._evict(user_id)
+
+    def close(self):
+        for user_id in list(self._users):
+            self._evict(user_id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"users": len(self._users), "hits": self._hits, "misses": self._misses, "evictions": self._evictions}
@@ -0,0 +1,211 @@
+"""
+Resilience helpers for calls to generation providers.
+Errors are classified as retryable or fatal, retryable errors are retried with
+jittered exponential backoff, and a circuit breaker shared by every job calling
+the same provider stops new work from hammering a degraded upstream.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import aiohttp
+import httpx
+from replicate.exceptions import ReplicateError
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class ProviderError(Exception):
+    """Base class for classified provider errors."""
+
+
+class RetryableProviderError(ProviderError):
+    """Transient provider error (throttling, 5xx, network); safe to retry."""
+
+
+class ThrottledProviderError(RetryableProviderError):
+    """Provider asked us to slow down (429)."""
+
+
+class FatalProviderError(ProviderError):
+    """Provider rejected the request; retrying will not help."""
+
+
+class CircuitOpenError(ProviderError):
+    """The provider's circuit breaker is open and is shedding new calls."""
+
+
+def classify_provider_error(error: Exception) -> Optional[ProviderError]:
+    """
+    Map a raw exception from a provider call onto a retryable or fatal error.
+    Returns None for exceptions that did not come from the provider.
+    """
+    if isinstance(error, ProviderError):
+        return error
+    if isinstance(error, ReplicateError):
+        status = error.status or 0
+        if status == 429:
+            return ThrottledProviderError(f"Provider throttled: {error.detail or error.title}")
+        if status >= 500:
+            return RetryableProviderError(f"Provider returned {status}: {error.detail or error.title}")
+        return FatalProviderError(f"Provider returned {status}: {error.detail or error.title}")
+    if isinstance(error, aiohttp.ClientResponseError):
+        if error.status == 429:
+            return ThrottledProviderError(f"Provider throttled: {error.message}")
+        if error.status >= 500:
+            return RetryableProviderError(f"Provider returned {error.status}: {error.message}")
+        return FatalProviderError(f"Provider returned {error.status}: {error.message}")
+    if isinstance(error, (httpx.TransportError, aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)):
+        return RetryableProviderError(f"Provider unreachable: {error!r}")
+    return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    Closed: calls pass. Open: calls are rejected until the reset timeout passes.
+    Half-open: a single probe call decides whether to close or re-open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._total_rejections = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may proceed right now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        self._total_rejections += 1
+        return False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"Provider {self.name} is unavailable (circuit {self.state})")
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Give up a half-open probe slot without recording an outcome."""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(f"Circuit {self.name} opened after {self._failures} failures")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    async def wait_until_available(self, timeout_seconds: float):
+        """
+        Park the caller until the circuit is closed, or half-open with the probe slot
+        free, up to timeout_seconds. In the half-open case the caller should make its
+        provider call without awaiting anything else first, so it is the one that
+        takes the probe; other parked callers keep waiting for the probe's outcome.
+        """
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            state = self.state
+            if state == self.CLOSED or (state == self.HALF_OPEN and not self._probe_in_flight):
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CircuitOpenError(f"Provider {self.name} is unavailable (circuit {state})")
+            await asyncio.sleep(min(1.0, remaining))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "rejected_calls": self._total_rejections,
+        }
+
+
+# Breakers are shared by every job calling the same provider/model
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    if name not in circuit_breakers:
+        circuit_breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout_seconds=config.CIRCUIT_RESET_TIMEOUT_SECONDS
+        )
+    return circuit_breakers[name]
+
+
+async def call_with_retry(
+    operation: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    limiter: Optional[Any] = None,
+    attempts: Optional[int] = None,
+    base_delay_seconds: Optional[float] = None,
+    max_delay_seconds: Optional[float] = None,
+) -> T:
+    """
+    Run a provider call through the circuit breaker, retrying retryable errors
+    with full-jitter exponential backoff. Provider failures are raised as a
+    classified ProviderError; any other exception propagates unchanged.
+    If a concurrency limiter is given, every attempt runs inside one of its slots.
+    """
+    attempts = attempts or config.PROVIDER_RETRY_ATTEMPTS
+    base_delay_seconds = base_delay_seconds or config.PROVIDER_RETRY_BASE_DELAY_SECONDS
+    max_delay_seconds = max_delay_seconds or config.PROVIDER_RETRY_MAX_DELAY_SECONDS
+
+    for attempt in range(1, attempts + 1):
+        breaker.check()
+        try:
+            result = await (limiter.run(operation) if limiter else operation())
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            error = classify_provider_error(e)
+            if error is None:
+                breaker.release_probe()
+                raise
+            if isinstance(error, FatalProviderError):
+                # The provider answered; a rejected request says nothing about its health
+                breaker.record_success()
+                raise error from e
+            breaker.record_failure()
+            if attempt == attempts:
+                raise error from e
+            delay = random.uniform(0, min(max_delay_seconds, base_delay_seconds * 2 ** (attempt - 1)))
+            logger.warning(f"{breaker.name} call failed ({error}); retry {attempt}/{attempts - 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,266 @@
+"""
+Standalone job worker.
+Claims jobs from the shared job queue and runs them through JobProcessor, so
+generation work scales separately from the API:
+
+    python -m src.worker --processes 4
+
+Each process runs its own event loop and JobScheduler. Leases are renewed while
+jobs wait and run here, and jobs are acknowledged (removed from the queue) once
+processed; a job whose worker dies is handed out again when its lease expires.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import uuid4
+import dotenv
+from src.config import config
+from src.media.pool import shutdown_media_pool
+from src.repositories.base import JobArchiveRepository, JobQueueRepository
+from src.schemas.job import Job, JobPriority, JobStatus, TERMINAL_JOB_STATUSES
+from src.services.job_processor import JobProcessor, completion_entry
+from src.services.job_scheduler import JobScheduler
+from src.services.job_service import JobService
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Feeds a local JobScheduler from the shared queue and relays cancellations to it."""
+
+    def __init__(self, job_queue: JobQueueRepository, job_service: JobService, job_processor: JobProcessor,
+                 worker_count: Optional[int] = None, worker_id: Optional[str] = None,
+                 job_archive: Optional[JobArchiveRepository] = None):
+        self.job_queue = job_queue
+        self.job_service = job_service
+        self.job_processor = job_processor
+        # Finds handed-off jobs for the reaper; without one, lost callbacks are never swept
+        self.job_archive = job_archive
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.scheduler = JobScheduler(job_processor, worker_count, on_finished=self._ack)
+        # Claimed and not yet acknowledged
+        self._leased: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        await self.scheduler.start()
+        self._tasks = [
+            asyncio.create_task(self._claim_loop()),
+            asyncio.create_task(self._cancellation_loop()),
+            asyncio.create_task(self._lease_loop()),
+        ]
+        if self.job_archive and self.job_processor.callback_base_url:
+            self._tasks.append(asyncio.create_task(self._reaper_loop()))
+        logger.info(f"Job worker {self.worker_id} started")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.scheduler.stop()
+        shutdown_media_pool()
+
+    async def _ack(self, job: Job):
+        self._leased.discard(job.job_id)
+        await self.job_queue.ack(job.job_id)
+
+    async def _should_run(self, entry: Dict[str, Any]) -> bool:
+        """
+        Whether a claimed job still needs running. Finished jobs, and jobs waiting on a
+        provider callback, are acknowledged instead; the completion entry a callback
+        queues runs. A job left processing is re-run only if its previous lease lapsed
+        (its worker died).
+        """
+        job_id = entry["job"]["job_id"]
+        job = await self.job_service.get_job_by_id(job_id)
+        if job is None or job.status in TERMINAL_JOB_STATUSES:
+            reason = "is gone" if job is None else f"is already {job.status.value}"
+        elif job.status == JobStatus.PROCESSING and job.prediction_id and self.job_processor.callback_base_url:
+            if entry["job"].get("completes_prediction") == job.prediction_id:
+                return True
+            reason = "is waiting on its provider callback"
+        elif job.status == JobStatus.PROCESSING and not entry.get("reclaimed"):
+            reason = "is already processing"
+        else:
+            return True
+        logger.info(f"Worker {self.worker_id} skipping job {job_id}: it {reason}")
+        self._leased.discard(job_id)
+        await self.job_queue.ack(job_id)
+        return False
+
+    async def _candidates(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue entries worth considering, by job id. Users already at their cap are
+        skipped, and a user who fills their headroom within a page is excluded from
+        the next one, so one user's backlog can't hide everyone else's jobs.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        for priority in JobPriority:
+            excluded = set(self.scheduler.saturated_users)
+            for _ in range(config.JOB_QUEUE_CLAIM_MAX_PAGES):
+                entries = await self.job_queue.candidates(priority.value, config.JOB_QUEUE_CLAIM_WINDOW, excluded)
+                per_user: Dict[str, int] = {}
+                for entry in entries:
+                    found[entry["job"]["job_id"]] = entry
+                    user_id = entry["job"]["user_id"]
+                    per_user[user_id] = per_user.get(user_id, 0) + 1
+                filled = {user_id for user_id, count in per_user.items()
+                          if count >= self.scheduler.user_headroom(user_id)}
+                if len(entries) < config.JOB_QUEUE_CLAIM_WINDOW or not filled - excluded:
+                    break
+                excluded |= filled
+        return found
+
+    async def _claim_loop(self):
+        while True:
+            claimed = []
+            free_slots = self.scheduler.free_slots
+            if free_slots:
+                try:
+                    # Over-fetch, let the scheduler's fair queue pick, and lease only those
+                    found = await self._candidates()
+                    picked = self.scheduler.select([Job.model_validate(entry["job"]) for entry in found.values()], free_slots)
+                    if picked:
+                        claimed = await self.job_queue.claim(self.worker_id, [job.job_id for job in picked])
+                except Exception as e:
+                    logger.error(f"Worker {self.worker_id} failed to claim jobs: {e}")
+                self._leased.update(entry["job"]["job_id"] for entry in claimed)
+                now = time.time()
+                for entry in claimed:
+                    try:
+                        if not await self._should_run(entry):
+                            continue
+                    except Exception as e:
+                        logger.error(f"Worker {self.worker_id} failed to check job {entry['job']['job_id']}: {e}")
+                    await self.scheduler.submit(Job.model_validate(entry["job"]),
+                                                queued_seconds=max(now - entry["enqueued_at"], 0.0))
+            if not claimed:
+                wait_for_jobs = getattr(self.job_queue, "wait_for_jobs", None)
+                if wait_for_jobs and free_slots:
+                    await wait_for_jobs(config.JOB_QUEUE_POLL_INTERVAL_SECONDS)
+                else:
+                    await asyncio.sleep(config.JOB_QUEUE_POLL_INTERVAL_SECONDS)
+
+    async def _lease_loop(self):
+        while True:
+            await asyncio.sleep(config.JOB_QUEUE_LEASE_RENEW_SECONDS)
+            job_ids = list(self._leased)
+            try:
+                held = set(await self.job_queue.renew(self.worker_id, job_ids))
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} failed to renew its leases: {e}")
+                continue
+            for job_id in job_ids:
+                if job_id not in held and job_id in self._leased:
+                    logger.warning(f"Worker {self.worker_id} lost its lease on job {job_id}; another worker may run it")
+                    self._leased.discard(job_id)
+
+    async def _cancellation_loop(self):
+        """Cancellation is recorded on the job document by the API; poll it for jobs running here."""
+        while True:
+            await asyncio.sleep(config.WORKER_CANCEL_POLL_INTERVAL_SECONDS)
+            for job_id in self.scheduler.running_job_ids:
+                try:
+                    job = await self.job_service.get_job_by_id(job_id)
+                    if job and job.status == JobStatus.CANCELLED:
+                        await self.job_processor.cancel_job(job_id, job.prediction_id)
+                except Exception as e:
+                    logger.error(f"Worker {self.worker_id} failed to check job {job_id} for cancellation: {e}")
+
+    async def reap_handed_off_jobs(self) -> int:
+        """
+        Queue a completion for each handed-off job whose callbacks have gone quiet,
+        so a lost webhook can't leave it processing (with its credits reserved)
+        forever. The worker that claims it checks the prediction with the provider
+        and completes, fails or keeps waiting on the job. Returns the number queued.
+        """
+        cutoff = datetime.now() - timedelta(seconds=config.PREDICTION_STALL_TIMEOUT_SECONDS)
+        jobs = await self.job_archive.find_expired([JobStatus.PROCESSING.value], cutoff, config.WORKER_REAPER_PAGE_SIZE)
+        queued = 0
+        for doc in jobs:
+            job = Job(**doc)
+            if job.prediction_id:
+                await self.job_queue.enqueue(completion_entry(job))
+                queued += 1
+        if queued:
+            logger.info(f"Worker {self.worker_id} queued {queued} quiet handed-off jobs for a provider check")
+        return queued
+
+    async def _reaper_loop(self):
+        while True:
+            await asyncio.sleep(config.WORKER_REAPER_INTERVAL_SECONDS)
+            try:
+                await self.reap_handed_off_jobs()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} failed to reap handed-off jobs: {e}")
+
+    def snapshot(self):
+        return {"worker_id": self.worker_id, **self.scheduler.snapshot()}
+
+
+async def run_worker():
+    # Imported here so each spawned process sets up its own clients
+    from src.bootstrap import build_services, job_queue_backend, setup_google_credentials
+
+    dotenv.load_dotenv()
+    if job_queue_backend() == "memory":
+        raise SystemExit("The in-memory job queue cannot be shared with a separate worker process; "
+                         "run the API with REPOSITORY_BACKEND=memory instead, or set JOB_QUEUE_BACKEND=firestore.")
+    setup_google_credentials()
+    services = build_services()
+    worker = JobWorker(services.job_queue, services.job_service, services.job_processor,
+                       job_archive=services.job_archive)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await worker.start()
+    await stop.wait()
+    logger.info(f"Job worker {worker.worker_id} shutting down")
+    await worker.stop()
+
+
+def _run_process():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job worker processes")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")),
+                        help="Worker processes to run on this host (default: WORKER_PROCESSES or 1)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _run_process()
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_run_process, name=f"job-worker-{i}") for i in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    # Forward termination to the children; each drains its own scheduler
+    def _terminate(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+    signal.signal(signal.SIGTERM, _terminate)
+    signal.signal(signal.SIGINT, _terminate)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
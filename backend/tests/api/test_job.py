@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from fastapi import HTTPException, Response
+from src.api.job import create_job
+from src.repositories.memory_repository import (
+    InMemoryCreditLedger, InMemoryDatabaseRepository, InMemoryIdempotencyKeys, InMemoryJobQueue
+)
+from src.schemas.job import JobCreate, JobStatus, JobType
+from src.schemas.user import User
+from src.services.idempotency import IdempotencyService
+from src.services.job_service import JobService
+
+USER = User(user_id="u")
+
+
+class AdmitAll:
+    async def admit(self, user_id: str):
+        return None
+
+
+class BrokenQueue(InMemoryJobQueue):
+    def __init__(self):
+        super().__init__(lease_seconds=60)
+        self.broken = True
+
+    async def enqueue(self, job):
+        if self.broken:
+            raise ConnectionError("queue unavailable")
+        await super().enqueue(job)
+
+
+def request() -> JobCreate:
+    return JobCreate(project_id="p", job_type=JobType.VIDEO, parameters={"prompt": "a cat"})
+
+
+def services(queue=None):
+    ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10)
+    return {
+        "job_service": JobService(InMemoryDatabaseRepository("jobs"), ledger),
+        "job_queue": queue or InMemoryJobQueue(lease_seconds=60),
+        "admission": AdmitAll(),
+        "idempotency": IdempotencyService(InMemoryIdempotencyKeys()),
+    }, ledger
+
+
+def test_idempotent_retry_replays_the_queued_job():
+    async def scenario():
+        deps, _ = services()
+        first = await create_job(request(), Response(), "key-1", USER, **deps)
+        replay_response = Response()
+        replay = await create_job(request(), replay_response, "key-1", USER, **deps)
+        assert replay.job_id == first.job_id
+        assert replay_response.headers["Idempotent-Replayed"] == "true"
+        assert await deps["job_queue"].backlog() == 1
+
+        with pytest.raises(HTTPException) as raised:
+            await create_job(JobCreate(project_id="p", job_type=JobType.VIDEO, parameters={"prompt": "a dog"}),
+                             Response(), "key-1", USER, **deps)
+        assert raised.value.status_code == 422
+
+    asyncio.run(scenario())
+
+
+def test_failed_enqueue_fails_the_job_and_frees_the_key():
+    async def scenario():
+        queue = BrokenQueue()
+        deps, ledger = services(queue)
+        with pytest.raises(HTTPException) as raised:
+            await create_job(request(), Response(), "key-1", USER, **deps)
+        assert raised.value.status_code == 503
+        assert raised.value.headers["Retry-After"] == "1"
+
+        [orphan] = await deps["job_service"].get_project_jobs("p")
+        assert orphan.status == JobStatus.FAILED
+        assert await ledger.balance("u") == 10
+
+        # The retry creates (and queues) a new job instead of replaying the failed one
+        queue.broken = False
+        retry = await create_job(request(), Response(), "key-1", USER, **deps)
+        assert retry.job_id != orphan.job_id
+        assert await queue.backlog() == 1
+
+    asyncio.run(scenario())
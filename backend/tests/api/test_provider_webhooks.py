@@ -0,0 +1,70 @@
+import asyncio
+import json
+from fastapi import Request
+from src.api.provider_webhooks import replicate_prediction_callback
+from src.providers.fake_provider import FakeProvider
+from src.repositories.memory_repository import (
+    InMemoryDatabaseRepository, InMemoryJobQueue, LocalFileStorageRepository
+)
+from src.schemas.job import JobCreate, JobStatus, JobType, JobUpdate
+from src.services.job_processor import JobProcessor
+from src.services.job_service import JobService
+from src.worker import JobWorker
+
+
+def callback(payload) -> Request:
+    body = json.dumps(payload).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+
+async def handed_off_job(tmp_path):
+    job_service = JobService(InMemoryDatabaseRepository("jobs"))
+    queue = InMemoryJobQueue(lease_seconds=60)
+    provider = FakeProvider(duration_median_seconds=0.0, video_size=(64, 64), video_frames=4, seed=1)
+    processor = JobProcessor(job_service, LocalFileStorageRepository(str(tmp_path)), provider, queue,
+                             "http://api.test")
+    job = await job_service.create_job(JobCreate(project_id="p", job_type=JobType.VIDEO,
+                                                 parameters={"prompt": "a cat"}), "u")
+    prediction = await provider.create_video_prediction({"prompt": "a cat"})
+    await job_service.update_job(job.job_id, JobUpdate(status=JobStatus.PROCESSING, prediction_id=prediction.id))
+    return job_service, queue, processor, job.job_id, prediction.id
+
+
+def test_completed_callback_queues_the_job_for_a_worker(tmp_path, monkeypatch):
+    monkeypatch.delenv("REPLICATE_WEBHOOK_SECRET", raising=False)
+
+    async def scenario():
+        job_service, queue, processor, job_id, prediction_id = await handed_off_job(tmp_path)
+        completed = {"id": prediction_id, "status": "succeeded", "output": "ignored", "logs": ""}
+        response = await replicate_prediction_callback(job_id, callback(completed), processor, queue)
+        assert response == {"status": "received"}
+
+        # The API only records the callback; the job is finished by whichever worker claims it
+        assert (await job_service.get_job_by_id(job_id)).status == JobStatus.PROCESSING
+        worker = JobWorker(queue, job_service, processor, worker_count=1, worker_id="w")
+        [entry] = await queue.claim("w", [job_id])
+        assert await worker._should_run(entry)
+        await asyncio.sleep(0.2)  # let the fake render finish
+        await processor.process_job(JobType.VIDEO, job_id, entry["job"]["parameters"])
+        job = await job_service.get_job_by_id(job_id)
+        assert job.status == JobStatus.COMPLETED
+        assert job.result["replicate_url"] != "ignored"
+
+    asyncio.run(scenario())
+
+
+def test_progress_callback_is_recorded_without_queueing(tmp_path, monkeypatch):
+    monkeypatch.delenv("REPLICATE_WEBHOOK_SECRET", raising=False)
+
+    async def scenario():
+        job_service, queue, processor, job_id, prediction_id = await handed_off_job(tmp_path)
+        progress = {"id": prediction_id, "status": "processing", "logs": "50%|#####     | 10/20 [00:05<00:05]"}
+        await replicate_prediction_callback(job_id, callback(progress), processor, queue)
+        assert (await job_service.get_job_by_id(job_id)).progress > 5
+        assert await queue.backlog() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,128 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from replicate.exceptions import ReplicateError
+from src.services import concurrency
+from src.services.concurrency import AdaptiveConcurrencyLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Only the limiter's clock; the event loop keeps real time
+    monkeypatch.setattr(concurrency, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def limiter(initial=4.0, min_limit=1.0, max_limit=64.0) -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter("test", initial, min_limit, max_limit, latency_target_seconds=5.0)
+
+
+def complete(limiter: AdaptiveConcurrencyLimiter, calls: int, latency_seconds: float = 0.1, **outcome):
+    for _ in range(calls):
+        asyncio.run(limiter.acquire())
+        limiter.release(latency_seconds, **outcome)
+
+
+def test_additive_increase_is_about_one_per_window(clock):
+    subject = limiter(initial=4.0)
+    complete(subject, 4)
+    assert subject.limit == 4
+    complete(subject, 1)
+    assert subject.limit == 5
+
+
+def test_increase_stops_at_max(clock):
+    subject = limiter(initial=4.0, max_limit=5.0)
+    complete(subject, 50)
+    assert subject.limit == 5
+
+
+def test_throttling_halves_the_limit_down_to_min(clock):
+    subject = limiter(initial=16.0, min_limit=3.0)
+    complete(subject, 1, throttled=True)
+    assert subject.limit == 8
+    clock.now += 5
+    complete(subject, 1, throttled=True)
+    assert subject.limit == 4
+    clock.now += 5
+    complete(subject, 1, throttled=True)
+    assert subject.limit == 3
+    assert subject.snapshot()["throttled_calls"] == 3
+
+
+def test_slow_calls_decrease_once_per_latency_window(clock):
+    subject = limiter(initial=16.0)
+    complete(subject, 5, latency_seconds=6.0)
+    assert subject.limit == 8
+    clock.now += 5
+    complete(subject, 1, latency_seconds=6.0)
+    assert subject.limit == 4
+
+
+def test_waiters_are_served_in_order(clock):
+    subject = limiter(initial=1.0, max_limit=1.0)
+    order = []
+
+    async def call(name):
+        await subject.acquire()
+        order.append(name)
+        await asyncio.sleep(0)
+        subject.release(0.1)
+
+    async def scenario():
+        await asyncio.gather(*(call(name) for name in "abcd"))
+
+    asyncio.run(scenario())
+    assert order == list("abcd")
+    assert subject.snapshot()["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot(clock):
+    subject = limiter(initial=1.0, max_limit=1.0)
+
+    async def scenario():
+        await subject.acquire()
+        cancelled = asyncio.create_task(subject.acquire())
+        waiting = asyncio.create_task(subject.acquire())
+        await asyncio.sleep(0)
+        # The slot is handed to the first waiter just as it is cancelled; it must pass it on
+        subject.release(0.1)
+        cancelled.cancel()
+        await asyncio.wait_for(waiting, 1)
+        assert cancelled.cancelled()
+        assert subject.snapshot()["in_flight"] == 1
+        assert subject.snapshot()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_feeds_provider_throttling_into_the_limit(clock):
+    subject = limiter(initial=8.0)
+
+    async def throttled():
+        raise ReplicateError(status=429, title="Too Many Requests")
+
+    with pytest.raises(ReplicateError):
+        asyncio.run(subject.run(throttled))
+    assert subject.limit == 4
+    assert subject.snapshot()["in_flight"] == 0
+
+
+def test_run_ignores_errors_that_are_not_the_providers(clock):
+    subject = limiter(initial=8.0)
+
+    async def broken():
+        raise KeyError("not a provider error")
+
+    with pytest.raises(KeyError):
+        asyncio.run(subject.run(broken))
+    assert subject.limit == 8
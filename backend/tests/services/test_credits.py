@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from src.repositories.memory_repository import InMemoryCreditLedger, InMemoryDatabaseRepository
+from src.schemas.job import JobCreate, JobStatus, JobType, JobUpdate
+from src.services.credits import InsufficientCreditsError, job_credit_cost
+from src.services.job_service import JobService
+
+
+def test_reserve_holds_credits_until_settled():
+    async def scenario():
+        ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10)
+        assert await ledger.reserve("u", "r1", 3)
+        assert await ledger.balance("u") == 7
+        assert await ledger.commit("r1")
+        assert await ledger.balance("u") == 7
+
+        assert await ledger.reserve("u", "r2", 2)
+        assert await ledger.refund("r2")
+        assert await ledger.balance("u") == 7
+
+    asyncio.run(scenario())
+
+
+def test_settling_is_idempotent():
+    async def scenario():
+        ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10)
+        await ledger.reserve("u", "r1", 4)
+        assert await ledger.refund("r1")
+        assert not await ledger.refund("r1")
+        assert not await ledger.commit("r1")
+        assert await ledger.balance("u") == 10
+
+        await ledger.reserve("u", "r2", 4)
+        assert await ledger.commit("r2")
+        assert not await ledger.refund("r2")
+        assert await ledger.balance("u") == 6
+        assert not await ledger.commit("unknown")
+
+    asyncio.run(scenario())
+
+
+def test_reserve_drains_across_shards_but_never_overdraws():
+    async def scenario():
+        ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10)
+        # No single shard holds 9 credits; the slow path takes them from several
+        assert await ledger.reserve("u", "r1", 9)
+        assert not await ledger.reserve("u", "r2", 2)
+        assert await ledger.balance("u") == 1
+        assert await ledger.refund("r1")
+        assert await ledger.balance("u") == 10
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_reservations_never_overspend():
+    async def scenario():
+        ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10, document_write_seconds=0.001)
+        granted = await asyncio.gather(*(ledger.reserve("u", f"r{i}", 1) for i in range(25)))
+        assert sum(granted) == 10
+        assert await ledger.balance("u") == 0
+
+    asyncio.run(scenario())
+
+
+def test_job_lifecycle_settles_its_reservation():
+    async def scenario():
+        ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10)
+        service = JobService(InMemoryDatabaseRepository("jobs"), ledger)
+        request = JobCreate(project_id="p", job_type=JobType.VIDEO, parameters={"prompt": "a cat"})
+        cost = job_credit_cost(JobType.VIDEO, request.parameters)
+
+        completed = await service.create_job(request, "u")
+        failed = await service.create_job(request, "u")
+        assert await ledger.balance("u") == 10 - 2 * cost
+
+        await service.update_job(completed.job_id, JobUpdate(status=JobStatus.COMPLETED))
+        await service.update_job(failed.job_id, JobUpdate(status=JobStatus.FAILED, error="boom"))
+        assert await ledger.balance("u") == 10 - cost
+        # A late update for a finished job neither changes it nor settles again
+        await service.update_job(failed.job_id, JobUpdate(status=JobStatus.COMPLETED))
+        assert (await service.get_job_by_id(failed.job_id)).status == JobStatus.FAILED
+        assert await ledger.balance("u") == 10 - cost
+
+    asyncio.run(scenario())
+
+
+def test_job_creation_is_refused_when_credits_run_out():
+    async def scenario():
+        request = JobCreate(project_id="p", job_type=JobType.VIDEO, parameters={"prompt": "a cat"})
+        cost = job_credit_cost(JobType.VIDEO, request.parameters)
+        ledger = InMemoryCreditLedger(shard_count=4, starting_credits=cost)
+        service = JobService(InMemoryDatabaseRepository("jobs"), ledger)
+        await service.create_job(request, "u")
+        with pytest.raises(InsufficientCreditsError):
+            await service.create_job(request, "u")
+        assert await ledger.balance("u") == 0
+        assert len(await service.get_project_jobs("p")) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from src.config import config
+from src.repositories.memory_repository import InMemoryIdempotencyKeys
+from src.services.idempotency import (
+    IdempotencyError, IdempotencyKeyInFlightError, IdempotencyKeyReusedError, IdempotencyService, request_hash
+)
+
+BODY = request_hash({"job_type": "Video", "parameters": {"prompt": "a cat"}})
+OTHER_BODY = request_hash({"job_type": "Video", "parameters": {"prompt": "a dog"}})
+
+
+def test_request_hash_ignores_key_order():
+    assert request_hash({"a": 1, "b": {"c": 2, "d": 3}}) == request_hash({"b": {"d": 3, "c": 2}, "a": 1})
+
+
+def test_completed_key_replays_the_job():
+    async def scenario():
+        service = IdempotencyService(InMemoryIdempotencyKeys())
+        assert await service.begin("u", "key-1", BODY) is None
+        await service.complete("u", "key-1", BODY, "job-1")
+        assert await service.begin("u", "key-1", BODY) == "job-1"
+
+    asyncio.run(scenario())
+
+
+def test_replay_survives_a_process_restart():
+    async def scenario():
+        repo = InMemoryIdempotencyKeys()
+        first = IdempotencyService(repo)
+        assert await first.begin("u", "key-1", BODY) is None
+        await first.complete("u", "key-1", BODY, "job-1")
+        # A fresh service has no cached copy and reads the stored key
+        second = IdempotencyService(repo)
+        assert await second.begin("u", "key-1", BODY) == "job-1"
+        assert await second.begin("u", "key-1", BODY) == "job-1"
+        assert second.snapshot()["entries"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_key_reused_with_a_different_body_conflicts():
+    async def scenario():
+        service = IdempotencyService(InMemoryIdempotencyKeys())
+        await service.begin("u", "key-1", BODY)
+        with pytest.raises(IdempotencyKeyReusedError):
+            await service.begin("u", "key-1", OTHER_BODY)
+        await service.complete("u", "key-1", BODY, "job-1")
+        with pytest.raises(IdempotencyKeyReusedError) as raised:
+            await service.begin("u", "key-1", OTHER_BODY)
+        assert raised.value.status_code == 422
+
+    asyncio.run(scenario())
+
+
+def test_retry_while_the_first_request_is_in_flight_conflicts():
+    async def scenario():
+        service = IdempotencyService(InMemoryIdempotencyKeys())
+        results = await asyncio.gather(
+            *(service.begin("u", "key-1", BODY) for _ in range(5)), return_exceptions=True
+        )
+        assert results.count(None) == 1
+        assert sum(isinstance(result, IdempotencyKeyInFlightError) for result in results) == 4
+        assert IdempotencyKeyInFlightError.status_code == 409
+
+    asyncio.run(scenario())
+
+
+def test_released_key_can_be_retried():
+    async def scenario():
+        service = IdempotencyService(InMemoryIdempotencyKeys())
+        assert await service.begin("u", "key-1", BODY) is None
+        await service.release("u", "key-1")
+        assert await service.begin("u", "key-1", OTHER_BODY) is None
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_key_expires(monkeypatch):
+    monkeypatch.setattr(config, "IDEMPOTENCY_PENDING_TTL_SECONDS", 0.0)
+
+    async def scenario():
+        service = IdempotencyService(InMemoryIdempotencyKeys())
+        assert await service.begin("u", "key-1", BODY) is None
+        # The first request died without completing or releasing its key
+        assert await service.begin("u", "key-1", BODY) is None
+
+    asyncio.run(scenario())
+
+
+def test_keys_are_scoped_per_user():
+    async def scenario():
+        service = IdempotencyService(InMemoryIdempotencyKeys())
+        await service.begin("u", "key-1", BODY)
+        await service.complete("u", "key-1", BODY, "job-1")
+        assert await service.begin("v", "key-1", OTHER_BODY) is None
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("key", ["", "k" * (config.IDEMPOTENCY_KEY_MAX_LENGTH + 1)])
+def test_invalid_keys_are_rejected(key):
+    service = IdempotencyService(InMemoryIdempotencyKeys())
+    with pytest.raises(IdempotencyError) as raised:
+        asyncio.run(service.begin("u", key, BODY))
+    assert raised.value.status_code == 400
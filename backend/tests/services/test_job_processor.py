@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from src.config import config
+from src.providers.fake_provider import FakeProvider
+from src.repositories.memory_repository import InMemoryDatabaseRepository, LocalFileStorageRepository
+from src.schemas.job import JobCreate, JobStatus, JobType
+from src.services.job_processor import JobProcessor, interpolation_factor
+from src.services.job_service import JobService
+
+
+class CountingProvider(FakeProvider):
+    def __init__(self):
+        super().__init__(duration_median_seconds=0.0, api_latency_median_seconds=0.0)
+        self.predictions = 0
+
+    async def create_video_prediction(self, model_input, webhook=None, webhook_events_filter=None):
+        self.predictions += 1
+        return await super().create_video_prediction(model_input, webhook, webhook_events_filter)
+
+
+def test_interpolation_factor_defaults_to_config(monkeypatch):
+    monkeypatch.setattr(config, "VIDEO_INTERPOLATION_FACTOR", 2)
+    assert interpolation_factor(None) == 2
+    assert interpolation_factor({"interpolation_factor": 1}) == 1
+
+
+def test_oversized_interpolation_factor_is_clamped(monkeypatch):
+    monkeypatch.setattr(config, "VIDEO_INTERPOLATION_MAX_FACTOR", 4)
+    assert interpolation_factor({"interpolation_factor": 3}) == 3
+    assert interpolation_factor({"interpolation_factor": 10_000}) == 4
+    assert interpolation_factor({"interpolation_factor": 8.0}) == 4
+
+
+@pytest.mark.parametrize("factor", ["2x", "abc", None, 2.5, 0, -3, True, [2]])
+def test_invalid_interpolation_factor_is_rejected(factor):
+    with pytest.raises(ValueError):
+        interpolation_factor({"interpolation_factor": factor})
+
+
+def test_invalid_interpolation_factor_fails_before_generation(tmp_path):
+    async def scenario():
+        job_service = JobService(InMemoryDatabaseRepository("jobs"))
+        provider = CountingProvider()
+        processor = JobProcessor(job_service, LocalFileStorageRepository(str(tmp_path)), provider)
+        job = await job_service.create_job(JobCreate(
+            project_id="p", job_type=JobType.VIDEO,
+            parameters={"prompt": "a cat", "interpolation_factor": "lots"}
+        ), "u")
+        await processor.process_video_job(job.job_id, job.parameters)
+        failed = await job_service.get_job_by_id(job.job_id)
+        assert failed.status == JobStatus.FAILED
+        assert "interpolation_factor" in failed.error
+        assert provider.predictions == 0
+
+    asyncio.run(scenario())
+
+
+def test_missing_shot_fails_the_composite_wait(tmp_path):
+    async def scenario():
+        job_repo = InMemoryDatabaseRepository("jobs")
+        job_service = JobService(job_repo)
+        processor = JobProcessor(job_service, LocalFileStorageRepository(str(tmp_path)), CountingProvider())
+        shot = await job_service.create_job(JobCreate(project_id="p", job_type=JobType.VIDEO,
+                                                      parameters={"prompt": "a cat"}), "u")
+        await job_repo.delete(shot.job_id)
+        with pytest.raises(ValueError, match="Shot 0 is missing"):
+            await processor._await_shot_jobs("parent", [shot])
+
+    asyncio.run(scenario())
@@ -0,0 +1,181 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+from src.config import config
+from src.schemas.job import Job, JobPriority, JobStatus, JobType
+from src.services.job_scheduler import JobScheduler, _FairQueue, _dispatch_queue
+
+
+def make_job(job_id: str, user_id: str, priority: JobPriority = JobPriority.INTERACTIVE,
+             project_id: str = "p") -> Job:
+    now = datetime.now()
+    return Job(job_id=job_id, user_id=user_id, project_id=project_id, job_type=JobType.VIDEO,
+               status=JobStatus.QUEUED, priority=priority, created_at=now, modified_at=now, parameters={})
+
+
+def user_queue(weights=None) -> _FairQueue:
+    weights = weights or {}
+    return _FairQueue(lambda user_id: weights.get(user_id, 1.0), lambda user_id: deque())
+
+
+def drain(queue: _FairQueue, eligible=lambda path: True) -> list:
+    items = []
+    while (item := queue.pop(eligible)) is not None:
+        items.append(item)
+    return items
+
+
+class RecordingProcessor:
+    def __init__(self):
+        self.started = []
+        self.max_running_per_user = {}
+        self._running_per_user = {}
+
+    async def process_job(self, job_type, job_id, parameters):
+        user_id = job_id.split("-")[0]
+        self.started.append(job_id)
+        self._running_per_user[user_id] = self._running_per_user.get(user_id, 0) + 1
+        self.max_running_per_user[user_id] = max(
+            self.max_running_per_user.get(user_id, 0), self._running_per_user[user_id]
+        )
+        await asyncio.sleep(0)
+        self._running_per_user[user_id] -= 1
+
+
+def test_backlogged_flows_are_interleaved():
+    queue = user_queue()
+    for i in range(6):
+        queue.push(("a",), f"a{i}")
+    queue.push(("b",), "b0")
+    queue.push(("b",), "b1")
+    assert drain(queue) == ["a0", "b0", "a1", "b1", "a2", "a3", "a4", "a5"]
+
+
+def test_weights_set_the_share():
+    queue = user_queue({"a": 3.0})
+    for i in range(6):
+        queue.push(("a",), f"a{i}")
+        queue.push(("b",), f"b{i}")
+    assert drain(queue)[:8] == ["a0", "b0", "a1", "a2", "a3", "b1", "a4", "a5"]
+
+
+def test_idle_flow_cannot_bank_credit():
+    queue = user_queue()
+    for i in range(10):
+        queue.push(("a",), f"a{i}")
+    served = [queue.pop(lambda path: True) for _ in range(8)]
+    assert served == [f"a{i}" for i in range(8)]
+    # b was idle while a ran alone; it starts at the current virtual time and gets its
+    # fair share from now on, not 8 jobs in a row
+    for i in range(4):
+        queue.push(("b",), f"b{i}")
+    assert drain(queue) == ["b0", "a8", "b1", "a9", "b2", "b3"]
+
+
+def test_ineligible_flows_are_skipped():
+    queue = user_queue()
+    for i in range(3):
+        queue.push(("a",), f"a{i}")
+        queue.push(("b",), f"b{i}")
+    assert drain(queue, eligible=lambda path: path[0] != "a") == ["b0", "b1", "b2"]
+    assert len(queue) == 3
+
+
+def test_priority_classes_share_by_weight():
+    queue = _dispatch_queue()
+    for i in range(8):
+        queue.push((JobPriority.INTERACTIVE, "u", "p"), f"i{i}")
+        queue.push((JobPriority.BATCH, "u", "p"), f"b{i}")
+    served = drain(queue)[:10]
+    # interactive:batch is 4:1 by default
+    assert served.count("b0") + served.count("b1") == 2
+    assert [item for item in served if item.startswith("i")] == [f"i{i}" for i in range(8)]
+
+
+def test_select_does_not_starve_a_user_behind_another_users_backlog(monkeypatch):
+    monkeypatch.setattr(config, "JOB_USER_CONCURRENCY_CAP", 2)
+
+    async def scenario():
+        scheduler = JobScheduler(RecordingProcessor(), worker_count=4)
+        # The shared queue returns candidates oldest first: a's backlog, then b's one job
+        candidates = [make_job(f"a-{i}", "a") for i in range(50)] + [make_job("b-0", "b")]
+        chosen = scheduler.select(candidates, limit=4)
+        assert [job.job_id for job in chosen] == ["a-0", "b-0", "a-1"]
+
+    asyncio.run(scenario())
+
+
+def test_select_counts_jobs_already_held_against_the_cap(monkeypatch):
+    monkeypatch.setattr(config, "JOB_USER_CONCURRENCY_CAP", 2)
+
+    async def scenario():
+        # Not started, so submitted jobs stay pending
+        scheduler = JobScheduler(RecordingProcessor(), worker_count=4)
+        await scheduler.submit(make_job("a-0", "a"))
+        assert scheduler.user_headroom("a") == 1
+        chosen = scheduler.select([make_job(f"a-{i}", "a") for i in range(1, 5)], limit=4)
+        assert [job.job_id for job in chosen] == ["a-1"]
+        await scheduler.submit(chosen[0])
+        assert scheduler.saturated_users == ["a"]
+        assert scheduler.select([make_job("a-5", "a")], limit=4) == []
+
+    asyncio.run(scenario())
+
+
+def test_select_keeps_fair_share_across_rounds(monkeypatch):
+    monkeypatch.setattr(config, "JOB_USER_CONCURRENCY_CAP", 100)
+
+    async def scenario():
+        scheduler = JobScheduler(RecordingProcessor(), worker_count=4)
+        a_jobs = [make_job(f"a-{i}", "a") for i in range(20)]
+        b_jobs = [make_job(f"b-{i}", "b") for i in range(20)]
+        chosen = []
+        # One claim slot per round: without carried-over tags the first user would win every round
+        for _ in range(6):
+            pick = scheduler.select(a_jobs + b_jobs, limit=1)[0]
+            chosen.append(pick.user_id)
+            (a_jobs if pick.user_id == "a" else b_jobs).remove(pick)
+        assert chosen.count("a") == chosen.count("b") == 3
+
+    asyncio.run(scenario())
+
+
+def test_workers_run_jobs_in_fair_order_within_the_user_cap(monkeypatch):
+    monkeypatch.setattr(config, "JOB_USER_CONCURRENCY_CAP", 2)
+
+    async def scenario():
+        processor = RecordingProcessor()
+        scheduler = JobScheduler(processor, worker_count=1)
+        for i in range(3):
+            await scheduler.submit(make_job(f"a-{i}", "a"))
+        await scheduler.submit(make_job("b-0", "b"))
+        await scheduler.start()
+        try:
+            while len(processor.started) < 4:
+                await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+        return processor.started
+
+    assert asyncio.run(scenario()) == ["a-0", "b-0", "a-1", "a-2"]
+
+
+def test_user_cap_limits_concurrent_jobs(monkeypatch):
+    monkeypatch.setattr(config, "JOB_USER_CONCURRENCY_CAP", 2)
+
+    async def scenario():
+        processor = RecordingProcessor()
+        scheduler = JobScheduler(processor, worker_count=4)
+        for i in range(6):
+            await scheduler.submit(make_job(f"a-{i}", "a"))
+        await scheduler.start()
+        try:
+            while len(processor.started) < 6 or scheduler.running_job_ids:
+                await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+        assert processor.max_running_per_user == {"a": 2}
+        snapshot = scheduler.snapshot()
+        assert snapshot["classes"]["interactive"]["started"] == 6
+
+    asyncio.run(scenario())
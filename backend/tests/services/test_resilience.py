@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from replicate.exceptions import ReplicateError
+from src.services import resilience
+from src.services.resilience import (
+    CircuitBreaker, CircuitOpenError, FatalProviderError, ThrottledProviderError, call_with_retry
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Only the breaker's clock; the event loop keeps real time
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.snapshot()["rejected_calls"] == 1
+
+
+def test_half_open_admits_a_single_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_seconds=30)
+    open_breaker(breaker)
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_seconds=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens_for_a_full_timeout(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout_seconds=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_released_probe_lets_the_next_caller_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_seconds=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+
+def test_parked_caller_waits_while_the_probe_is_in_flight(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_seconds=30)
+    open_breaker(breaker)
+    clock.now += 30
+    # Half-open with a free probe slot: a parked job may go ahead and take it
+    asyncio.run(breaker.wait_until_available(0))
+    assert breaker.allow()
+    # The slot is taken; the others must not be released into a call that would be rejected
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(breaker.wait_until_available(0))
+
+
+def test_parked_caller_resumes_when_the_probe_succeeds(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_seconds=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+
+    async def scenario():
+        waiter = asyncio.create_task(breaker.wait_until_available(60))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        breaker.record_success()
+        await asyncio.wait_for(waiter, 2)
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_call_with_retry_counts_only_retryable_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_seconds=30)
+
+    async def rejected():
+        raise ReplicateError(status=422, title="Unprocessable Entity")
+
+    async def throttled():
+        raise ReplicateError(status=429, title="Too Many Requests")
+
+    for _ in range(3):
+        with pytest.raises(FatalProviderError):
+            asyncio.run(call_with_retry(rejected, breaker, attempts=1))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(ThrottledProviderError):
+        asyncio.run(call_with_retry(throttled, breaker, attempts=2, base_delay_seconds=0.001))
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+from src.config import config
+from src.providers.fake_provider import FakeProvider
+from src.repositories.memory_repository import (
+    InMemoryCreditLedger, InMemoryDatabaseRepository, InMemoryJobArchive, InMemoryJobQueue,
+    LocalFileStorageRepository
+)
+from src.schemas.job import JobCreate, JobStatus, JobType, JobUpdate
+from src.services.job_processor import JobProcessor, PROGRESS_SUBMITTED
+from src.services.job_service import JobService
+from src.worker import JobWorker
+
+
+async def handed_off_job(tmp_path, quiet_seconds: float):
+    job_repo = InMemoryDatabaseRepository("jobs")
+    ledger = InMemoryCreditLedger(shard_count=4, starting_credits=10)
+    job_service = JobService(job_repo, ledger)
+    queue = InMemoryJobQueue(lease_seconds=60)
+    # A prediction that will not finish during the test, and whose callback never arrives
+    provider = FakeProvider(duration_median_seconds=1000.0, video_size=(64, 64), video_frames=4, seed=1)
+    processor = JobProcessor(job_service, LocalFileStorageRepository(str(tmp_path)), provider, queue,
+                             "http://api.test")
+    worker = JobWorker(queue, job_service, processor, worker_count=1, worker_id="w",
+                       job_archive=InMemoryJobArchive(job_repo))
+    job = await job_service.create_job(JobCreate(project_id="p", job_type=JobType.VIDEO,
+                                                 parameters={"prompt": "a cat"}), "u")
+    prediction = await provider.create_video_prediction({"prompt": "a cat"})
+    await job_service.update_job(job.job_id, JobUpdate(
+        status=JobStatus.PROCESSING, started_at=datetime.now(), prediction_id=prediction.id, progress=PROGRESS_SUBMITTED
+    ))
+    job_repo._documents[job.job_id]["modified_at"] = datetime.now() - timedelta(seconds=quiet_seconds)
+    return job_service, ledger, queue, worker, processor, job.job_id
+
+
+async def run_claimed(queue, worker, processor, job_id):
+    [entry] = await queue.claim("w", [job_id])
+    assert await worker._should_run(entry)
+    await processor.process_job(JobType.VIDEO, job_id, entry["job"]["parameters"])
+
+
+def test_reaper_fails_a_stalled_handed_off_job_and_refunds_it(tmp_path):
+    async def scenario():
+        job_service, ledger, queue, worker, processor, job_id = await handed_off_job(
+            tmp_path, config.PREDICTION_STALL_TIMEOUT_SECONDS + 1
+        )
+        assert await ledger.balance("u") < 10
+
+        assert await worker.reap_handed_off_jobs() == 1
+        await run_claimed(queue, worker, processor, job_id)
+        job = await job_service.get_job_by_id(job_id)
+        assert job.status == JobStatus.FAILED
+        assert "made no progress" in job.error
+        assert await ledger.balance("u") == 10
+
+    asyncio.run(scenario())
+
+
+def test_reaper_fails_a_handed_off_job_past_its_deadline(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.JOB_DEADLINE_SECONDS, "Video", 0.0001)
+
+    async def scenario():
+        job_service, _, _, worker, processor, job_id = await handed_off_job(
+            tmp_path, config.PREDICTION_STALL_TIMEOUT_SECONDS + 1
+        )
+        assert await worker.reap_handed_off_jobs() == 1
+        # Called directly: process_job's own timeout would fire first with this deadline
+        await processor.complete_prediction(await job_service.get_job_by_id(job_id))
+        job = await job_service.get_job_by_id(job_id)
+        assert job.status == JobStatus.FAILED
+        assert "deadline" in job.error
+
+    asyncio.run(scenario())
+
+
+def test_reaper_leaves_recently_active_handed_off_jobs(tmp_path):
+    async def scenario():
+        _, _, queue, worker, _, _ = await handed_off_job(tmp_path, 1)
+        assert await worker.reap_handed_off_jobs() == 0
+        assert await queue.backlog() == 0
+
+    asyncio.run(scenario())